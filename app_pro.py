@@ -3,52 +3,2976 @@ Stock Manager PRO - Επαγγελματική Εφαρμογή Διαχείρι
 Modern UI με Dashboard, Στατιστικά & Γραφήματα
 """
 
+import time
+
+# Αρχή μέτρησης χρόνου εκκίνησης (βλ. STARTUP_BUDGET / --startup-check)
+IMPORT_STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
 from pathlib import Path
 from datetime import datetime, timedelta
+import gzip
+import hashlib
+import io
 import json
+import os
+import platform
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import unicodedata
+import uuid
+import bisect
+import math
+from array import array
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Any
+from importlib import import_module
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Μηχανή αποθήκευσης: "sqlite" (data/stock_manager.db) ή "json" (παλιά αρχεία JSON)
+STORAGE_BACKEND = "sqlite"
+
+# Χρόνοι εκκίνησης (δευτερόλεπτα) που ελέγχει το --startup-check:
+# import = φόρτωση του module, first_paint = από το main() μέχρι να σχεδιαστεί
+# το παράθυρο, process = συνολικά για το EXE (μαζί με την αποσυμπίεση του --onefile)
+STARTUP_BUDGET = {
+    'import': 0.5,
+    'first_paint': 1.5,
+    'process': 6.0
+}
+
+# Βαριά modules που χρειάζονται μόνο οι εξαγωγές - φορτώνονται στο παρασκήνιο
+# αφού εμφανιστεί το παράθυρο (prewarm_imports), όχι στην εκκίνηση
+PREWARM_MODULES = ("numpy", "pandas", "openpyxl", "reportlab.platypus", "reportlab.pdfbase.ttfonts")
+
+
+class ModernButton(tk.Button):
+    """Modern styled button"""
+    def __init__(self, parent: tk.Widget, **kwargs: Any) -> None:
+        super().__init__(
+            parent,
+            relief=tk.FLAT,
+            font=("Segoe UI", 10, "bold"),
+            cursor="hand2",
+            borderwidth=0,
+            **kwargs
+        )
+        self.bind("<Enter>", self.on_enter)
+        self.bind("<Leave>", self.on_leave)
+        self.default_bg = kwargs.get('bg', '#3498db')
+    
+    def on_enter(self, e):
+        self['background'] = self.lighten_color(self.default_bg)
+    
+    def on_leave(self, e):
+        self['background'] = self.default_bg
+    
+    def lighten_color(self, color):
+        # Simple color lightening
+        colors = {
+            '#27ae60': '#2ecc71',
+            '#3498db': '#5dade2',
+            '#e74c3c': '#ec7063',
+            '#e67e22': '#f39c12',
+            '#9b59b6': '#bb8fce',
+            '#16a085': '#1abc9c'
+        }
+        return colors.get(color, '#5dade2')
+
+
+class VirtualTable:
+    """Πίνακας (Treeview) που σχεδιάζει μόνο τις ορατές γραμμές
+
+    Οι γραμμές μένουν στη λίστα rows (π.χ. ids κινήσεων) και το Treeview έχει
+    μόνο όσα items χωράνε στο ύψος του, που ξαναγεμίζουν με τις γραμμές
+    first..first+n σε κάθε κύλιση - 100k+ γραμμές δεν κοστίζουν ούτε inserts
+    ούτε μνήμη Tk. Ταξινόμηση και εναλλασσόμενα χρώματα γίνονται στα δεδομένα.
+
+    render(row) -> (τιμές στηλών, tags), key(row) -> κλειδί για selection() και
+    sort_keys: στήλη -> κλειδί ταξινόμησης (αλλιώς το κείμενο της στήλης με
+    collation_key).
+    """
+
+    def __init__(self, parent, columns, render, key, sort_keys=None):
+        self.columns = list(columns)
+        self.render = render
+        self.key = key
+        self.sort_keys = sort_keys or {}
+        self.rows = []
+        self.first = 0
+        self.slots = []
+        # slot -> (values, tags) που έχει ήδη το Tk, για να αλλάζουν μόνο οι γραμμές που διαφέρουν
+        self.drawn = {}
+        self.selected = None
+        self.sort_column = None
+        self.sort_reverse = False
+        
+        frame = tk.Frame(parent, bg="white")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Η κατακόρυφη μπάρα αφορά τα rows, όχι τα items του Treeview
+        self.vsb = ttk.Scrollbar(frame, orient="vertical", command=self.on_scrollbar)
+        hsb = ttk.Scrollbar(frame, orient="horizontal")
+        self.tree = ttk.Treeview(
+            frame,
+            columns=self.columns,
+            show="headings",
+            xscrollcommand=hsb.set,
+            selectmode="browse"
+        )
+        hsb.config(command=self.tree.xview)
+        
+        for col in self.columns:
+            self.tree.heading(col, text=col, anchor=tk.W, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=120, anchor=tk.W)
+        
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        hsb.grid(row=1, column=0, sticky="ew")
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+        
+        # Μήνυμα πάνω από τον πίνακα (set_message), π.χ. όσο φορτώνονται τα δεδομένα
+        self.message = tk.Label(frame, bg="white", fg="#7f8c8d", font=("Segoe UI", 12))
+        
+        # Tags
+        self.tree.tag_configure("low", background="#ffebee", foreground="#c62828")
+        self.tree.tag_configure("ok", background="#e8f5e9", foreground="#2e7d32")
+        self.tree.tag_configure("evenrow", background="#f5f5f5")
+        self.tree.tag_configure("oddrow", background="white")
+        
+        self.tree.bind("<Configure>", lambda e: self.layout())
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<ButtonPress-1>", self.on_click)
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-len(self.slots)))
+        self.tree.bind("<Next>", lambda e: self.move_selection(len(self.slots)))
+    
+    def set_rows(self, rows):
+        """Νέα δεδομένα - κρατάει ταξινόμηση, θέση κύλισης και επιλογή αν υπάρχει ακόμα"""
+        self.rows = list(rows)
+        if self.sort_column is not None:
+            self.apply_sort()
+        if self.selected is not None and not any(self.key(row) == self.selected for row in self.rows):
+            self.selected = None
+        self.draw()
+    
+    def set_message(self, text):
+        """Κείμενο στη μέση του πίνακα (None: απόκρυψη)"""
+        if text:
+            self.message.config(text=text)
+            self.message.place(relx=0.5, rely=0.5, anchor="center")
+        else:
+            self.message.place_forget()
+    
+    def selection(self):
+        """Το κλειδί της επιλεγμένης γραμμής (λίστα, όπως το Treeview.selection())"""
+        return [self.selected] if self.selected is not None else []
+    
+    def visible_rows(self):
+        rowheight = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        # Ύψος επικεφαλίδας από τη θέση του πρώτου item, αν φαίνεται
+        heading = rowheight
+        if self.slots:
+            bbox = self.tree.bbox(self.slots[0])
+            if bbox:
+                heading = bbox[1]
+        return max(1, (self.tree.winfo_height() - heading) // rowheight)
+    
+    def layout(self):
+        count = self.visible_rows()
+        while len(self.slots) < count:
+            self.slots.append(self.tree.insert("", tk.END, iid=f"slot{len(self.slots)}"))
+        while len(self.slots) > count:
+            self.drawn.pop(self.slots[-1], None)
+            self.tree.delete(self.slots.pop())
+        self.draw()
+    
+    def draw(self):
+        self.first = max(0, min(self.first, len(self.rows) - len(self.slots)))
+        selection = []
+        for i, iid in enumerate(self.slots):
+            index = self.first + i
+            if index < len(self.rows):
+                row = self.rows[index]
+                values, tags = self.render(row)
+                entry = (tuple(values), (*tags, "evenrow" if index % 2 else "oddrow"))
+                if self.selected is not None and self.key(row) == self.selected:
+                    selection.append(iid)
+            else:
+                entry = ((), ())
+            if self.drawn.get(iid) != entry:
+                self.tree.item(iid, values=entry[0], tags=entry[1])
+                self.drawn[iid] = entry
+        if selection != list(self.tree.selection()):
+            self.tree.selection_set(selection)
+        
+        total = len(self.rows)
+        if total:
+            self.vsb.set(self.first / total, min(1.0, (self.first + len(self.slots)) / total))
+        else:
+            self.vsb.set(0, 1)
+    
+    def scroll(self, rows):
+        self.first += rows
+        self.draw()
+        return "break"
+    
+    def on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.rows))
+        elif args[0] == 'scroll':
+            self.first += int(args[1]) * (len(self.slots) if args[2] == 'pages' else 1)
+        self.draw()
+    
+    def on_click(self, event):
+        iid = self.tree.identify_row(event.y)
+        if iid in self.slots:
+            index = self.first + self.slots.index(iid)
+            if index < len(self.rows):
+                self.selected = self.key(self.rows[index])
+    
+    def move_selection(self, delta):
+        """Μετακίνηση επιλογής με τα πλήκτρα, με κύλιση ώστε να φαίνεται"""
+        if not self.rows:
+            return "break"
+        keys = [self.key(row) for row in self.rows[self.first:self.first + len(self.slots)]]
+        if self.selected in keys:
+            index = self.first + keys.index(self.selected)
+        else:
+            index = next((i for i, row in enumerate(self.rows) if self.key(row) == self.selected), self.first - delta)
+        index = max(0, min(index + delta, len(self.rows) - 1))
+        self.selected = self.key(self.rows[index])
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + len(self.slots):
+            self.first = index - len(self.slots) + 1
+        self.draw()
+        return "break"
+    
+    def sort_by(self, col):
+        """Ταξινόμηση με κλικ στην επικεφαλίδα (δεύτερο κλικ: αντίστροφα)"""
+        self.sort_reverse = col == self.sort_column and not self.sort_reverse
+        self.sort_column = col
+        self.apply_sort()
+        for c in self.columns:
+            arrow = (' ▼' if self.sort_reverse else ' ▲') if c == col else ''
+            self.tree.heading(c, text=c + arrow)
+        self.first = 0
+        self.draw()
+    
+    def apply_sort(self):
+        key = self.sort_keys.get(self.sort_column)
+        if key is None:
+            index = self.columns.index(self.sort_column)
+            key = lambda row: ProductSearchIndex.collation_key(self.render(row)[0][index])
+        try:
+            self.rows.sort(key=key, reverse=self.sort_reverse)
+        except TypeError as e:
+            print(f"Sort error: {e}")
+
+
+# Storage
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """Εγγραφή σε προσωρινό αρχείο, fsync και atomic rename στο τελικό
+
+    Μια διακοπή (crash, διακοπή ρεύματος) αφήνει είτε το παλιό είτε το νέο
+    αρχείο ολόκληρο, ποτέ μισογραμμένο.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    encoding = None if 'b' in mode else 'utf-8'
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    # Και ο φάκελος, ώστε να μείνει μόνιμη η μετονομασία (δεν υποστηρίζεται στα Windows)
+    if os.name != 'nt':
+        fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def set_aside(path):
+    """Μετονομασία κατεστραμμένου αρχείου σε *.corrupt-<ημερομηνία> (κρατιέται για έλεγχο)"""
+    path = Path(path)
+    target = path.with_name(f"{path.name}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.replace(path, target)
+    return target
+
+
+def unique_product_names(products):
+    """Διπλότυπα ονόματα (π.χ. από παλιά δεδομένα) γίνονται "όνομα #id" - τα ονόματα είναι UNIQUE στη βάση"""
+    seen = set()
+    for p in products:
+        if p['name'] in seen:
+            p['name'] = f"{p['name']} #{p['id']}"
+        seen.add(p['name'])
+    return products
+
+
+def iter_json_array(path, chunk_size=65536):
+    """Διαβάζει ένα JSON array στοιχείο-στοιχείο χωρίς να φορτώσει όλο το αρχείο"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{Path(path).name}: δεν είναι JSON array")
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+class StorageConflict(Exception):
+    """Η αλλαγή δεν ταιριάζει με τα αποθηκευμένα δεδομένα (π.χ. ενημέρωση προϊόντος που διαγράφηκε)"""
+
+
+class JsonStorage:
+    """Αποθήκευση σε products.json / movements.json / categories.json
+
+    Σε journal mode οι κινήσεις δεν ξαναγράφονται ολόκληρες: κάθε νέα κίνηση ή
+    διαγραφή προστίθεται ως μία γραμμή JSON στο movements.journal (με fsync) και
+    το movements.json ξαναγράφεται μόνο κατά το compaction.
+
+    Όλα τα αρχεία γράφονται με atomic_write. Αρχείο που δεν διαβάζεται (π.χ.
+    μισογραμμένο από παλιότερη έκδοση) μετονομάζεται σε *.corrupt-* και
+    καταγράφεται στο damaged, ώστε να ξαναφτιαχτεί με recover().
+    """
+
+    # Compaction του journal σε νέο snapshot μετά από τόσες εγγραφές
+    JOURNAL_COMPACT_EVERY = 5000
+
+    def __init__(self, data_dir, journal=True):
+        self.data_dir = Path(data_dir)
+        self.products_file = self.data_dir / "products.json"
+        self.movements_file = self.data_dir / "movements.json"
+        self.categories_file = self.data_dir / "categories.json"
+        self.journal_file = self.data_dir / "movements.journal"
+        self.journal = journal
+        self.journal_handle = None
+        self.journal_entries = 0
+        self.damaged = []
+
+        # Δικό του αντίγραφο των δεδομένων για την επανεγγραφή των αρχείων
+        self.products = []
+        self.movements = {}
+        self.categories = None
+
+    def read_file(self, path):
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                return json.load(f)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            print(f"Storage error: {path.name}: {e}")
+            set_aside(path)
+            self.damaged.append(path.name)
+            return None
+
+    def write_file(self, path, data):
+        with atomic_write(path) as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def load_categories(self):
+        self.categories = self.read_file(self.categories_file)
+        return list(self.categories) if self.categories is not None else None
+
+    def load_products(self):
+        self.products = self.read_file(self.products_file) or []
+        return [dict(p) for p in self.products]
+
+    def load_movements(self):
+        """Snapshot (movements.json) + replay του journal"""
+        self.movements = {m['id']: m for m in self.read_file(self.movements_file) or []}
+        self.journal_entries = self.replay_journal()
+        return [dict(m) for m in self.movements.values()]
+
+    def load_balances(self):
+        """Δεν υπάρχει αποθηκευμένο snapshot υπολοίπων - οι κινήσεις φορτώνονται όλες"""
+        return None
+
+    def load_rollups(self):
+        return None
+
+    def allocate_id(self, table, count=1):
+        """Τα αρχεία JSON χρησιμοποιούνται από έναν σταθμό - τα ids δίνονται από την εφαρμογή"""
+        return None
+
+    def poll_changes(self):
+        return []
+
+    def replay_journal(self):
+        """Εφαρμογή των εγγραφών του journal πάνω στο snapshot - επιστρέφει το πλήθος τους"""
+        if not self.journal_file.exists():
+            return 0
+
+        count = 0
+        valid_size = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    # Μισογραμμένη τελευταία γραμμή (διακοπή κατά την εγγραφή)
+                    break
+                self.apply_journal_entry(entry)
+                valid_size += len(line)
+                count += 1
+
+        # Αποκοπή της μισογραμμένης γραμμής ώστε οι νέες εγγραφές να ξεκινούν καθαρά
+        if valid_size < self.journal_file.stat().st_size:
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_size)
+        return count
+
+    def apply_journal_entry(self, entry):
+        # Οι εγγραφές είναι idempotent, οπότε το replay μετά από compaction είναι ασφαλές
+        if entry['op'] == 'add':
+            self.movements[entry['movement']['id']] = entry['movement']
+        elif entry['op'] == 'delete':
+            self.movements.pop(entry['id'], None)
+        elif entry['op'] == 'delete_product':
+            self.movements = {
+                mid: m for mid, m in self.movements.items() if m['product_id'] != entry['product_id']
+            }
+
+    def append_journal(self, entries):
+        if self.journal_handle is None:
+            self.journal_handle = open(self.journal_file, 'a', encoding='utf-8')
+        for entry in entries:
+            self.journal_handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.journal_handle.flush()
+        os.fsync(self.journal_handle.fileno())
+        self.journal_entries += len(entries)
+
+    def compact(self):
+        """Νέο snapshot στο movements.json και άδειασμα του journal"""
+        if self.journal_handle is not None:
+            self.journal_handle.close()
+            self.journal_handle = None
+        self.write_file(self.movements_file, list(self.movements.values()))
+        if self.journal_file.exists():
+            self.journal_file.unlink()
+        self.journal_entries = 0
+
+    def apply(self, ops):
+        """Εφαρμογή αλλαγών και επανεγγραφή μόνο των αρχείων που άλλαξαν
+
+        Idempotent, ώστε να μπορεί να ξαναγίνει μετά από σφάλμα: τα προϊόντα
+        ενημερώνονται ανά id και οι λίστες της μνήμης αλλάζουν μόνο αφού
+        γραφτούν τα αρχεία (οι εγγραφές του journal είναι ήδη idempotent).
+        """
+        products = self.products
+        categories = self.categories
+        journal = []
+        for op, payload in ops:
+            if op == 'add_product':
+                # Upsert ανά id - μια νέα προσπάθεια δεν προσθέτει το προϊόν δεύτερη φορά
+                products = [p for p in products if p['id'] != payload['id']] + [dict(payload)]
+            elif op == 'update_product':
+                products = [dict(payload) if p['id'] == payload['id'] else p for p in products]
+            elif op == 'delete_product':
+                products = [p for p in products if p['id'] != payload]
+                journal.append({'op': 'delete_product', 'product_id': payload})
+            elif op == 'add_movement':
+                journal.append({'op': 'add', 'movement': dict(payload)})
+            elif op == 'delete_movement':
+                journal.append({'op': 'delete', 'id': payload})
+            elif op == 'set_categories':
+                categories = list(payload)
+            elif op == 'rebuild_balances':
+                # Δεν υπάρχουν αποθηκευμένα υπόλοιπα στα αρχεία JSON
+                pass
+            else:
+                raise ValueError(f"Άγνωστη λειτουργία αποθήκευσης: {op}")
+
+        if products is not self.products:
+            self.write_file(self.products_file, products)
+            self.products = products
+        if categories is not self.categories:
+            self.write_file(self.categories_file, categories)
+            self.categories = categories
+        if journal:
+            if self.journal:
+                self.append_journal(journal)
+            for entry in journal:
+                self.apply_journal_entry(entry)
+            if not self.journal or self.journal_entries >= self.JOURNAL_COMPACT_EVERY:
+                self.compact()
+        # Τα αρχεία JSON δεν έχουν περιορισμούς - δεν απορρίπτεται καμία λειτουργία
+        return []
+
+    def load_product(self, product_id):
+        return next((dict(p) for p in self.products if p['id'] == product_id), None)
+
+    def snapshot(self):
+        """Τα αποθηκευμένα δεδομένα (products, movements, categories) για πλήρες backup"""
+        return self.products, list(self.movements.values()), self.categories or []
+
+    def replace_all(self, products, movements, categories):
+        """Πλήρης αντικατάσταση δεδομένων (π.χ. επαναφορά backup)"""
+        self.products = [dict(p) for p in products]
+        self.movements = {m['id']: dict(m) for m in movements}
+        self.categories = list(categories)
+        self.write_file(self.products_file, self.products)
+        self.write_file(self.categories_file, self.categories)
+        self.compact()
+
+    def recover(self, products, movements, categories):
+        """Ανακατασκευή των κατεστραμμένων αρχείων από backup
+
+        Για τις κινήσεις εφαρμόζεται και το journal πάνω στο backup, ώστε να
+        μη χαθούν όσες καταγράφηκαν μετά από αυτό.
+        """
+        if self.products_file.name in self.damaged:
+            self.products = [dict(p) for p in products]
+            self.write_file(self.products_file, self.products)
+        if self.categories_file.name in self.damaged:
+            self.categories = list(categories)
+            self.write_file(self.categories_file, self.categories)
+        if self.movements_file.name in self.damaged:
+            self.movements = {m['id']: dict(m) for m in movements}
+            self.replay_journal()
+            self.compact()
+        self.damaged = []
+
+    def close(self):
+        if self.journal_entries:
+            self.compact()
+
+
+class SqliteStorage:
+    """Αποθήκευση σε SQLite (data/stock_manager.db) - μία εγγραφή ανά αλλαγή
+
+    Οι πίνακες product_balances (ανά προϊόν) και period_totals (ανά μήνα
+    "YYYY-MM" και ημέρα "YYYY-MM-DD") κρατάνε σύνολα εισαγωγών/εξαγωγών,
+    ενημερώνονται στην ίδια συναλλαγή με τις κινήσεις και επιτρέπουν εκκίνηση
+    χωρίς φόρτωση όλου του ιστορικού.
+
+    Αν η προηγούμενη εκτέλεση σε αυτόν τον υπολογιστή δεν έκλεισε κανονικά
+    (session_open:<όνομα υπολογιστή> στα settings), στο άνοιγμα γίνεται PRAGMA
+    quick_check (διαβάζει όλη τη βάση, οπότε όχι σε κάθε εκκίνηση). Κατεστραμμένη
+    βάση μετονομάζεται σε *.corrupt-* και δημιουργείται νέα, που γεμίζει με
+    recover() από backup.
+
+    Πολλοί σταθμοί μπορούν να δουλεύουν στην ίδια βάση: κάθε αλλαγή γράφεται
+    και στο change_log με το id του σταθμού, τα νέα ids δίνονται από τη βάση
+    (allocate_id) και το poll_changes() επιστρέφει τις αλλαγές των άλλων
+    σταθμών, ώστε να εφαρμοστούν στη μνήμη χωρίς πλήρη επαναφόρτωση. Για τις
+    διαγραφές το change_log κρατάει στο details και ό,τι αφαιρέθηκε (την κίνηση
+    ή τα σύνολα ανά ημέρα), ώστε τα υπόλοιπα να ενημερωθούν χωρίς το ιστορικό.
+    """
+
+    # Πόσο κρατιούνται οι εγγραφές του change_log
+    CHANGE_LOG_DAYS = 7
+    ID_SQL = {
+        'products': "SELECT IFNULL(MAX(id), 0) FROM products",
+        'movements': "SELECT IFNULL(MAX(id), 0) FROM movements"
+    }
+
+    PRODUCT_COLUMNS = ('id', 'name', 'code', 'category', 'initial_stock', 'min_limit', 'price')
+    MOVEMENT_COLUMNS = ('id', 'product_id', 'type', 'quantity', 'notes', 'date')
+
+    def __init__(self, db_file, data_dir):
+        self.db_file = Path(db_file)
+        self.data_dir = Path(data_dir)
+        self.damaged = []
+        self.station = uuid.uuid4().hex[:12]
+        # Το station αλλάζει σε κάθε εκτέλεση - το σημάδι ανοιχτής συνεδρίας
+        # κρατιέται ανά υπολογιστή, ώστε να βρεθεί στην επόμενη εκκίνηση
+        self.session_key = f"session_open:{platform.node() or 'local'}"
+        try:
+            self.open()
+        except sqlite3.DatabaseError as e:
+            print(f"Storage error: {self.db_file.name}: {e}")
+            for suffix in ("", "-wal", "-shm"):
+                path = self.db_file.with_name(self.db_file.name + suffix)
+                if path.exists():
+                    set_aside(path)
+            self.damaged.append(self.db_file.name)
+            self.open()
+            # Τα products.json/movements.json είναι παλιότερα από τη βάση που χάλασε -
+            # η νέα βάση γεμίζει μόνο από backup (recover), ποτέ από αυτά
+            with self.conn:
+                self.set_setting('json_migrated', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self.migrate_from_json()
+        if self.get_setting('balances_built') is None or self.get_setting('rollups_built') is None:
+            with self.conn:
+                self.rebuild_balances()
+        self.conn.execute("PRAGMA foreign_keys=ON")
+
+        # Σύνδεση του Tk thread για ids και έλεγχο αλλαγών άλλων σταθμών (η
+        # self.conn ανήκει στο thread αποθήκευσης)
+        self.ui_conn = sqlite3.connect(str(self.db_file), timeout=10)
+        with self.ui_conn:
+            self.ui_conn.execute(
+                "DELETE FROM change_log WHERE created_at < datetime('now', ?)",
+                (f"-{self.CHANGE_LOG_DAYS} days",)
+            )
+        self.last_seq = self.ui_conn.execute(
+            "SELECT IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0)"
+        ).fetchone()[0]
+        self.data_version = self.ui_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def open(self):
+        # Μετά τη φόρτωση η σύνδεση χρησιμοποιείται μόνο από το thread αποθήκευσης
+        self.conn = sqlite3.connect(str(self.db_file), timeout=10, check_same_thread=False)
+        try:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.create_schema()
+            if self.get_setting(self.session_key):
+                result = self.conn.execute("PRAGMA quick_check").fetchone()[0]
+                if result != 'ok':
+                    raise sqlite3.DatabaseError(result)
+            with self.conn:
+                # Κοινό σημάδι παλιότερης έκδοσης - δεν αφορά κανέναν συγκεκριμένο σταθμό
+                self.conn.execute("DELETE FROM settings WHERE key = 'session_open'")
+                self.set_setting(self.session_key, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        except sqlite3.DatabaseError:
+            self.conn.close()
+            raise
+
+    def create_schema(self):
+        """Ίδιο schema με το data/stock_manager.db που συνοδεύει την εφαρμογή"""
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE,
+                    code TEXT,
+                    category TEXT DEFAULT "Άλλο",
+                    initial_stock REAL,
+                    min_limit REAL,
+                    price REAL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS movements (
+                    id INTEGER PRIMARY KEY,
+                    product_id INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    quantity REAL,
+                    notes TEXT,
+                    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(product_id) REFERENCES products(id)
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS product_balances (
+                    product_id INTEGER PRIMARY KEY,
+                    total_in REAL NOT NULL DEFAULT 0,
+                    total_out REAL NOT NULL DEFAULT 0,
+                    movement_count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS period_totals (
+                    period TEXT PRIMARY KEY,
+                    total_in REAL NOT NULL DEFAULT 0,
+                    total_out REAL NOT NULL DEFAULT 0,
+                    movement_count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS change_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    station TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    payload TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS id_sequences (
+                    name TEXT PRIMARY KEY,
+                    last_id INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            self.conn.execute("INSERT OR IGNORE INTO id_sequences (name) VALUES ('products'), ('movements')")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_movements_product_date ON movements(product_id, date)"
+            )
+
+            # Επιπλέον πεδία προϊόντων (π.χ. location) που δεν έχουν δική τους στήλη
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(products)")]
+            if 'extra' not in columns:
+                self.conn.execute("ALTER TABLE products ADD COLUMN extra TEXT")
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(change_log)")]
+            if 'details' not in columns:
+                self.conn.execute("ALTER TABLE change_log ADD COLUMN details TEXT")
+
+    def get_setting(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_setting(self, key, value):
+        self.conn.execute(
+            "INSERT INTO settings (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def migrate_from_json(self):
+        """Μεταφορά (μία φορά) των products.json / movements.json / categories.json στη βάση"""
+        if self.get_setting('json_migrated'):
+            return
+
+        has_data = self.conn.execute(
+            "SELECT EXISTS(SELECT 1 FROM products) OR EXISTS(SELECT 1 FROM movements)"
+        ).fetchone()[0]
+
+        products_file = self.data_dir / "products.json"
+        movements_file = self.data_dir / "movements.json"
+        categories_file = self.data_dir / "categories.json"
+
+        with self.conn:
+            if not has_data:
+                if products_file.exists():
+                    # Η μνήμη φορτώνεται μετά από τη βάση, οπότε η μετονομασία διπλότυπων φαίνεται παντού
+                    for p in iter_json_array(products_file):
+                        self.insert_product(p, rename=True)
+
+                if movements_file.exists():
+                    batch = []
+                    for m in iter_json_array(movements_file):
+                        batch.append(self.movement_row(m))
+                        if len(batch) >= 1000:
+                            self.insert_movements(batch)
+                            batch = []
+                    self.insert_movements(batch)
+
+            if categories_file.exists() and self.get_setting('categories') is None:
+                with open(categories_file, 'r', encoding='utf-8-sig') as f:
+                    self.set_setting('categories', json.dumps(json.load(f), ensure_ascii=False))
+
+            if not has_data:
+                self.rebuild_balances()
+            self.set_setting('json_migrated', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    @staticmethod
+    def to_number(value):
+        """Οι στήλες REAL επιστρέφουν float - κρατάμε τους ακέραιους ως int"""
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    def product_row(self, p):
+        extra = {k: v for k, v in p.items() if k not in self.PRODUCT_COLUMNS}
+        return (
+            p['id'],
+            p['name'],
+            p.get('code', ''),
+            p.get('category', '⚡ Άλλο'),
+            p.get('initial_stock', 0),
+            p.get('min_limit', 0),
+            p.get('price', 0),
+            json.dumps(extra, ensure_ascii=False) if extra else None
+        )
+
+    def movement_row(self, m):
+        return (m['id'], m['product_id'], m['type'], m['quantity'], m.get('notes', ''), m['date'])
+
+    def insert_product(self, p, rename=False):
+        """Νέα εγγραφή προϊόντος - διπλότυπο όνομα δίνει IntegrityError
+
+        rename=True μόνο για τη μεταφορά από JSON: το προϊόν κρατιέται ως
+        "όνομα #id", αφού η εφαρμογή το διαβάζει μετά από τη βάση.
+        """
+        sql = (
+            "INSERT INTO products (id, name, code, category, initial_stock, min_limit, price, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        try:
+            self.conn.execute(sql, self.product_row(p))
+        except sqlite3.IntegrityError:
+            if not rename:
+                raise
+            self.conn.execute(sql, self.product_row(dict(p, name=f"{p['name']} #{p['id']}")))
+
+    def insert_movements(self, rows):
+        if rows:
+            self.conn.executemany(
+                "INSERT INTO movements (id, product_id, type, quantity, notes, date) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def rebuild_balances(self):
+        """Επανυπολογισμός των product_balances / period_totals από τις κινήσεις (μετά από μαζικές αλλαγές)"""
+        totals = (
+            "TOTAL(CASE WHEN type = 'in' THEN quantity END), "
+            "TOTAL(CASE WHEN type = 'out' THEN quantity END), "
+            "COUNT(*) FROM movements"
+        )
+        self.conn.execute("DELETE FROM product_balances")
+        self.conn.execute(
+            "INSERT INTO product_balances (product_id, total_in, total_out, movement_count) "
+            f"SELECT product_id, {totals} GROUP BY product_id"
+        )
+
+        # Ίδιος έλεγχος εγκυρότητας ημερομηνίας με το date_key
+        valid = "WHERE length(date) >= 10 AND substr(date, 5, 1) = '-' AND substr(date, 8, 1) = '-'"
+        self.conn.execute("DELETE FROM period_totals")
+        for length in (10, 7):
+            self.conn.execute(
+                "INSERT INTO period_totals (period, total_in, total_out, movement_count) "
+                f"SELECT substr(date, 1, {length}), {totals} {valid} GROUP BY substr(date, 1, {length})"
+            )
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.set_setting('balances_built', now)
+        self.set_setting('rollups_built', now)
+
+    def update_totals(self, table, key_column, key, movement_type, quantity, count):
+        self.conn.execute(
+            f"INSERT INTO {table} ({key_column}, total_in, total_out, movement_count) "
+            f"VALUES (?, ?, ?, ?) ON CONFLICT({key_column}) DO UPDATE SET "
+            "total_in = total_in + excluded.total_in, "
+            "total_out = total_out + excluded.total_out, "
+            "movement_count = movement_count + excluded.movement_count",
+            (key,
+             quantity if movement_type == 'in' else 0,
+             quantity if movement_type == 'out' else 0,
+             count)
+        )
+
+    def update_rollups(self, date, movement_type, quantity, count):
+        """Ενημέρωση των period_totals της ημέρας και του μήνα μιας κίνησης (count = +1/-1 ή πλήθος)"""
+        day = date_key(date)[:10]
+        if day:
+            self.update_totals('period_totals', 'period', day, movement_type, quantity, count)
+            self.update_totals('period_totals', 'period', day[:7], movement_type, quantity, count)
+
+    def update_balance(self, product_id, movement_type, quantity, sign):
+        self.update_totals('product_balances', 'product_id', product_id, movement_type, (quantity or 0) * sign, sign)
+
+    def load_categories(self):
+        value = self.get_setting('categories')
+        return json.loads(value) if value is not None else None
+
+    def product_dict(self, row):
+        p = dict(zip(self.PRODUCT_COLUMNS, row[:7]))
+        p['code'] = p['code'] or ''
+        for key in ('initial_stock', 'min_limit', 'price'):
+            p[key] = self.to_number(p[key] or 0)
+        if row[7]:
+            p.update(json.loads(row[7]))
+        return p
+
+    def iter_products(self):
+        for row in self.conn.execute(
+            "SELECT id, name, code, category, initial_stock, min_limit, price, extra FROM products ORDER BY id"
+        ):
+            yield self.product_dict(row)
+
+    def movement_dict(self, row):
+        m = dict(zip(self.MOVEMENT_COLUMNS, row))
+        m['quantity'] = self.to_number(m['quantity'] or 0)
+        m['notes'] = m['notes'] or ''
+        return m
+
+    def iter_movements(self):
+        for row in self.conn.execute(
+            "SELECT id, product_id, type, quantity, notes, date FROM movements ORDER BY id"
+        ):
+            yield self.movement_dict(row)
+
+    def load_products(self):
+        return list(self.iter_products())
+
+    def load_movements(self):
+        return list(self.iter_movements())
+
+    def load_balances(self):
+        """{product_id: {'in', 'out', 'count'}} από το product_balances, χωρίς ανάγνωση κινήσεων"""
+        return {
+            row[0]: {'in': self.to_number(row[1]), 'out': self.to_number(row[2]), 'count': row[3]}
+            for row in self.ui_conn.execute(
+                "SELECT product_id, total_in, total_out, movement_count FROM product_balances"
+            )
+        }
+
+    def load_product(self, product_id):
+        """Το αποθηκευμένο προϊόν (ή None) - για ευθυγράμμιση της μνήμης μετά από απορριφθείσα αλλαγή"""
+        row = self.ui_conn.execute(
+            "SELECT id, name, code, category, initial_stock, min_limit, price, extra FROM products WHERE id = ?",
+            (product_id,)
+        ).fetchone()
+        return self.product_dict(row) if row else None
+
+    def allocate_id(self, table, count=1):
+        """Νέο id για products/movements, μοναδικό ανάμεσα σε όλους τους σταθμούς
+
+        Μία σύντομη συναλλαγή - το id δεσμεύεται πριν γραφτεί η εγγραφή από το
+        thread αποθήκευσης. Με count δεσμεύονται count διαδοχικά ids και
+        επιστρέφεται το πρώτο.
+        """
+        with self.ui_conn:
+            self.ui_conn.execute(
+                f"UPDATE id_sequences SET last_id = MAX(last_id, ({self.ID_SQL[table]})) + ? WHERE name = ?",
+                (count, table)
+            )
+            return self.ui_conn.execute(
+                "SELECT last_id FROM id_sequences WHERE name = ?", (table,)
+            ).fetchone()[0] - count + 1
+
+    def log_change(self, op, payload, details=None):
+        self.conn.execute(
+            "INSERT INTO change_log (station, op, payload, details) VALUES (?, ?, ?, ?)",
+            (self.station, op, json.dumps(payload, ensure_ascii=False),
+             json.dumps(details, ensure_ascii=False) if details is not None else None)
+        )
+
+    def poll_changes(self):
+        """Αλλαγές άλλων σταθμών από τον τελευταίο έλεγχο
+
+        Επιστρέφει λίστα (op, payload, details) ή None όταν χρειάζεται πλήρης
+        επαναφόρτωση (επαναφορά backup σε άλλο σταθμό ή χαμένες εγγραφές του
+        change_log). details: η κίνηση που διαγράφηκε (delete_movement) ή
+        [ημέρα, τύπος, ποσότητα, πλήθος] των κινήσεων του προϊόντος (delete_product).
+        Το PRAGMA data_version κάνει τον έλεγχο χωρίς αλλαγές σχεδόν δωρεάν.
+        """
+        data_version = self.ui_conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return []
+        self.data_version = data_version
+
+        rows = self.ui_conn.execute(
+            "SELECT seq, station, op, payload, details FROM change_log WHERE seq > ? ORDER BY seq",
+            (self.last_seq,)
+        ).fetchall()
+        if not rows:
+            return []
+
+        # Με AUTOINCREMENT κενό στην αρίθμηση σημαίνει εγγραφές που διαγράφηκαν (παλιές)
+        gap = rows[0][0] > self.last_seq + 1
+        self.last_seq = rows[-1][0]
+
+        changes = [
+            (op, json.loads(payload), json.loads(details) if details is not None else None)
+            for seq, station, op, payload, details in rows if station != self.station
+        ]
+        if gap or any(change[0] == 'replace_all' for change in changes):
+            return None
+        return changes
+
+    def load_rollups(self):
+        """{period: {'in', 'out', 'count'}} από το period_totals (μήνες "YYYY-MM" και ημέρες "YYYY-MM-DD")"""
+        return {
+            row[0]: {'in': self.to_number(row[1]), 'out': self.to_number(row[2]), 'count': row[3]}
+            for row in self.ui_conn.execute(
+                "SELECT period, total_in, total_out, movement_count FROM period_totals WHERE movement_count != 0"
+            )
+        }
+
+    def load_recent_movements(self, limit):
+        """Οι τελευταίες κινήσεις (με σειρά καταχώρησης)"""
+        rows = self.conn.execute(
+            "SELECT id, product_id, type, quantity, notes, date FROM movements ORDER BY id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [self.movement_dict(row) for row in reversed(rows)]
+
+    def iter_movements_readonly(self):
+        """Όλες οι κινήσεις από ξεχωριστή σύνδεση (για φόρτωση σε άλλο thread)
+
+        Με WAL η ανάγνωση βλέπει ένα σταθερό στιγμιότυπο και δεν εμποδίζει τις
+        εγγραφές του thread αποθήκευσης.
+        """
+        conn = sqlite3.connect(f"{self.db_file.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            for row in conn.execute(
+                "SELECT id, product_id, type, quantity, notes, date FROM movements ORDER BY id"
+            ):
+                yield self.movement_dict(row)
+        finally:
+            conn.close()
+
+    def snapshot(self):
+        """Τα αποθηκευμένα δεδομένα (products, movements, categories) για πλήρες backup"""
+        return self.load_products(), self.iter_movements(), self.load_categories() or []
+
+    def apply(self, ops):
+        """Εφαρμογή αλλαγών σε μία συναλλαγή, κάθε λειτουργία σε δικό της savepoint
+
+        Λειτουργία που απορρίπτει η βάση (π.χ. κίνηση για προϊόν που διέγραψε
+        άλλος σταθμός ή όνομα που υπάρχει ήδη) αναιρείται μόνη της και οι
+        υπόλοιπες γράφονται κανονικά. Επιστρέφει λίστα (θέση στο ops, σφάλμα)
+        των λειτουργιών που απορρίφθηκαν.
+        """
+        rejected = []
+        with self.conn:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            for position, (op, payload) in enumerate(ops):
+                self.conn.execute("SAVEPOINT op")
+                try:
+                    self.apply_op(op, payload)
+                except (sqlite3.IntegrityError, StorageConflict) as e:
+                    self.conn.execute("ROLLBACK TO op")
+                    rejected.append((position, e))
+                self.conn.execute("RELEASE op")
+        return rejected
+
+    def apply_op(self, op, payload):
+        details = None
+        if op == 'add_product':
+            self.insert_product(payload)
+        elif op == 'update_product':
+            row = self.product_row(payload)
+            updated = self.conn.execute(
+                "UPDATE products SET name = ?, code = ?, category = ?, initial_stock = ?, "
+                "min_limit = ?, price = ?, extra = ? WHERE id = ?",
+                row[1:] + (row[0],)
+            ).rowcount
+            if not updated:
+                raise StorageConflict(f"Το προϊόν {payload['id']} δεν υπάρχει (διαγράφηκε από άλλο σταθμό)")
+        elif op == 'delete_product':
+            # Αφαίρεση των κινήσεων του προϊόντος από τα σύνολα ημέρας/μήνα
+            details = self.conn.execute(
+                "SELECT substr(date, 1, 10), type, TOTAL(quantity), COUNT(*) FROM movements "
+                "WHERE product_id = ? GROUP BY substr(date, 1, 10), type", (payload,)
+            ).fetchall()
+            for day, movement_type, quantity, count in details:
+                self.update_rollups(day, movement_type, -quantity, -count)
+            self.conn.execute("DELETE FROM movements WHERE product_id = ?", (payload,))
+            self.conn.execute("DELETE FROM product_balances WHERE product_id = ?", (payload,))
+            self.conn.execute("DELETE FROM products WHERE id = ?", (payload,))
+        elif op == 'add_movement':
+            self.insert_movements([self.movement_row(payload)])
+            self.update_balance(payload['product_id'], payload['type'], payload['quantity'], 1)
+            self.update_rollups(payload['date'], payload['type'], payload['quantity'] or 0, 1)
+        elif op == 'delete_movement':
+            row = self.conn.execute(
+                "SELECT product_id, type, quantity, date FROM movements WHERE id = ?", (payload,)
+            ).fetchone()
+            if row:
+                product_id, movement_type, quantity, date = row
+                details = {'id': payload, 'product_id': product_id, 'type': movement_type,
+                           'quantity': self.to_number(quantity or 0), 'date': date}
+                self.conn.execute("DELETE FROM movements WHERE id = ?", (payload,))
+                self.update_balance(product_id, movement_type, quantity, -1)
+                self.update_rollups(date, movement_type, -(quantity or 0), -1)
+        elif op == 'set_categories':
+            self.set_setting('categories', json.dumps(list(payload), ensure_ascii=False))
+        elif op == 'rebuild_balances':
+            self.rebuild_balances()
+        else:
+            raise ValueError(f"Άγνωστη λειτουργία αποθήκευσης: {op}")
+        self.log_change(op, payload, details)
+
+    def replace_all(self, products, movements, categories):
+        """Πλήρης αντικατάσταση δεδομένων (π.χ. επαναφορά backup)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM movements")
+            self.conn.execute("DELETE FROM products")
+            # Η επαναφορά κάνει το ίδιο στη μνήμη πριν από το save_all (recover ξαναφορτώνει)
+            for p in unique_product_names([dict(p) for p in products]):
+                self.insert_product(p)
+            self.insert_movements([self.movement_row(m) for m in movements])
+            self.rebuild_balances()
+            self.set_setting('categories', json.dumps(list(categories), ensure_ascii=False))
+            self.log_change('replace_all', None)
+
+    def recover(self, products, movements, categories):
+        """Νέα βάση μετά από καταστροφή - γεμίζει από backup"""
+        self.replace_all(products, movements, categories)
+        self.damaged = []
+
+    def close(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM settings WHERE key = ?", (self.session_key,))
+        self.conn.close()
+        self.ui_conn.close()
+
+
+# Backups
+
+def backup_datetime(path):
+    """Ημερομηνία ενός backup από το όνομά του (backup_YYYYmmdd_HHMMSS[_NN][.delta].jsonl.gz)"""
+    stamp = Path(path).name[len("backup_"):].split('.')[0]
+    return datetime.strptime(stamp[:15], "%Y%m%d_%H%M%S")
+
+
+def backup_sort_key(path):
+    """Χρονολογική σειρά backups, και για όσα γράφτηκαν στο ίδιο δευτερόλεπτο"""
+    stamp = Path(path).name[len("backup_"):].split('.')[0]
+    counter = stamp[16:]
+    return stamp[:15], int(counter) if counter.isdigit() else 1
+
+
+class HashingFile:
+    """Περιτύλιγμα binary αρχείου που μετράει μέγεθος και SHA-256 όσων γράφονται/διαβάζονται"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.f.write(data)
+        self.sha.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.sha.update(data)
+        self.size += len(data)
+        return data
+
+    def flush(self):
+        self.f.flush()
+
+
+class BackupManager:
+    """Αυξητικά backups: πλήρες snapshot (base) και μικρά deltas με τις αλλαγές
+
+    Κάθε delta περιέχει μόνο τις λειτουργίες αποθήκευσης (add_movement κτλ) από
+    το προηγούμενο backup, οπότε μία κίνηση κοστίζει λίγα KB. Η επαναφορά σε
+    οποιοδήποτε σημείο γίνεται φορτώνοντας το base και εφαρμόζοντας τα deltas.
+
+    Τα backups γράφονται ως gzip JSON lines (.jsonl.gz): μία γραμμή header και
+    μία γραμμή ανά προϊόν/κίνηση/κατηγορία (ή λειτουργία, για τα deltas), ώστε
+    εγγραφή και επαναφορά να γίνονται σταδιακά. Τα παλιά backup_*.json
+    διαβάζονται κανονικά.
+
+    Για κάθε backup γράφεται μία γραμμή στο manifest.jsonl (ημερομηνία, μέγεθος,
+    πλήθη, checksum, base/parent), ώστε η λίστα των backups να μη χρειάζεται
+    ανάγνωση των ίδιων των αρχείων.
+
+    Όταν πολλοί σταθμοί μοιράζονται τον φάκελο data, backups γράφει μόνο ο
+    σταθμός που κρατάει το backups.lock - οι αλλαγές των άλλων του φτάνουν από
+    το change_log της βάσης.
+    """
+
+    # Νέο πλήρες snapshot μετά από τόσα deltas
+    DELTAS_PER_BASE = 50
+    # Πόσες αλυσίδες (base + deltas) κρατάμε
+    KEEP_CHAINS = 5
+    PATTERNS = ("backup_*.jsonl.gz", "backup_*.json")
+    FORMAT_VERSION = 2
+
+    def __init__(self, backup_dir):
+        self.backup_dir = Path(backup_dir)
+        self.backup_dir.mkdir(exist_ok=True)
+        self.manifest_file = self.backup_dir / "manifest.jsonl"
+        self.lock_file = self.backup_dir / "backups.lock"
+        self.lock_handle = None
+        self.lock_attempted = False
+        self.needs_base = False
+        self.pending = []
+        self.entries = {}
+        if not self.acquire_lock():
+            self.load_manifest()
+
+    @property
+    def is_writer(self):
+        return self.lock_handle is not None
+
+    def acquire_lock(self):
+        """Lock του φακέλου backups - True αν αυτός ο σταθμός γράφει τα backups"""
+        if self.lock_handle is not None:
+            return True
+
+        handle = open(self.lock_file, 'a+b')
+        try:
+            if msvcrt is not None:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            elif fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            self.lock_attempted = True
+            return False
+
+        self.lock_handle = handle
+        # Ο προηγούμενος σταθμός μπορεί να έγραψε backups - αν το lock περάσει σε
+        # εμάς ενώ τρέχουμε, οι αλλαγές στο μεταξύ καλύπτονται με νέο πλήρες backup
+        self.entries = {}
+        self.load_manifest()
+        self.pending = []
+        self.needs_base = self.lock_attempted
+        self.lock_attempted = True
+        return True
+
+    def close(self):
+        if self.lock_handle is not None:
+            self.lock_handle.close()
+            self.lock_handle = None
+
+    @property
+    def head(self):
+        """Το τελευταίο backup (αρχή της επόμενης αλυσίδας deltas)"""
+        if not self.entries:
+            return None
+        return self.entries[max(self.entries, key=backup_sort_key)]
+
+    def backup_files(self):
+        return [path for pattern in self.PATTERNS for path in self.backup_dir.glob(pattern)]
+
+    def load_manifest(self):
+        """Φόρτωση του manifest και συμφιλίωση με τα αρχεία του φακέλου"""
+        changed = False
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Μισογραμμένη γραμμή - το manifest ξαναγράφεται καθαρό
+                        changed = True
+                        break
+                    self.entries[entry['file']] = entry
+
+        files = {path.name for path in self.backup_files()}
+        for name in list(self.entries):
+            if name not in files:
+                del self.entries[name]
+                changed = True
+
+        # Backups χωρίς εγγραφή (π.χ. από παλιότερη έκδοση) - διαβάζονται μία φορά
+        for name in sorted(files - set(self.entries), key=backup_sort_key):
+            try:
+                self.entries[name] = self.scan_entry(self.backup_dir / name)
+                changed = True
+            except Exception as e:
+                print(f"Backup error: {name}: {type(e).__name__}: {e}")
+
+        if changed and self.is_writer:
+            self.write_manifest()
+
+    def write_manifest(self):
+        """Πλήρης επανεγγραφή του manifest (μόνο μετά από καθαρισμό/συμφιλίωση)"""
+        with atomic_write(self.manifest_file) as f:
+            for name in sorted(self.entries, key=backup_sort_key):
+                f.write(json.dumps(self.entries[name], ensure_ascii=False) + "\n")
+
+    def append_manifest(self, entry):
+        self.entries[entry['file']] = entry
+        with open(self.manifest_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def scan_entry(self, path):
+        """Εγγραφή manifest για backup που δεν είχε καταγραφεί"""
+        header, records = self.read_backup(path, verify=False)
+        if 'counts' in header:
+            counts = header['counts']
+        else:
+            plural = {'product': 'products', 'movement': 'movements', 'category': 'categories'}
+            counts = dict.fromkeys(plural.values(), 0)
+            for kind, _ in records:
+                counts[plural[kind]] += 1
+
+        raw_size = 0
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                sha.update(chunk)
+                raw_size += len(chunk)
+
+        return {
+            'file': Path(path).name,
+            'timestamp': backup_datetime(path).strftime("%Y-%m-%d %H:%M:%S"),
+            'kind': header['kind'],
+            'size': raw_size,
+            'checksum': sha.hexdigest(),
+            'counts': counts,
+            'base': header.get('base', Path(path).name),
+            'parent': header.get('parent'),
+            'chain_length': header.get('chain_length', 0)
+        }
+
+    def list_backups(self):
+        """Όλα τα backups, νεότερο πρώτο"""
+        if not self.is_writer:
+            # Τα backups τα γράφει άλλος σταθμός - ανάγνωση του manifest ξανά
+            self.entries = {}
+            self.load_manifest()
+        names = sorted(self.entries, key=backup_sort_key, reverse=True)
+        return [self.backup_dir / name for name in names]
+
+    def entry(self, path):
+        return self.entries[Path(path).name]
+
+    @staticmethod
+    def is_delta(path):
+        return ".delta." in Path(path).name
+
+    def read_backup(self, path, verify=True):
+        """(header, εγγραφές) ενός backup - οι εγγραφές διαβάζονται σταδιακά
+
+        Για base οι εγγραφές είναι ["product" | "movement" | "category", τιμή],
+        για delta [λειτουργία, payload]. Το checksum του manifest ελέγχεται όταν
+        εξαντληθούν οι εγγραφές.
+        """
+        path = Path(path)
+        entry = self.entries.get(path.name)
+        expected = entry.get('checksum') if verify and entry else None
+
+        if path.name.endswith(".json"):
+            return self.read_legacy_backup(path, expected)
+
+        raw = open(path, 'rb')
+        hashed = HashingFile(raw)
+        text = io.TextIOWrapper(gzip.GzipFile(fileobj=hashed, mode='rb'), encoding='utf-8')
+        try:
+            header = json.loads(text.readline())
+        except Exception:
+            raw.close()
+            raise
+
+        def records():
+            try:
+                for line in text:
+                    yield json.loads(line)
+                while hashed.read(65536):
+                    pass
+            finally:
+                raw.close()
+            if expected and hashed.sha.hexdigest() != expected:
+                raise ValueError(f"{path.name}: το checksum δεν ταιριάζει (κατεστραμμένο αρχείο)")
+
+        return header, records()
+
+    def read_legacy_backup(self, path, expected=None):
+        """Backups σε μορφή ενός JSON αντικειμένου (backup_*.json)"""
+        raw = path.read_bytes()
+        if expected and hashlib.sha256(raw).hexdigest() != expected:
+            raise ValueError(f"{path.name}: το checksum δεν ταιριάζει (κατεστραμμένο αρχείο)")
+        data = json.loads(raw.decode('utf-8-sig'))
+        header = {k: v for k, v in data.items() if k not in ('products', 'movements', 'categories', 'ops')}
+        header.setdefault('kind', 'base')
+
+        def records():
+            if header['kind'] == 'delta':
+                yield from data['ops']
+                return
+            for p in data.get('products', []):
+                yield ['product', p]
+            for m in data.get('movements', []):
+                yield ['movement', m]
+            for c in data.get('categories', []):
+                yield ['category', c]
+
+        return header, records()
+
+    def record(self, ops):
+        """Καταγραφή αλλαγών για το επόμενο delta"""
+        self.pending.extend([op, payload] for op, payload in ops)
+
+    def new_path(self, kind):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = ".delta.jsonl.gz" if kind == 'delta' else ".jsonl.gz"
+        stem = f"backup_{timestamp}"
+        counter = 1
+        while any(self.backup_dir.glob(f"{stem}.*")):
+            counter += 1
+            stem = f"backup_{timestamp}_{counter:02d}"
+        return timestamp, self.backup_dir / f"{stem}{suffix}"
+
+    def write(self, counts, snapshot, full=False):
+        """Νέο backup: delta με τις αλλαγές ή πλήρες snapshot όταν χρειάζεται
+
+        counts είναι τα πλήθη των δεδομένων μετά τις αλλαγές και snapshot μια
+        συνάρτηση που επιστρέφει (products, movements, categories) - καλείται
+        μόνο όταν γράφεται πλήρες backup. Επιστρέφει το αρχείο που γράφτηκε ή
+        None αν δεν υπήρχαν αλλαγές.
+        """
+        if not self.acquire_lock():
+            # Τα backups τα γράφει ο σταθμός με το lock
+            self.pending = []
+            return None
+
+        head = self.head
+
+        # Δεδομένα που άλλαξαν εκτός εφαρμογής δεν περιγράφονται από τα deltas
+        out_of_sync = head is None or self.needs_base or (not self.pending and counts != head['counts'])
+
+        if full or out_of_sync or head['chain_length'] >= self.DELTAS_PER_BASE:
+            kind = 'base'
+            timestamp, path = self.new_path(kind)
+            chain = {'base': path.name, 'parent': None, 'chain_length': 0}
+            records = self.snapshot_records(*snapshot())
+        elif self.pending:
+            kind = 'delta'
+            timestamp, path = self.new_path(kind)
+            chain = {'base': head['base'], 'parent': head['file'], 'chain_length': head['chain_length'] + 1}
+            records = self.pending
+        else:
+            return None
+
+        header = dict({
+            'format': 'stock-manager-backup',
+            'version': self.FORMAT_VERSION,
+            'timestamp': timestamp,
+            'kind': kind,
+            'counts': counts
+        }, **chain)
+
+        # Σταδιακή εγγραφή: μία γραμμή ανά εγγραφή, χωρίς ολόκληρο το JSON στη μνήμη
+        with atomic_write(path, 'wb') as raw:
+            hashed = HashingFile(raw)
+            with io.TextIOWrapper(
+                gzip.GzipFile(fileobj=hashed, mode='wb', compresslevel=6, mtime=0), encoding='utf-8'
+            ) as out:
+                out.write(json.dumps(header, ensure_ascii=False) + "\n")
+                for record in records:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.pending = []
+
+        self.append_manifest(dict({
+            'file': path.name,
+            'timestamp': datetime.strptime(timestamp, "%Y%m%d_%H%M%S").strftime("%Y-%m-%d %H:%M:%S"),
+            'kind': kind,
+            'size': hashed.size,
+            'checksum': hashed.sha.hexdigest(),
+            'counts': counts
+        }, **chain))
+
+        if kind == 'base':
+            self.needs_base = False
+            self.prune()
+        return path
+
+    @staticmethod
+    def snapshot_records(products, movements, categories):
+        for p in products:
+            yield ['product', p]
+        for m in movements:
+            yield ['movement', m]
+        for c in categories:
+            yield ['category', c]
+
+    def prune(self):
+        """Κράτα μόνο τις τελευταίες KEEP_CHAINS αλυσίδες (base + τα deltas του)"""
+        names = sorted(self.entries, key=backup_sort_key)
+        bases = [i for i, name in enumerate(names) if not self.is_delta(name)]
+        if len(bases) > self.KEEP_CHAINS:
+            for name in names[:bases[-self.KEEP_CHAINS]]:
+                (self.backup_dir / name).unlink(missing_ok=True)
+                del self.entries[name]
+            self.write_manifest()
+
+    def summary(self, path):
+        """Πλήθη προϊόντων/κινήσεων/κατηγοριών ενός backup (από το manifest)"""
+        return self.entry(path)['counts']
+
+    def load(self, path):
+        """Πλήρη δεδομένα ενός σημείου: base + εφαρμογή των deltas μέχρι αυτό"""
+        chain = []
+        header, records = self.read_backup(path)
+        while header['kind'] == 'delta':
+            chain.append(list(records))
+            header, records = self.read_backup(self.backup_dir / header['parent'])
+
+        products = []
+        movements = {}
+        categories = []
+        for kind, record in records:
+            if kind == 'product':
+                products.append(record)
+            elif kind == 'movement':
+                movements[record['id']] = record
+            elif kind == 'category':
+                categories.append(record)
+
+        for ops in reversed(chain):
+            for op, payload in ops:
+                if op == 'add_product':
+                    products.append(payload)
+                elif op == 'update_product':
+                    products = [payload if p['id'] == payload['id'] else p for p in products]
+                elif op == 'delete_product':
+                    products = [p for p in products if p['id'] != payload]
+                    movements = {mid: m for mid, m in movements.items() if m['product_id'] != payload}
+                elif op == 'add_movement':
+                    movements[payload['id']] = payload
+                elif op == 'delete_movement':
+                    movements.pop(payload, None)
+                elif op == 'set_categories':
+                    categories = payload
+
+        return products, list(movements.values()), categories
+
+
+class WriteBehindPersister:
+    """Αποθήκευση στο παρασκήνιο (write-behind)
+
+    Οι αλλαγές μπαίνουν σε ουρά και ένα thread τις γράφει μαζεμένες σε μία
+    συναλλαγή, μαζί με ένα backup, όταν περάσουν DEBOUNCE δευτερόλεπτα χωρίς
+    νέες αλλαγές - και το πολύ MAX_DELAY δευτερόλεπτα μετά την πρώτη εκκρεμή.
+    Το Tk thread δεν κάνει ποτέ I/O για τις αλλαγές.
+
+    Σε προσωρινό σφάλμα (βάση κλειδωμένη από άλλο σταθμό, I/O) οι αλλαγές
+    μένουν πρώτες στην ουρά και ξαναδοκιμάζονται με αυξανόμενη αναμονή
+    (RETRY_DELAY, διπλάσια κάθε φορά έως MAX_RETRY_DELAY) - η κατάσταση μένει
+    'error' μέχρι να γραφτούν. Λειτουργίες που δεν θα γραφτούν ποτέ (τις
+    απορρίπτει η αποθήκευση ή μόνιμο σφάλμα) δεν μπλοκάρουν την ουρά: μπαίνουν
+    στο rejected ως (λειτουργία, σφάλμα) και η εφαρμογή τις παίρνει με
+    take_rejected() για να ευθυγραμμίσει τη μνήμη και να ενημερώσει τον χρήστη.
+    """
+
+    DEBOUNCE = 0.3
+    MAX_DELAY = 2.0
+    RETRY_DELAY = 1.0
+    MAX_RETRY_DELAY = 60.0
+    # Σφάλματα που μπορεί να περάσουν με νέα προσπάθεια (locked/busy, δίσκος, δίκτυο)
+    RETRYABLE = (sqlite3.OperationalError, OSError)
+
+    def __init__(self, storage, backups):
+        self.storage = storage
+        self.backups = backups
+        self.cond = threading.Condition()
+        self.queue = []
+        self.first_pending = None
+        self.last_submit = None
+        self.writing = False
+        self.flush_now = False
+        self.stopping = False
+        self.state = 'saved'  # 'saved' | 'unsaved' | 'saving' | 'error'
+        self.last_error = None
+        # Διαδοχικά σφάλματα της τρέχουσας προσπάθειας και σύνολο σφαλμάτων (για το flush)
+        self.failures = 0
+        self.error_count = 0
+        self.retry_at = None
+        self.rejected = []
+        self.thread = threading.Thread(target=self.run, name="persister", daemon=True)
+        self.thread.start()
+
+    def submit(self, ops, counts, full=False, stored=False):
+        """Νέες αλλαγές προς αποθήκευση (counts: πλήθη δεδομένων μετά τις αλλαγές)
+
+        stored=True για αλλαγές που είναι ήδη στη βάση (από άλλο σταθμό) - γράφονται
+        μόνο στο backup.
+        """
+        with self.cond:
+            now = time.monotonic()
+            self.queue.append((list(ops), counts, full, stored))
+            if self.first_pending is None:
+                self.first_pending = now
+            self.last_submit = now
+            if self.state != 'error':
+                self.state = 'unsaved'
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.stopping:
+                    self.cond.wait()
+                if not self.queue:
+                    return
+
+                # Debounce: περιμένουμε να σταματήσουν οι αλλαγές, αλλά όχι πέρα από
+                # MAX_DELAY - μετά από σφάλμα μέχρι το retry_at (εκτός αν ζητηθεί flush)
+                while not self.flush_now:
+                    if self.failures:
+                        deadline = self.retry_at
+                    elif self.stopping:
+                        break
+                    else:
+                        deadline = min(self.last_submit + self.DEBOUNCE, self.first_pending + self.MAX_DELAY)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+
+                batch = self.queue
+                self.queue = []
+                self.first_pending = None
+                self.writing = True
+                if not self.failures:
+                    self.state = 'saving'
+
+            try:
+                self.write_batch(batch)
+            except Exception as e:
+                print(f"Save error: {type(e).__name__}: {e}")
+                with self.cond:
+                    if not isinstance(e, self.RETRYABLE):
+                        # Μόνιμο σφάλμα - ό,τι δεν γράφτηκε απορρίπτεται, τα υπόλοιπα
+                        # (ήδη stored) περιμένουν μόνο το backup
+                        self.rejected.extend((op, e) for item in batch if not item[3] for op in item[0])
+                        self.queue[:0] = [item for item in batch if item[3]]
+                        self.failures = 0
+                        self.retry_at = None
+                        self.last_error = None
+                        self.writing = False
+                        self.state = 'unsaved' if self.queue else 'saved'
+                        self.cond.notify_all()
+                        continue
+                    # Οι αλλαγές ξαναμπαίνουν πρώτες στην ουρά - ό,τι γράφτηκε ήδη
+                    # είναι σημειωμένο stored από το write_batch
+                    self.queue[:0] = batch
+                    self.first_pending = self.last_submit = time.monotonic()
+                    self.failures += 1
+                    self.error_count += 1
+                    self.retry_at = time.monotonic() + min(
+                        self.RETRY_DELAY * 2 ** (self.failures - 1), self.MAX_RETRY_DELAY
+                    )
+                    self.last_error = e
+                    self.state = 'error'
+                    # Το flush που περιμένει παίρνει το σφάλμα - η επόμενη προσπάθεια μετά την αναμονή
+                    self.flush_now = False
+                    self.writing = False
+                    self.cond.notify_all()
+                continue
+
+            with self.cond:
+                self.failures = 0
+                self.retry_at = None
+                self.writing = False
+                self.last_error = None
+                self.state = 'unsaved' if self.queue else 'saved'
+                self.cond.notify_all()
+
+    def write_batch(self, batch):
+        """Εγγραφή των αλλαγών του batch και backup
+
+        Κάθε κομμάτι που γράφεται (συναλλαγή) σημειώνεται stored μέσα στο batch,
+        ώστε μια νέα προσπάθεια μετά από σφάλμα να μην το ξαναγράψει. Οι
+        λειτουργίες που απέρριψε η αποθήκευση βγαίνουν από το batch (και από
+        το backup) και μπαίνουν στο rejected.
+        """
+        # Η επαναφορά (replace_all, πάντα μόνη της στο submit του save_all) γράφει
+        # τα πάντα - οι υπόλοιπες αλλαγές σε μία συναλλαγή
+        segment = []
+
+        def commit(indexes):
+            if not indexes:
+                return
+            ops = [op for i in indexes for op in batch[i][0]]
+            rejected = dict(self.storage.apply(ops))
+            if rejected:
+                with self.cond:
+                    self.rejected.extend((ops[position], error) for position, error in rejected.items())
+            position = 0
+            for i in indexes:
+                item_ops = batch[i][0]
+                kept = [op for k, op in enumerate(item_ops, position) if k not in rejected]
+                position += len(item_ops)
+                batch[i] = (kept,) + batch[i][1:3] + (True,)
+
+        for i, (item_ops, counts, item_full, stored) in enumerate(batch):
+            if stored:
+                continue
+            if any(op == 'replace_all' for op, payload in item_ops):
+                commit(segment)
+                segment = []
+                for op, payload in item_ops:
+                    self.storage.replace_all(*payload)
+                batch[i] = batch[i][:3] + (True,)
+            else:
+                segment.append(i)
+        commit(segment)
+
+        ops = [op for item in batch for op in item[0]]
+        full = any(item[2] for item in batch)
+        try:
+            self.backups.record(op for op in ops if op[0] != 'replace_all')
+            self.backups.write(batch[-1][1], self.storage.snapshot, full=full)
+        except Exception as e:
+            print(f"Backup error: {e}")
+
+    def take_rejected(self):
+        """Οι λειτουργίες που απορρίφθηκαν από τον τελευταίο έλεγχο [((op, payload), σφάλμα)]"""
+        with self.cond:
+            rejected, self.rejected = self.rejected, []
+        return rejected
+
+    def flush(self, timeout=None):
+        """Άμεση αποθήκευση όλων των εκκρεμών αλλαγών - επιστρέφει όταν γραφτούν"""
+        with self.cond:
+            self.flush_now = True
+            self.cond.notify_all()
+            end = None if timeout is None else time.monotonic() + timeout
+            # Μία άμεση προσπάθεια - αν αποτύχει, το σφάλμα επιστρέφεται και οι
+            # αλλαγές μένουν στην ουρά για τις επόμενες
+            errors = self.error_count
+            while (self.queue or self.writing) and self.error_count == errors:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            self.flush_now = False
+            if self.error_count != errors:
+                raise self.last_error
+            if self.queue or self.writing:
+                raise TimeoutError("Η αποθήκευση δεν ολοκληρώθηκε εγκαίρως")
+
+    def close(self):
+        """Τελική αποθήκευση και τερματισμός του thread
+
+        Σε σφάλμα το thread συνεχίζει, ώστε οι αλλαγές να μη χαθούν αν η
+        εφαρμογή δεν κλείσει τελικά.
+        """
+        self.flush()
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+        self.thread.join(timeout=5)
+
+
+# Data
+
+def date_key(date):
+    """Η ημερομηνία "YYYY-MM-DD HH:MM:SS" ταξινομείται σωστά ως κείμενο, χωρίς strptime
+
+    Μη έγκυρες ημερομηνίες δίνουν "" και δεν ανήκουν σε καμία περίοδο.
+    """
+    date = date or ''
+    if len(date) >= 10 and date[4] == '-' and date[7] == '-':
+        return date
+    return ''
+
+
+OPTIONAL_MODULES = {}
+
+
+def optional_module(name):
+    """Προαιρετικό module (π.χ. numpy) ή None αν δεν είναι εγκατεστημένο
+
+    Φορτώνεται την πρώτη φορά που χρειάζεται, όχι στην εκκίνηση.
+    """
+    if name not in OPTIONAL_MODULES:
+        try:
+            OPTIONAL_MODULES[name] = import_module(name)
+        except (ImportError, OSError):
+            # OSError: λείπει native βιβλιοθήκη που φορτώνει το module (π.χ. το DLL του zbar)
+            OPTIONAL_MODULES[name] = None
+    return OPTIONAL_MODULES[name]
+
+
+class MovementStore:
+    """Κινήσεις σε στήλες (array.array) αντί για ένα dict ανά κίνηση
+
+    Κάθε κίνηση πιάνει ~40 bytes αντί για ~500: id, product_id, τύπος (θέση
+    στο types), ποσότητα, χρόνος σε δευτερόλεπτα από 1970 (τοπική ώρα, χωρίς
+    ζώνη) και σημείωση (θέση σε πίνακα μοναδικών σημειώσεων). Οι γραμμές είναι
+    ταξινομημένες κατά id, οπότε η αναζήτηση γίνεται με bisect.
+
+    Ημερομηνίες εκτός μορφής "YYYY-MM-DD HH:MM:SS" κρατιούνται αυτούσιες στο
+    raw_dates και άγνωστα πεδία στο extra (id -> τιμή). Τα αθροίσματα και τα
+    φίλτρα γίνονται με numpy όταν υπάρχει, αλλιώς με βρόχο πάνω στις στήλες.
+    Για διαλόγους και εξαγωγές οι κινήσεις επιστρέφονται ως dict.
+    """
+
+    COLUMNS = ('id', 'product_id', 'type', 'quantity', 'notes', 'date')
+    COLUMN_SET = frozenset(COLUMNS)
+    # Χρόνος για ημερομηνίες που δεν αναγνωρίζονται - ταξινομούνται πρώτες
+    NO_TIME = -2 ** 63
+    EPOCH = datetime(1970, 1, 1).toordinal()
+
+    def __init__(self, movements=()):
+        self.ids = array('q')
+        self.product_ids = array('q')
+        self.type_codes = array('b')
+        self.quantities = array('d')
+        self.times = array('q')
+        self.note_codes = array('l')
+        self.types = ['in', 'out']
+        self.type_index = {'in': 0, 'out': 1}
+        self.notes = ['']
+        self.note_index = {'': 0}
+        self.raw_dates = {}
+        self.extra = {}
+        for m in movements:
+            self.add(m)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self.row(i)
+
+    def __reversed__(self):
+        for i in range(len(self.ids) - 1, -1, -1):
+            yield self.row(i)
+
+    def __contains__(self, movement_id):
+        return self.position(movement_id) >= 0
+
+    # "YYYY-MM-DD" -> δευτερόλεπτα στην αρχή της ημέρας (οι κινήσεις μοιράζονται λίγες ημέρες)
+    day_starts = {}
+
+    @classmethod
+    def parse_day(cls, day):
+        seconds = cls.day_starts.get(day)
+        if seconds is None:
+            try:
+                seconds = (datetime(int(day[:4]), int(day[5:7]), int(day[8:10])).toordinal() - cls.EPOCH) * 86400
+            except (TypeError, ValueError):
+                return cls.NO_TIME
+            if cls.format_day(seconds // 86400) != day:
+                return cls.NO_TIME
+            cls.day_starts[day] = seconds
+        return seconds
+
+    @classmethod
+    def parse_time(cls, date):
+        """(δευτερόλεπτα, True αν η ημερομηνία ξαναγράφεται ακριβώς από αυτά)
+
+        Για "YYYY-MM-DD..." εκτός πλήρους μορφής επιστρέφεται η αρχή της ημέρας,
+        για μη έγκυρες ημερομηνίες NO_TIME.
+        """
+        if not isinstance(date, str):
+            return cls.NO_TIME, False
+        day = cls.parse_day(date[:10])
+        if day == cls.NO_TIME:
+            return day, False
+        hours, minutes, seconds = date[11:13], date[14:16], date[17:19]
+        if (len(date) == 19 and date[10] == ' ' and date[13] == ':' and date[16] == ':'
+                and hours.isdigit() and minutes.isdigit() and seconds.isdigit()
+                and hours < '24' and minutes < '60' and seconds < '60'):
+            return day + int(hours) * 3600 + int(minutes) * 60 + int(seconds), True
+        return day, False
+
+    @classmethod
+    def format_time(cls, seconds):
+        day, seconds = divmod(seconds, 86400)
+        d = datetime.fromordinal(day + cls.EPOCH)
+        return f"{d.year:04d}-{d.month:02d}-{d.day:02d} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+    @classmethod
+    def format_day(cls, day):
+        d = datetime.fromordinal(day + cls.EPOCH)
+        return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+
+    def intern(self, table, index, value):
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(table)
+            table.append(value)
+        return code
+
+    def position(self, movement_id):
+        """Θέση της κίνησης στις στήλες ή -1"""
+        i = bisect.bisect_left(self.ids, movement_id)
+        if i < len(self.ids) and self.ids[i] == movement_id:
+            return i
+        return -1
+
+    def last_id(self):
+        return self.ids[-1] if self.ids else 0
+
+    def row(self, i):
+        movement_id = self.ids[i]
+        m = {
+            'id': movement_id,
+            'product_id': self.product_ids[i],
+            'type': self.types[self.type_codes[i]],
+            'quantity': SqliteStorage.to_number(self.quantities[i]),
+            'notes': self.notes[self.note_codes[i]],
+            'date': self.date_of(movement_id, self.times[i])
+        }
+        if movement_id in self.extra:
+            m.update(self.extra[movement_id])
+        return m
+
+    def date_of(self, movement_id, seconds):
+        if movement_id in self.raw_dates:
+            return self.raw_dates[movement_id]
+        return self.format_time(seconds)
+
+    def movement(self, movement_id):
+        i = self.position(movement_id)
+        return self.row(i) if i >= 0 else None
+
+    def time_of(self, movement_id):
+        return self.times[self.position(movement_id)]
+
+    def snapshot(self):
+        """Αντίγραφο για ανάγνωση από άλλο thread (π.χ. εξαγωγή) - οι στήλες αντιγράφονται με slicing"""
+        copy = MovementStore()
+        for name in ('ids', 'product_ids', 'type_codes', 'quantities', 'times', 'note_codes'):
+            setattr(copy, name, getattr(self, name)[:])
+        copy.types = list(self.types)
+        copy.type_index = dict(self.type_index)
+        copy.notes = list(self.notes)
+        copy.note_index = dict(self.note_index)
+        copy.raw_dates = dict(self.raw_dates)
+        copy.extra = {movement_id: dict(extra) for movement_id, extra in self.extra.items()}
+        return copy
+
+    def value(self, movement_id, column):
+        """Μία τιμή ('product_id', 'type', 'quantity', 'notes' ή 'time') χωρίς υλοποίηση της κίνησης"""
+        i = self.position(movement_id)
+        if column == 'type':
+            return self.types[self.type_codes[i]]
+        if column == 'notes':
+            return self.notes[self.note_codes[i]]
+        return {'product_id': self.product_ids, 'quantity': self.quantities, 'time': self.times}[column][i]
+
+    def add(self, m):
+        """Προσθήκη (ή αντικατάσταση, για ίδιο id) - επιστρέφει τον χρόνο της κίνησης"""
+        movement_id = m['id']
+        date = m.get('date')
+        seconds, exact = self.parse_time(date)
+        if not exact:
+            self.raw_dates[movement_id] = date
+        elif self.raw_dates:
+            self.raw_dates.pop(movement_id, None)
+        extra_keys = m.keys() - self.COLUMN_SET
+        if extra_keys:
+            self.extra[movement_id] = {k: m[k] for k in extra_keys}
+        elif self.extra:
+            self.extra.pop(movement_id, None)
+
+        type_code = self.intern(self.types, self.type_index, m['type'])
+        quantity = float(m['quantity'] or 0)
+        note_code = self.intern(self.notes, self.note_index, m.get('notes') or '')
+
+        # Από την αποθήκευση έρχονται με σειρά id - συνήθως απλό append
+        if not self.ids or movement_id > self.ids[-1]:
+            self.ids.append(movement_id)
+            self.product_ids.append(m['product_id'])
+            self.type_codes.append(type_code)
+            self.quantities.append(quantity)
+            self.times.append(seconds)
+            self.note_codes.append(note_code)
+            return seconds
+
+        values = (movement_id, m['product_id'], type_code, quantity, seconds, note_code)
+        columns = (self.ids, self.product_ids, self.type_codes, self.quantities, self.times, self.note_codes)
+        i = bisect.bisect_left(self.ids, movement_id)
+        if i < len(self.ids) and self.ids[i] == movement_id:
+            for column, value in zip(columns, values):
+                column[i] = value
+        else:
+            for column, value in zip(columns, values):
+                column.insert(i, value)
+        return seconds
+
+    def delete(self, movement_id):
+        """Διαγραφή κίνησης - επιστρέφει την κίνηση ή None αν δεν υπήρχε"""
+        i = self.position(movement_id)
+        if i < 0:
+            return None
+        m = self.row(i)
+        for column in (self.ids, self.product_ids, self.type_codes, self.quantities, self.times, self.note_codes):
+            del column[i]
+        self.raw_dates.pop(movement_id, None)
+        self.extra.pop(movement_id, None)
+        return m
+
+    def positions_where(self, product_id=None, movement_type=None):
+        """Θέσεις των κινήσεων ενός προϊόντος και/ή τύπου"""
+        type_code = self.type_index.get(movement_type, -1)
+        if movement_type is not None and type_code < 0:
+            return []
+        np = optional_module('numpy')
+        if np is not None:
+            mask = np.ones(len(self.ids), dtype=bool)
+            if product_id is not None:
+                mask &= np.frombuffer(self.product_ids, dtype=np.int64) == product_id
+            if movement_type is not None:
+                mask &= np.frombuffer(self.type_codes, dtype=np.int8) == type_code
+            return np.flatnonzero(mask).tolist()
+        return [
+            i for i in range(len(self.ids))
+            if (product_id is None or self.product_ids[i] == product_id)
+            and (movement_type is None or self.type_codes[i] == type_code)
+        ]
+
+    def where(self, product_id=None, movement_type=None):
+        return [self.row(i) for i in self.positions_where(product_id, movement_type)]
+
+    def ids_where(self, product_id=None, movement_type=None):
+        return [self.ids[i] for i in self.positions_where(product_id, movement_type)]
+
+    def ids_by_product(self, ids=None):
+        """{product_id: [ids με σειρά id]} για όλες τις κινήσεις ή μόνο τα ids - χωρίς υλοποίηση dicts"""
+        wanted = None if ids is None else set(ids)
+        groups = {}
+        for movement_id, product_id in zip(self.ids, self.product_ids):
+            if wanted is None or movement_id in wanted:
+                groups.setdefault(product_id, []).append(movement_id)
+        return groups
+
+    def delete_product(self, product_id):
+        """Διαγραφή όλων των κινήσεων ενός προϊόντος σε ένα πέρασμα - επιστρέφει τις κινήσεις"""
+        positions = self.positions_where(product_id)
+        deleted = [self.row(i) for i in positions]
+        if not deleted:
+            return deleted
+        removed = set(positions)
+        keep = [i for i in range(len(self.ids)) if i not in removed]
+        for name in ('ids', 'product_ids', 'type_codes', 'quantities', 'times', 'note_codes'):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[i] for i in keep]))
+        for m in deleted:
+            self.raw_dates.pop(m['id'], None)
+            self.extra.pop(m['id'], None)
+        return deleted
+
+    def last(self, count):
+        """Οι count τελευταίες κινήσεις (μεγαλύτερα ids), νεότερη πρώτη"""
+        return [self.row(i) for i in range(len(self.ids) - 1, max(len(self.ids) - count, 0) - 1, -1)]
 
+    def date_order(self):
+        """(χρόνοι, ids) ταξινομημένα κατά (χρόνο, id) - για το date index"""
+        np = optional_module('numpy')
+        if np is not None and self.ids:
+            ids = np.frombuffer(self.ids, dtype=np.int64)
+            times = np.frombuffer(self.times, dtype=np.int64)
+            order = np.lexsort((ids, times))
+            return array('q', times[order].tobytes()), array('q', ids[order].tobytes())
+        pairs = sorted(zip(self.times, self.ids))
+        return array('q', (t for t, _ in pairs)), array('q', (i for _, i in pairs))
 
-class ModernButton(tk.Button):
-    """Modern styled button"""
-    def __init__(self, parent: tk.Widget, **kwargs: Any) -> None:
-        super().__init__(
-            parent,
-            relief=tk.FLAT,
-            font=("Segoe UI", 10, "bold"),
-            cursor="hand2",
-            borderwidth=0,
-            **kwargs
-        )
-        self.bind("<Enter>", self.on_enter)
-        self.bind("<Leave>", self.on_leave)
-        self.default_bg = kwargs.get('bg', '#3498db')
-    
-    def on_enter(self, e):
-        self['background'] = self.lighten_color(self.default_bg)
-    
-    def on_leave(self, e):
-        self['background'] = self.default_bg
-    
-    def lighten_color(self, color):
-        # Simple color lightening
-        colors = {
-            '#27ae60': '#2ecc71',
-            '#3498db': '#5dade2',
-            '#e74c3c': '#ec7063',
-            '#e67e22': '#f39c12',
-            '#9b59b6': '#bb8fce',
-            '#16a085': '#1abc9c'
+    def columns(self):
+        """Οι κινήσεις ως στήλες (λίστες) - π.χ. για pandas.DataFrame"""
+        to_number = SqliteStorage.to_number
+        return {
+            'id': self.ids.tolist(),
+            'product_id': self.product_ids.tolist(),
+            'type': [self.types[code] for code in self.type_codes],
+            'quantity': [to_number(quantity) for quantity in self.quantities],
+            'notes': [self.notes[code] for code in self.note_codes],
+            'date': [self.date_of(movement_id, seconds) for movement_id, seconds in zip(self.ids, self.times)]
         }
-        return colors.get(color, '#5dade2')
+
+    def grouped_totals(self, keys):
+        """{κλειδί: [εισαγωγές, εξαγωγές, πλήθος]} για keys = array ίδιου μήκους με τις στήλες"""
+        in_code = self.type_index['in']
+        out_code = self.type_index['out']
+        np = optional_module('numpy')
+        if np is not None:
+            keys = np.frombuffer(keys, dtype=np.int64)
+            codes = np.frombuffer(self.type_codes, dtype=np.int8)
+            quantities = np.frombuffer(self.quantities, dtype=np.float64)
+            unique, inverse = np.unique(keys, return_inverse=True)
+            total_in = np.bincount(inverse, weights=np.where(codes == in_code, quantities, 0), minlength=len(unique))
+            total_out = np.bincount(inverse, weights=np.where(codes == out_code, quantities, 0), minlength=len(unique))
+            counts = np.bincount(inverse, minlength=len(unique))
+            return {
+                key: [a, b, c]
+                for key, a, b, c in zip(unique.tolist(), total_in.tolist(), total_out.tolist(), counts.tolist())
+            }
+        totals = {}
+        for key, code, quantity in zip(keys, self.type_codes, self.quantities):
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = [0, 0, 0]
+            if code == in_code:
+                entry[0] += quantity
+            elif code == out_code:
+                entry[1] += quantity
+            entry[2] += 1
+        return totals
+
+    @staticmethod
+    def as_balances(totals):
+        to_number = SqliteStorage.to_number
+        return {
+            key: {'in': to_number(total_in), 'out': to_number(total_out), 'count': count}
+            for key, (total_in, total_out, count) in totals.items()
+        }
+
+    def product_totals(self):
+        """Σύνολα ανά προϊόν, στη μορφή του load_balances()"""
+        return self.as_balances(self.grouped_totals(self.product_ids))
+
+    def period_totals(self):
+        """Σύνολα ανά ημέρα και μήνα, στη μορφή του load_rollups()"""
+        days = array('q', (t // 86400 if t != self.NO_TIME else self.NO_TIME for t in self.times))
+        totals = {}
+        for day, entry in self.grouped_totals(days).items():
+            if day != self.NO_TIME:
+                day = self.format_day(day)
+                for key in (day, day[:7]):
+                    StockLedger.bump(totals, key, *entry)
+
+        # Ημερομηνίες με μορφή ημερομηνίας αλλά μη έγκυρη τιμή (π.χ. "2024-13-01")
+        # μετράνε στην περίοδο του κειμένου τους, όπως και στη βάση
+        for movement_id, date in self.raw_dates.items():
+            day = date_key(date)[:10]
+            i = self.position(movement_id)
+            if day and self.times[i] == self.NO_TIME:
+                m = self.row(i)
+                total_in, total_out = StockLedger.split(m, 1)
+                for key in (day, day[:7]):
+                    StockLedger.bump(totals, key, total_in, total_out, 1)
+        return self.as_balances(totals)
+
+
+class ProductSearchIndex:
+    """Ευρετήριο αναζήτησης προϊόντων (όνομα και κωδικός)
+
+    Τα κείμενα κανονικοποιούνται (πεζά, χωρίς τόνους/διαλυτικά), ώστε το
+    "καφε" να βρίσκει το "Καφές". Αναζητήσεις 3+ χαρακτήρων βρίσκουν υποψήφια
+    από τα τριγράμματα και επιβεβαιώνονται με substring, μικρότερες ταιριάζουν
+    στην αρχή λέξεων ή οπουδήποτε μέσα στον κωδικό ("12" βρίσκει το "C12").
+    Το by_code() δίνει ακριβή αναζήτηση κωδικού/barcode.
+
+    Τα τριγράμματα χτίζονται στην πρώτη αναζήτηση (pending), ώστε η εκκίνηση
+    να πληρώνει μόνο την κανονικοποίηση των ονομάτων για την ταξινόμηση.
+    """
+
+    # Καθυστέρηση (ms) μετά το τελευταίο πλήκτρο πριν από το φιλτράρισμα
+    DEBOUNCE = 150
+    COMBINING = re.compile('[\u0300-\u036f]')
+    WORD = re.compile(r'\w+')
+
+    def __init__(self, products=()):
+        # product_id -> "όνομα\0κωδικός" κανονικοποιημένα
+        self.keys = {}
+        self.grams = {}
+        self.prefixes = {}
+        self.codes = {}
+        self.pending = set()
+        # ids ταξινομημένα κατά όνομα (χτίζεται όταν χρειαστεί)
+        self.order = None
+        for p in products:
+            self.put(p)
+
+    @staticmethod
+    def normalize(text):
+        return ProductSearchIndex.COMBINING.sub('', unicodedata.normalize('NFD', str(text or ''))).casefold()
+
+    # Κείμενο -> κλειδί ταξινόμησης (ονόματα, κατηγορίες, σημειώσεις επαναλαμβάνονται)
+    collation_keys = {}
+
+    @classmethod
+    def collation_key(cls, text):
+        """Κλειδί ελληνικής ταξινόμησης: χωρίς τόνους, πεζά/κεφαλαία και τελικό ς"""
+        key = cls.collation_keys.get(text)
+        if key is None:
+            if len(cls.collation_keys) >= 100000:
+                cls.collation_keys.clear()
+            key = cls.collation_keys[text] = cls.normalize(text)
+        return key
+
+    @staticmethod
+    def terms(key):
+        """(τριγράμματα, όροι 1-2 χαρακτήρων) ενός κλειδιού
+
+        Οι όροι είναι τα προθέματα των λέξεων του ονόματος και όλα τα
+        τμήματα 1-2 χαρακτήρων του κωδικού.
+        """
+        grams = {key[i:i + 3] for i in range(len(key) - 2)}
+        grams.difference_update([gram for gram in grams if '\0' in gram])
+        name, code = key.split('\0')
+        prefixes = set()
+        for word in ProductSearchIndex.WORD.findall(name):
+            prefixes.add(word[:1])
+            prefixes.add(word[:2])
+        prefixes.update(code[i:i + n] for n in (1, 2) for i in range(len(code) - n + 1))
+        return grams, prefixes
+
+    def put(self, product):
+        product_id = product['id']
+        self.remove(product_id)
+        code = self.normalize(product.get('code', '')).strip()
+        self.keys[product_id] = f"{self.normalize(product['name'])}\0{code}"
+        self.pending.add(product_id)
+        self.order = None
+
+    def index_pending(self):
+        for product_id in self.pending:
+            key = self.keys[product_id]
+            grams, prefixes = self.terms(key)
+            for gram in grams:
+                self.grams.setdefault(gram, set()).add(product_id)
+            for prefix in prefixes:
+                self.prefixes.setdefault(prefix, set()).add(product_id)
+            code = key.split('\0')[1]
+            if code:
+                self.codes.setdefault(code, set()).add(product_id)
+        self.pending.clear()
+
+    def remove(self, product_id):
+        key = self.keys.pop(product_id, None)
+        if key is None:
+            return
+        self.order = None
+        if product_id in self.pending:
+            self.pending.discard(product_id)
+            return
+        grams, prefixes = self.terms(key)
+        for index, terms in ((self.grams, grams), (self.prefixes, prefixes), (self.codes, [key.split('\0')[1]])):
+            for term in terms:
+                ids = index.get(term)
+                if ids is not None:
+                    ids.discard(product_id)
+                    if not ids:
+                        del index[term]
+
+    def by_code(self, code):
+        """Το id του προϊόντος με ακριβώς αυτόν τον κωδικό ή None"""
+        self.index_pending()
+        ids = self.codes.get(self.normalize(code).strip())
+        return min(ids) if ids else None
+
+    def search(self, query):
+        """Τα ids που ταιριάζουν στο query - None για κενό query (όλα τα προϊόντα)"""
+        query = self.normalize(query).strip()
+        if not query:
+            return None
+        self.index_pending()
+        if len(query) < 3:
+            return set(self.prefixes.get(query, ()))
+
+        postings = []
+        for i in range(len(query) - 2):
+            ids = self.grams.get(query[i:i + 3])
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return {product_id for product_id in candidates if query in self.keys[product_id]}
+
+    def ordered(self, ids=None):
+        """Τα ids (ή όλα) με σειρά ονόματος"""
+        if self.order is None:
+            self.order = sorted(self.keys, key=lambda product_id: (self.keys[product_id], product_id))
+        if ids is None:
+            return list(self.order)
+        return [product_id for product_id in self.order if product_id in ids]
+
+
+class Repository:
+    """Προϊόντα και κινήσεις στη μνήμη, με ευρετήρια
+
+    products_by_id: id → προϊόν, search: ProductSearchIndex και movements:
+    MovementStore (κινήσεις σε στήλες, ταξινομημένες κατά id), ώστε
+    αναζητήσεις και διαγραφές να μη διατρέχουν όλες τις λίστες.
+
+    Το date index (date_times/date_ids) κρατάει τις κινήσεις ταξινομημένες
+    κατά (χρόνο, id) για ερωτήματα περιόδου με bisect - O(log n + k) αντί για
+    ανάγνωση και ταξινόμηση όλου του ιστορικού.
+    """
+
+    def __init__(self, products=(), movements=()):
+        self.products_by_id = {p['id']: p for p in products}
+        self.search = ProductSearchIndex(self.products_by_id.values())
+        self.movements = MovementStore(movements)
+        # Μία ταξινόμηση για όλες (σχεδόν ταξινομημένες ήδη, αφού τα ids ακολουθούν τον χρόνο)
+        self.date_times, self.date_ids = self.movements.date_order()
+
+    @property
+    def products(self):
+        return self.products_by_id.values()
+
+    def product(self, product_id):
+        return self.products_by_id.get(product_id)
+
+    def movement(self, movement_id):
+        return self.movements.movement(movement_id)
+
+    def product_name(self, product_id, default="Άγνωστο"):
+        product = self.products_by_id.get(product_id)
+        return product['name'] if product else default
+
+    def product_movements(self, product_id):
+        """Οι κινήσεις ενός προϊόντος, με σειρά id"""
+        return self.movements.where(product_id=product_id)
+
+    def put_product(self, product):
+        """Νέο προϊόν ή αντικατάσταση υπάρχοντος (ίδιο id)"""
+        self.products_by_id[product['id']] = product
+        self.search.put(product)
+
+    def delete_product(self, product_id):
+        """Διαγραφή προϊόντος και των κινήσεών του - επιστρέφει τις κινήσεις που διαγράφηκαν"""
+        self.products_by_id.pop(product_id, None)
+        self.search.remove(product_id)
+        deleted = self.movements.delete_product(product_id)
+        if len(deleted) > 100:
+            self.date_times, self.date_ids = self.movements.date_order()
+        else:
+            for m in deleted:
+                self.unindex_date(m['id'], MovementStore.parse_time(m['date'])[0])
+        return deleted
+
+    def add_movement(self, m):
+        if m['id'] in self.movements:
+            self.delete_movement(m['id'])
+        seconds = self.movements.add(m)
+        lo, hi = self.date_slot(seconds)
+        i = bisect.bisect_left(self.date_ids, m['id'], lo, hi)
+        self.date_times.insert(i, seconds)
+        self.date_ids.insert(i, m['id'])
+
+    def delete_movement(self, movement_id):
+        """Διαγραφή κίνησης - επιστρέφει την κίνηση ή None αν δεν υπήρχε"""
+        if movement_id not in self.movements:
+            return None
+        seconds = self.movements.time_of(movement_id)
+        self.unindex_date(movement_id, seconds)
+        return self.movements.delete(movement_id)
+
+    def date_slot(self, seconds):
+        return bisect.bisect_left(self.date_times, seconds), bisect.bisect_right(self.date_times, seconds)
+
+    def unindex_date(self, movement_id, seconds):
+        lo, hi = self.date_slot(seconds)
+        i = bisect.bisect_left(self.date_ids, movement_id, lo, hi)
+        if i < hi and self.date_ids[i] == movement_id:
+            del self.date_times[i]
+            del self.date_ids[i]
+
+    def date_range(self, from_date, to_date):
+        """Θέσεις [lo, hi) στο date index για τις ημέρες from_date..to_date ("YYYY-MM-DD", μαζί και οι δύο)"""
+        start = MovementStore.parse_time(from_date)[0]
+        end = MovementStore.parse_time(to_date)[0] + 86400
+        return bisect.bisect_left(self.date_times, start), bisect.bisect_left(self.date_times, end)
+
+    def movement_ids_between(self, from_date, to_date, newest_first=False):
+        """Τα ids των κινήσεων των ημερών from_date..to_date με σειρά ημερομηνίας"""
+        lo, hi = self.date_range(from_date, to_date)
+        ids = self.date_ids[lo:hi]
+        if newest_first:
+            ids.reverse()
+        return ids
+
+    def movements_between(self, from_date, to_date, newest_first=False):
+        """Κινήσεις των ημερών from_date..to_date με σειρά ημερομηνίας"""
+        return [self.movements.movement(mid) for mid in self.movement_ids_between(from_date, to_date, newest_first)]
+
+    def count_between(self, from_date, to_date):
+        lo, hi = self.date_range(from_date, to_date)
+        return hi - lo
+
+    def apply(self, ops):
+        """Εφαρμογή λειτουργιών αποθήκευσης (add_movement κτλ) - οι υπόλοιπες αγνοούνται"""
+        for op, payload in ops:
+            if op in ('add_product', 'update_product'):
+                self.put_product(payload)
+            elif op == 'delete_product':
+                self.delete_product(payload)
+            elif op == 'add_movement':
+                self.add_movement(payload)
+            elif op == 'delete_movement':
+                self.delete_movement(payload)
+
+
+# Stock
+
+class ActivityRanking:
+    """Κατάταξη προϊόντων κατά δραστηριότητα (ποσότητα εισαγωγών + εξαγωγών)
+
+    Κρατάει ανά κατηγορία (και για όλες, κλειδί None) ταξινομημένη λίστα
+    (δραστηριότητα, product_id) που ενημερώνεται με bisect σε κάθε κίνηση, οπότε
+    τα top-K / bottom-K είναι slices - χωρίς ταξινόμηση όλου του καταλόγου σε
+    κάθε ανανέωση.
+
+    Με days η κατάταξη αφορά κυλιόμενο παράθυρο ημερών: οι κινήσεις μπαίνουν
+    σε κάδους ανά ημέρα και στην αλλαγή ημέρας (advance) αφαιρούνται οι κάδοι
+    που βγήκαν από το παράθυρο.
+    """
+
+    def __init__(self, products=(), totals=None, days=None, today=None, movements=()):
+        self.days = days
+        self.today = None
+        self.start = ''
+        # product_id -> [εισαγωγές, εξαγωγές]
+        self.totals = {}
+        self.category = {}
+        # ημέρα "YYYY-MM-DD" -> {product_id: [εισαγωγές, εξαγωγές]}
+        self.buckets = {}
+        self.orders = {None: []}
+        for p in products:
+            entry = (totals or {}).get(p['id'])
+            self.totals[p['id']] = [entry[0], entry[1]] if entry else [0, 0]
+            self.category[p['id']] = p.get('category', '⚡ Άλλο')
+        if days:
+            self.advance(today)
+        for m in movements:
+            self.add(m, ranked=False)
+
+        # Μία ταξινόμηση για όλα, μετά ενημερώσεις με bisect
+        for product_id, entry in self.totals.items():
+            key = (entry[0] + entry[1], product_id)
+            self.orders[None].append(key)
+            self.orders.setdefault(self.category[product_id], []).append(key)
+        for order in self.orders.values():
+            order.sort()
+
+    @staticmethod
+    def window_start(today, days):
+        return (today - timedelta(days=days - 1)).isoformat()
+
+    def key(self, product_id):
+        entry = self.totals[product_id]
+        return entry[0] + entry[1], product_id
+
+    def unlink(self, product_id):
+        key = self.key(product_id)
+        for order in (self.orders[None], self.orders[self.category[product_id]]):
+            i = bisect.bisect_left(order, key)
+            if i < len(order) and order[i] == key:
+                del order[i]
+
+    def link(self, product_id):
+        key = self.key(product_id)
+        bisect.insort(self.orders[None], key)
+        bisect.insort(self.orders.setdefault(self.category[product_id], []), key)
+
+    def set_product(self, product):
+        product_id = product['id']
+        category = product.get('category', '⚡ Άλλο')
+        if product_id in self.totals:
+            if self.category[product_id] == category:
+                return
+            self.unlink(product_id)
+        else:
+            self.totals[product_id] = [0, 0]
+        self.category[product_id] = category
+        self.link(product_id)
+
+    def remove_product(self, product_id):
+        if product_id in self.totals:
+            self.unlink(product_id)
+            del self.totals[product_id]
+            del self.category[product_id]
+        for bucket in self.buckets.values():
+            bucket.pop(product_id, None)
+
+    def change(self, product_id, total_in, total_out, ranked=True):
+        if product_id not in self.totals:
+            return
+        if ranked:
+            self.unlink(product_id)
+        entry = self.totals[product_id]
+        entry[0] += total_in
+        entry[1] += total_out
+        if ranked:
+            self.link(product_id)
+
+    def add(self, m, sign=1, ranked=True):
+        product_id = m['product_id']
+        if product_id not in self.totals:
+            return
+        total_in, total_out = StockLedger.split(m, sign)
+        if self.days:
+            day = date_key(m.get('date'))[:10]
+            if not day or day < self.start:
+                return
+            entry = self.buckets.setdefault(day, {}).setdefault(product_id, [0, 0])
+            entry[0] += total_in
+            entry[1] += total_out
+        self.change(product_id, total_in, total_out, ranked)
+
+    def advance(self, today):
+        """Μετακίνηση του παραθύρου ώστε να τελειώνει στο today (date)"""
+        self.today = today
+        self.start = self.window_start(today, self.days)
+        for day in [day for day in self.buckets if day < self.start]:
+            for product_id, (total_in, total_out) in self.buckets.pop(day).items():
+                self.change(product_id, -total_in, -total_out)
+
+    def top(self, k, category=None):
+        """Τα k πιο ενεργά προϊόντα: [(product_id, εισαγωγές, εξαγωγές)], πιο ενεργό πρώτο"""
+        order = self.orders.get(category, [])
+        keys = order[max(len(order) - k, 0):] if k > 0 else []
+        return [(product_id, *self.totals[product_id]) for activity, product_id in reversed(keys)]
+
+    def bottom(self, k, category=None):
+        """Τα k λιγότερο ενεργά προϊόντα, λιγότερο ενεργό πρώτο"""
+        order = self.orders.get(category, [])
+        return [(product_id, *self.totals[product_id]) for activity, product_id in order[:max(k, 0)]]
+
+
+class StockLedger:
+    """Σύνολα εισαγωγών/εξαγωγών ανά προϊόν, κατηγορία, μήνα και ημέρα με ενημέρωση O(1) ανά κίνηση
+
+    Κάθε προσθήκη/διαγραφή κίνησης ενημερώνει μόνο τα σύνολα του προϊόντος,
+    της κατηγορίας του και της ημέρας/του μήνα της, αντί για άθροιση όλων των
+    κινήσεων σε κάθε ανανέωση. Το check() συγκρίνει με πλήρη επανυπολογισμό
+    από τις κινήσεις.
+
+    Το activity (και τα windows: days -> κατάταξη κυλιόμενου παραθύρου)
+    ενημερώνονται μαζί με τα σύνολα, για τα πιο/λιγότερο ενεργά προϊόντα.
+    Για το dashboard κρατιούνται επίσης το σύνολο του αποθέματος (stock_total)
+    και τα προϊόντα κάτω από το ελάχιστο (low).
+    """
+
+    def __init__(self, products=(), balances=None, periods=None):
+        self.initial = {}
+        self.min_limit = {}
+        self.category = {}
+        self.stock_total = 0
+        self.low = set()
+        # product_id -> [εισαγωγές, εξαγωγές, πλήθος κινήσεων]
+        self.entries = {}
+        # κατηγορία -> [εισαγωγές, εξαγωγές, πλήθος κινήσεων]
+        self.categories = {}
+        # "YYYY-MM" / "YYYY-MM-DD" -> [εισαγωγές, εξαγωγές, πλήθος κινήσεων]
+        self.periods = {}
+        self.movement_count = 0
+        self.activity = None
+        self.windows = {}
+        for product_id, balance in (balances or {}).items():
+            self.entries[product_id] = [balance['in'], balance['out'], balance['count']]
+            self.movement_count += balance['count']
+        for period, total in (periods or {}).items():
+            self.periods[period] = [total['in'], total['out'], total['count']]
+        products = list(products)
+        for p in products:
+            self.set_product(p)
+        self.activity = ActivityRanking(products, self.entries)
+
+    @classmethod
+    def from_movements(cls, products, movements):
+        if isinstance(movements, MovementStore):
+            # Αθροίσματα απευθείας πάνω στις στήλες
+            return cls(products, movements.product_totals(), movements.period_totals())
+        products = list(products)
+        ledger = cls(products)
+        # Η κατάταξη χτίζεται μία φορά στο τέλος, όχι ανά κίνηση
+        ledger.activity = None
+        for m in movements:
+            ledger.add(m)
+        ledger.activity = ActivityRanking(products, ledger.entries)
+        return ledger
+
+    def rankings(self):
+        if self.activity is not None:
+            yield self.activity
+        yield from self.windows.values()
+
+    @staticmethod
+    def bump(totals, key, total_in, total_out, count):
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = [0, 0, 0]
+        entry[0] += total_in
+        entry[1] += total_out
+        entry[2] += count
+        if not entry[2]:
+            # Χωρίς κινήσεις η περίοδος/κατηγορία δεν εμφανίζεται
+            del totals[key]
+
+    def set_product(self, product):
+        product_id = product['id']
+        before = self.current(product_id) if product_id in self.initial else 0
+        self.initial[product_id] = product['initial_stock']
+        self.min_limit[product_id] = product['min_limit']
+        self.restock(product_id, before)
+        category = product.get('category', '⚡ Άλλο')
+        previous = self.category.get(product_id)
+        if previous == category:
+            return
+        # Αλλαγή κατηγορίας: τα σύνολα του προϊόντος μεταφέρονται στη νέα
+        entry = self.entries.get(product_id)
+        if entry:
+            if product_id in self.category:
+                self.bump(self.categories, previous, -entry[0], -entry[1], -entry[2])
+            self.bump(self.categories, category, *entry)
+        self.category[product_id] = category
+
+        for ranking in self.rankings():
+            ranking.set_product(product)
+
+    def remove_product(self, product_id, movements=()):
+        """Αφαίρεση προϊόντος μαζί με τις κινήσεις του (για τα σύνολα ημέρας/μήνα)"""
+        for m in movements:
+            self.add_period(m, -1)
+        if product_id in self.initial:
+            self.stock_total -= self.current(product_id)
+            self.low.discard(product_id)
+            del self.min_limit[product_id]
+        self.initial.pop(product_id, None)
+        category = self.category.pop(product_id, None)
+        entry = self.entries.pop(product_id, None)
+        if entry:
+            self.movement_count -= entry[2]
+            if category is not None:
+                self.bump(self.categories, category, -entry[0], -entry[1], -entry[2])
+        for ranking in self.rankings():
+            ranking.remove_product(product_id)
+
+    def add_period(self, m, sign=1):
+        day = date_key(m.get('date'))[:10]
+        if day:
+            total_in, total_out = self.split(m, sign)
+            self.bump(self.periods, day, total_in, total_out, sign)
+            self.bump(self.periods, day[:7], total_in, total_out, sign)
+
+    def remove_periods(self, totals):
+        """Αφαίρεση συνόλων ανά ημέρα [ημέρα, τύπος, ποσότητα, πλήθος] (κινήσεις που δεν είναι στη μνήμη)"""
+        for day, movement_type, quantity, count in totals:
+            day = date_key(day)[:10]
+            if day:
+                total_in, total_out = self.split({'type': movement_type, 'quantity': quantity}, -1)
+                self.bump(self.periods, day, total_in, total_out, -count)
+                self.bump(self.periods, day[:7], total_in, total_out, -count)
+
+    @staticmethod
+    def split(m, sign):
+        quantity = m['quantity'] * sign
+        if m['type'] == 'in':
+            return quantity, 0
+        if m['type'] == 'out':
+            return 0, quantity
+        return 0, 0
+
+    def restock(self, product_id, before):
+        """Σύνολο αποθέματος και χαμηλά μετά από αλλαγή του αποθέματος ενός προϊόντος (before: προηγούμενο)"""
+        current = self.current(product_id)
+        self.stock_total += current - before
+        if current < self.min_limit[product_id]:
+            self.low.add(product_id)
+        else:
+            self.low.discard(product_id)
+
+    def add(self, m, sign=1):
+        product_id = m['product_id']
+        total_in, total_out = self.split(m, sign)
+        before = self.current(product_id)
+        entry = self.entries.get(product_id)
+        if entry is None:
+            entry = self.entries[product_id] = [0, 0, 0]
+        entry[0] += total_in
+        entry[1] += total_out
+        entry[2] += sign
+        self.movement_count += sign
+        if product_id in self.initial:
+            self.restock(product_id, before)
+        if product_id in self.category:
+            self.bump(self.categories, self.category[product_id], total_in, total_out, sign)
+        self.add_period(m, sign)
+        for ranking in self.rankings():
+            ranking.add(m, sign)
+
+    def remove(self, m):
+        self.add(m, -1)
+
+    def totals(self, product_id):
+        """(εισαγωγές, εξαγωγές) ενός προϊόντος"""
+        entry = self.entries.get(product_id)
+        if entry is None:
+            return 0, 0
+        return entry[0], entry[1]
+
+    def current(self, product_id):
+        total_in, total_out = self.totals(product_id)
+        return self.initial.get(product_id, 0) + total_in - total_out
+
+    def period(self, key):
+        """(εισαγωγές, εξαγωγές, πλήθος) ενός μήνα (YYYY-MM) ή μιας ημέρας (YYYY-MM-DD)"""
+        return tuple(self.periods.get(key, (0, 0, 0)))
+
+    def days_between(self, from_day, to_day):
+        """(εισαγωγές, εξαγωγές, πλήθος) των ημερών from_day..to_day ("YYYY-MM-DD", μαζί και οι δύο)"""
+        total_in = total_out = count = 0
+        for key, (day_in, day_out, day_count) in self.periods.items():
+            if len(key) == 10 and from_day <= key <= to_day:
+                total_in += day_in
+                total_out += day_out
+                count += day_count
+        return total_in, total_out, count
+
+    def months(self, limit=None):
+        """Οι μήνες με κινήσεις, νεότερος πρώτος: [(μήνας, εισαγωγές, εξαγωγές, πλήθος)]"""
+        months = sorted((key for key in self.periods if len(key) == 7), reverse=True)
+        return [(key, *self.periods[key]) for key in months[:limit]]
+
+    def check(self, products, movements):
+        """Σύγκριση με πλήρη επανυπολογισμό
+
+        Επιστρέφει λίστα (προϊόν/κατηγορία/περίοδος, τρέχουσες τιμές, σωστές
+        τιμές) για ό,τι διαφέρει - κενή αν όλα συμφωνούν.
+        """
+        expected = StockLedger.from_movements(products, movements)
+        mismatches = []
+        for product_id in set(self.entries) | set(expected.entries) | set(self.initial) | set(expected.initial):
+            actual = (self.initial.get(product_id, 0), *self.entries.get(product_id, (0, 0, 0)))
+            correct = (expected.initial.get(product_id, 0), *expected.entries.get(product_id, (0, 0, 0)))
+            if not all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(actual, correct)):
+                mismatches.append((product_id, actual, correct))
+        for totals, expected_totals in ((self.categories, expected.categories), (self.periods, expected.periods)):
+            for key in set(totals) | set(expected_totals):
+                actual = tuple(totals.get(key, (0, 0, 0)))
+                correct = tuple(expected_totals.get(key, (0, 0, 0)))
+                if not all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(actual, correct)):
+                    mismatches.append((key, actual, correct))
+        if self.low != expected.low:
+            mismatches.append(('low', sorted(self.low), sorted(expected.low)))
+        if not math.isclose(self.stock_total, expected.stock_total, abs_tol=1e-6):
+            mismatches.append(('stock_total', self.stock_total, expected.stock_total))
+        return mismatches
+
+
+# Export
+
+class ExportCancelled(Exception):
+    """Η εξαγωγή ακυρώθηκε από τον χρήστη"""
+
+
+class ExportJob:
+    """Μία εξαγωγή: στιγμιότυπο δεδομένων, αρχείο και write(job, snapshot, filename)
+
+    Το write τρέχει στο worker thread και δεν αγγίζει Tk ή repo - μόνο το
+    snapshot, που φτιάχνεται στο Tk thread και δεν αλλάζει μετά. Ενημερώνει
+    την πρόοδο με progress(), που είναι και το σημείο ακύρωσης. Ό,τι
+    επιστρέψει μπαίνει στο result.
+    """
+
+    def __init__(self, title, filename, write, snapshot, on_done=None):
+        self.title = title
+        self.filename = filename
+        self.write = write
+        self.snapshot = snapshot
+        self.on_done = on_done
+        self.state = 'queued'  # 'queued' | 'running' | 'done' | 'cancelled' | 'error'
+        self.result = None
+        self.error = None
+        self.done = 0
+        self.total = 0
+        self.cancelled = threading.Event()
+
+    def progress(self, done, total=None):
+        """Από το write: πρόοδος (done από total) - ExportCancelled αν ζητήθηκε ακύρωση"""
+        if self.cancelled.is_set():
+            raise ExportCancelled()
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def percent(self):
+        return int(100 * self.done / self.total) if self.total else 0
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class ExportQueue:
+    """Εξαγωγές (Excel/PDF) στο παρασκήνιο, μία κάθε φορά με σειρά υποβολής
+
+    Το Tk thread υποβάλλει jobs και διαβάζει την κατάστασή τους (root.after),
+    οπότε το παράθυρο και η καταχώρηση κινήσεων δεν σταματούν όσο γράφεται
+    μια μεγάλη αναφορά. Αρχείο εξαγωγής που ακυρώθηκε ή απέτυχε διαγράφεται.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+        self.jobs = []
+
+    def submit(self, job):
+        self.jobs.append(job)
+        self.executor.submit(self.run, job)
+        return job
+
+    def run(self, job):
+        if job.cancelled.is_set():
+            job.state = 'cancelled'
+            return
+        job.state = 'running'
+        try:
+            job.result = job.write(job, job.snapshot, job.filename)
+            job.state = 'done'
+        except ExportCancelled:
+            job.state = 'cancelled'
+            self.discard(job.filename)
+        except Exception as e:
+            job.error = e
+            job.state = 'error'
+            self.discard(job.filename)
+        finally:
+            job.snapshot = None
+
+    @staticmethod
+    def discard(filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    def active(self):
+        """Jobs που περιμένουν ή τρέχουν, με σειρά υποβολής"""
+        return [job for job in self.jobs if job.state in ('queued', 'running')]
+
+    def finished(self):
+        """Jobs που τελείωσαν από την προηγούμενη κλήση (αφαιρούνται από την ουρά)"""
+        finished = [job for job in self.jobs if job.state not in ('queued', 'running')]
+        self.jobs = [job for job in self.jobs if job not in finished]
+        return finished
+
+    def cancel(self):
+        """Ακύρωση της εξαγωγής που τρέχει (ή της πρώτης σε αναμονή)"""
+        active = self.active()
+        if active:
+            active[0].cancel()
+
+    def close(self):
+        for job in self.jobs:
+            job.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Barcodes
+
+class BarcodeBatch:
+    """Αποκωδικοποίηση barcodes από φάκελο εικόνων (φωτογραφίες δελτίων, scanner)
+
+    Οι εικόνες μοιράζονται σε worker threads (το zbar μέσω ctypes και η
+    αποσυμπίεση του PIL αφήνουν το GIL) και κάθε αποτέλεσμα μπαίνει στο
+    results ως (αρχείο, κωδικοί, χρόνος σε ms, σφάλμα). Το Tk thread τα
+    διαβάζει με root.after, όπως τις εξαγωγές, και αντιστοιχίζει τους
+    κωδικούς σε προϊόντα με ProductSearchIndex.by_code.
+    """
+
+    EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp'}
+
+    def __init__(self, folder, workers=None):
+        self.files = sorted(path for path in Path(folder).iterdir() if path.suffix.lower() in self.EXTENSIONS)
+        self.results = []
+        self.cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 2), thread_name_prefix="barcode")
+        self.futures = [executor.submit(self.decode, path) for path in self.files]
+        executor.shutdown(wait=False)
+
+    @staticmethod
+    def available():
+        """Τα modules που λείπουν για την αποκωδικοποίηση (κενή λίστα αν υπάρχουν όλα)"""
+        return [package for module, package in (('PIL.Image', 'pillow'), ('pyzbar.pyzbar', 'pyzbar'))
+                if optional_module(module) is None]
+
+    @classmethod
+    def can_decode(cls):
+        """Έλεγχος ότι το zbar φορτώνεται και αποκωδικοποιεί (π.χ. στο EXE, από το --startup-check)"""
+        if cls.available():
+            return False
+        try:
+            image = optional_module('PIL.Image').new('L', (8, 8), 255)
+            return optional_module('pyzbar.pyzbar').decode(image) == []
+        except Exception as e:
+            print(f"Barcodes: {type(e).__name__}: {e}")
+            return False
+
+    @staticmethod
+    def decode_image(path):
+        with optional_module('PIL.Image').open(path) as image:
+            return [symbol.data.decode('utf-8', 'replace') for symbol in optional_module('pyzbar.pyzbar').decode(image)]
+
+    def decode(self, path):
+        if self.cancelled.is_set():
+            return
+        start = time.perf_counter()
+        try:
+            codes, error = self.decode_image(path), None
+        except Exception as e:
+            codes, error = [], e
+        self.results.append((path, codes, (time.perf_counter() - start) * 1000, error))
+
+    def finished(self):
+        return all(future.done() for future in self.futures)
+
+    def cancel(self):
+        self.cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+    def latency(self):
+        """(μέσος όρος, p95, μέγιστο) χρόνου αποκωδικοποίησης ανά εικόνα σε ms"""
+        times = sorted(result[2] for result in self.results)
+        if not times:
+            return 0, 0, 0
+        return sum(times) / len(times), times[min(len(times) - 1, int(len(times) * 0.95))], times[-1]
+
+    def lines(self, search, movement_type='in'):
+        """Γραμμές για τη μαζική καταχώριση: μία ανά κωδικό, ποσότητα = πόσες φορές διαβάστηκε
+
+        Οι άγνωστοι κωδικοί μένουν ως γραμμές για έλεγχο/διόρθωση από τον χρήστη.
+        """
+        counts = Counter(code for _, codes, _, _ in self.results for code in codes)
+        return [
+            {
+                'product': code,
+                'type': movement_type,
+                'quantity': count,
+                'notes': "barcode" if search.by_code(code) is not None else "barcode - άγνωστος κωδικός"
+            }
+            for code, count in sorted(counts.items())
+        ]
 
 
 class StockManagerPro:
-    def __init__(self, root):
+    # Κινήσεις που φορτώνονται στην εκκίνηση όταν το ιστορικό φορτώνεται στο παρασκήνιο
+    RECENT_MOVEMENTS = 50
+    # Κάθε πότε ελέγχονται αλλαγές άλλων σταθμών (ms)
+    SYNC_INTERVAL = 1000
+    # Από ποιες αλλαγές δεδομένων (notify) εξαρτάται κάθε view
+    # ('day' = αλλαγή ημερομηνίας: κινήσεις σήμερα, φίλτρα και παράθυρα ημερών)
+    VIEW_DEPENDENCIES = {
+        'dashboard': {'products', 'movements', 'day'},
+        'products': {'products', 'movements', 'categories'},
+        'movements': {'products', 'movements', 'day'},
+        'history': {'products', 'movements'},
+        'stock': {'products', 'movements'},
+        'reports': {'products', 'movements', 'categories', 'day'}
+    }
+    # Επιλογές για τα πιο/λιγότερο ενεργά προϊόντα στις αναφορές (None = όλο το ιστορικό)
+    ACTIVITY_TOP_K = (5, 10, 20, 50)
+    ACTIVITY_WINDOWS = {
+        "Όλο το ιστορικό": None,
+        "Τελευταίες 7 ημέρες": 7,
+        "Τελευταίες 30 ημέρες": 30,
+        "Τελευταίες 90 ημέρες": 90,
+        "Τελευταίο έτος": 365
+    }
+
+    def __init__(self, root, data_dir="data"):
         self.root = root
         self.root.title("🏪 Stock Manager PRO - Διαχείριση Αποθήκης")
         self.root.geometry("1600x900")
@@ -69,32 +2993,59 @@ class StockManagerPro:
         }
         
         # Data files
-        self.data_dir = Path("data")
+        self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         self.products_file = self.data_dir / "products.json"
         self.movements_file = self.data_dir / "movements.json"
         self.categories_file = self.data_dir / "categories.json"
+        self.db_file = self.data_dir / "stock_manager.db"
+        
+        # Storage backend
+        self.storage = self.open_storage()
         
         # Backup directory
         self.backup_dir = self.data_dir / "backups"
-        self.backup_dir.mkdir(exist_ok=True)
+        self.backups = BackupManager(self.backup_dir)
         
-        # Load data
-        self.categories = self.load_categories()
-        self.products = self.load_products()
-        self.movements = self.load_movements()
+        # Load data (το ιστορικό κινήσεων φορτώνεται στο παρασκήνιο όταν γίνεται)
+        self.history_thread = None
+        # Ενέργειες που περιμένουν το πλήρες ιστορικό (βλ. ensure_history)
+        self.history_waiters = []
+        self.load_data()
+        
+        # Έλεγχος εκκίνησης: κατεστραμμένα αρχεία ξαναφτιάχνονται από backup
+        self.recovery = self.recover_storage()
+        
+        # Αποθήκευση αλλαγών στο παρασκήνιο
+        self.persister = WriteBehindPersister(self.storage, self.backups)
+        # Εξαγωγές στο παρασκήνιο (βλ. submit_export)
+        self.exports = ExportQueue()
+        self.exports_polling = False
         
         # Auto backup on start
         self.auto_backup()
         
         # Search vars
+        self.search_job = None
         self.search_var = tk.StringVar()
         self.search_var.trace('w', self.on_search)
         
         self.setup_ui()
         self.refresh_all()
         
-        # Αυτόματη ενημέρωση dashboard κάθε 30 δευτερόλεπτα
+        if not self.history_loaded:
+            self.start_history_loader()
+        
+        # Τριγράμματα αναζήτησης μετά την εμφάνιση του παραθύρου, πριν από την πρώτη αναζήτηση
+        self.root.after(500, lambda: self.repo.search.index_pending())
+        
+        # Αλλαγές από άλλους σταθμούς στην ίδια βάση
+        self.root.after(self.SYNC_INTERVAL, self.poll_remote_changes)
+        
+        if self.recovery:
+            self.root.after_idle(self.show_recovery_report)
+        
+        # Αλλαγή ημέρας για το dashboard (έλεγχος κάθε 30 δευτερόλεπτα)
         self.auto_refresh_dashboard()
         
         # Handler για ασφαλές κλείσιμο
@@ -143,6 +3094,16 @@ class StockManagerPro:
         # Main notebook
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=0, pady=0)
+        # Tab -> όνομα view (βλ. VIEW_DEPENDENCIES) - τα κρυφά tabs ανανεώνονται όταν επιλεγούν
+        self.view_tabs = {}
+        self.dirty_views = set()
+        # Η ημέρα των μετρητών "σήμερα" (βλ. auto_refresh_dashboard)
+        self.today = datetime.now().date()
+        # Πίνακες με reconcile_treeview: str(tree) -> (γραμμές της refresh, {iid: (values, tags) στο Tk})
+        self.table_rows = {}
+        # str(tree) -> (στήλη, reverse) της ταξινόμησης του χρήστη
+        self.table_sorts = {}
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self.refresh_visible())
         
         # Create tabs
         self.create_dashboard_tab()
@@ -153,8 +3114,11 @@ class StockManagerPro:
         self.create_reports_tab()
         
         # Status bar
+        status_frame = tk.Frame(self.root, bg=self.colors['light'])
+        status_frame.pack(fill=tk.X, side=tk.BOTTOM)
+        
         self.status_bar = tk.Label(
-            self.root,
+            status_frame,
             text="✓ Έτοιμο",
             font=("Segoe UI", 9),
             bg=self.colors['light'],
@@ -163,7 +3127,51 @@ class StockManagerPro:
             padx=15,
             pady=8
         )
-        self.status_bar.pack(fill=tk.X, side=tk.BOTTOM)
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Κατάσταση αποθήκευσης (saved / unsaved / saving)
+        self.save_status = tk.Label(
+            status_frame,
+            text="",
+            font=("Segoe UI", 9),
+            bg=self.colors['light'],
+            anchor=tk.E,
+            padx=15,
+            pady=8
+        )
+        self.save_status.pack(side=tk.RIGHT)
+        self.update_save_status()
+        
+        # Πρόοδος εξαγωγών - κλικ για ακύρωση
+        self.export_status = tk.Label(
+            status_frame,
+            text="",
+            font=("Segoe UI", 9),
+            bg=self.colors['light'],
+            fg=self.colors['info'],
+            cursor="hand2",
+            anchor=tk.E,
+            padx=15,
+            pady=8
+        )
+        self.export_status.pack(side=tk.RIGHT)
+        self.export_status.bind("<Button-1>", lambda e: self.exports.cancel())
+        
+        # Πρόοδος αποκωδικοποίησης barcodes - κλικ για ακύρωση
+        self.barcode_batch = None
+        self.barcode_status = tk.Label(
+            status_frame,
+            text="",
+            font=("Segoe UI", 9),
+            bg=self.colors['light'],
+            fg=self.colors['info'],
+            cursor="hand2",
+            anchor=tk.E,
+            padx=15,
+            pady=8
+        )
+        self.barcode_status.pack(side=tk.RIGHT)
+        self.barcode_status.bind("<Button-1>", lambda e: self.barcode_batch and self.barcode_batch.cancel())
         
         # Apply modern style
         self.apply_style()
@@ -207,6 +3215,7 @@ class StockManagerPro:
         """Tab: Dashboard με στατιστικά"""
         tab = tk.Frame(self.notebook, bg="white")
         self.notebook.add(tab, text="📊 DASHBOARD")
+        self.view_tabs[str(tab)] = 'dashboard'
         
         # Header
         header = tk.Frame(tab, bg=self.colors['info'], height=60)
@@ -294,6 +3303,7 @@ class StockManagerPro:
         """Tab: Προϊόντα με search"""
         tab = tk.Frame(self.notebook, bg="white")
         self.notebook.add(tab, text="📦 ΠΡΟΙΟΝΤΑ")
+        self.view_tabs[str(tab)] = 'products'
         
         # Toolbar
         toolbar = tk.Frame(tab, bg=self.colors['light'], height=70)
@@ -364,8 +3374,6 @@ class StockManagerPro:
             borderwidth=2
         )
         search_entry.pack(side=tk.LEFT, padx=5, ipady=6)
-        # Αυτόματη ενημέρωση καθώς πληκτρολογείς
-        search_entry.bind('<KeyRelease>', lambda e: self.refresh_products())
         
         # Category Filter
         tk.Label(
@@ -396,6 +3404,7 @@ class StockManagerPro:
         """Tab: Κινήσεις"""
         tab = tk.Frame(self.notebook, bg="white")
         self.notebook.add(tab, text="📋 ΚΙΝΗΣΕΙΣ")
+        self.view_tabs[str(tab)] = 'movements'
         
         # Toolbar
         toolbar = tk.Frame(tab, bg=self.colors['light'], height=70)
@@ -425,6 +3434,26 @@ class StockManagerPro:
             pady=12
         ).pack(side=tk.LEFT, padx=5)
         
+        ModernButton(
+            btn_frame,
+            text="📋 Μαζική",
+            command=self.bulk_movements,
+            bg=self.colors['info'],
+            fg="white",
+            padx=25,
+            pady=12
+        ).pack(side=tk.LEFT, padx=5)
+        
+        ModernButton(
+            btn_frame,
+            text="📷 Barcodes",
+            command=self.scan_barcodes,
+            bg=self.colors['info'],
+            fg="white",
+            padx=25,
+            pady=12
+        ).pack(side=tk.LEFT, padx=5)
+        
         ModernButton(
             btn_frame,
             text="🗑️ Διαγραφή",
@@ -457,16 +3486,41 @@ class StockManagerPro:
         self.movement_filter.bind("<<ComboboxSelected>>", lambda e: self.refresh_movements())
         self.movement_filter.pack(side=tk.LEFT, padx=5)
         
-        # Table
-        self.movements_tree = self.create_modern_table(
+        # Table (virtual: γραμμές = ids κινήσεων)
+        self.movements_tree = VirtualTable(
             tab,
-            ["ID", "Ημερομηνία", "Προϊόν", "Τύπος", "Ποσότητα", "Σημειώσεις"]
+            ["ID", "Ημερομηνία", "Προϊόν", "Τύπος", "Ποσότητα", "Σημειώσεις"],
+            self.movement_row,
+            key=lambda movement_id: movement_id,
+            sort_keys=self.movement_sort_keys()
         )
     
+    def movement_sort_keys(self):
+        """Κλειδιά ταξινόμησης των πινάκων κινήσεων/ημερολογίου από τις στήλες του MovementStore"""
+        # Το repo αντικαθίσταται (φόρτωση ιστορικού, επαναφορά) - διαβάζεται σε κάθε κλήση
+        movements = lambda: self.repo.movements
+        name = lambda movement_id: ProductSearchIndex.collation_key(
+            self.repo.product_name(movements().value(movement_id, 'product_id')))
+        category = lambda movement_id: ProductSearchIndex.collation_key(
+            (self.repo.product(movements().value(movement_id, 'product_id')) or {}).get('category', '-'))
+        time_of = lambda movement_id: (movements().value(movement_id, 'time'), movement_id)
+        return {
+            "ID": lambda movement_id: movement_id,
+            "Ημερομηνία": time_of,
+            # Ώρα της ημέρας (οι χρόνοι είναι τοπικοί, χωρίς ζώνη)
+            "Ώρα": lambda movement_id: (movements().value(movement_id, 'time') % 86400, movement_id),
+            "Προϊόν": name,
+            "Κατηγορία": category,
+            "Τύπος": lambda movement_id: movements().value(movement_id, 'type'),
+            "Ποσότητα": lambda movement_id: movements().value(movement_id, 'quantity'),
+            "Σημειώσεις": lambda movement_id: ProductSearchIndex.collation_key(movements().value(movement_id, 'notes')),
+        }
+    
     def create_history_tab(self):
         """Tab: Ημερολόγιο/Ιστορικό Κινήσεων με δυνατότητα εξαγωγής"""
         tab = tk.Frame(self.notebook, bg="white")
         self.notebook.add(tab, text="📅 ΗΜΕΡΟΛΟΓΙΟ")
+        self.view_tabs[str(tab)] = 'history'
         
         # Toolbar
         toolbar = tk.Frame(tab, bg=self.colors['light'], height=90)
@@ -635,15 +3689,19 @@ class StockManagerPro:
         self.history_summary_label.pack(pady=15)
         
         # Table
-        self.history_tree = self.create_modern_table(
+        self.history_tree = VirtualTable(
             tab,
-            ["ID", "Ημερομηνία", "Ώρα", "Προϊόν", "Κατηγορία", "Τύπος", "Ποσότητα", "Σημειώσεις"]
+            ["ID", "Ημερομηνία", "Ώρα", "Προϊόν", "Κατηγορία", "Τύπος", "Ποσότητα", "Σημειώσεις"],
+            self.history_row,
+            key=lambda movement_id: movement_id,
+            sort_keys=self.movement_sort_keys()
         )
     
     def create_stock_tab(self):
         """Tab: Απόθεμα"""
         tab = tk.Frame(self.notebook, bg="white")
         self.notebook.add(tab, text="📊 ΑΠΟΘΕΜΑ")
+        self.view_tabs[str(tab)] = 'stock'
         
         # Toolbar
         toolbar = tk.Frame(tab, bg=self.colors['light'], height=70)
@@ -706,15 +3764,29 @@ class StockManagerPro:
         self.stock_filter.pack(side=tk.LEFT, padx=5)
         
         # Table
-        self.stock_tree = self.create_modern_table(
+        # Γραμμές: (προϊόν, εισαγωγές, εξαγωγές, τρέχον)
+        self.stock_tree = VirtualTable(
             tab,
-            ["Προϊόν", "Κωδικός", "Αρχικό", "Εισαγωγές", "Εξαγωγές", "Τρέχον", "Ελάχιστο", "Κατάσταση"]
+            ["Προϊόν", "Κωδικός", "Αρχικό", "Εισαγωγές", "Εξαγωγές", "Τρέχον", "Ελάχιστο", "Κατάσταση"],
+            self.stock_row,
+            key=lambda row: row[0]['id'],
+            sort_keys={
+                "Προϊόν": lambda row: ProductSearchIndex.collation_key(row[0]['name']),
+                "Κωδικός": lambda row: ProductSearchIndex.collation_key(row[0].get('code', '')),
+                "Αρχικό": lambda row: row[0]['initial_stock'],
+                "Εισαγωγές": lambda row: row[1],
+                "Εξαγωγές": lambda row: row[2],
+                "Τρέχον": lambda row: row[3],
+                "Ελάχιστο": lambda row: row[0]['min_limit'],
+                "Κατάσταση": lambda row: row[3] < row[0]['min_limit'],
+            }
         )
     
     def create_reports_tab(self):
         """Tab: Αναφορές"""
         tab = tk.Frame(self.notebook, bg="white")
         self.notebook.add(tab, text="📊 ΑΝΑΦΟΡΕΣ")
+        self.view_tabs[str(tab)] = 'reports'
         
         # Toolbar
         toolbar = tk.Frame(tab, bg=self.colors['light'], height=70)
@@ -754,6 +3826,64 @@ class StockManagerPro:
             pady=12
         ).pack(side=tk.LEFT, padx=5)
         
+        # Επιλογές για τα πιο/λιγότερο ενεργά προϊόντα
+        activity_frame = tk.Frame(toolbar, bg=self.colors['light'])
+        activity_frame.pack(side=tk.RIGHT, padx=20)
+        
+        tk.Label(
+            activity_frame,
+            text="Top:",
+            bg=self.colors['light'],
+            font=("Segoe UI", 10)
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.activity_k = ttk.Combobox(
+            activity_frame,
+            font=("Segoe UI", 10),
+            width=4,
+            state="readonly"
+        )
+        self.activity_k['values'] = [str(k) for k in self.ACTIVITY_TOP_K]
+        self.activity_k.current(0)
+        self.activity_k.bind("<<ComboboxSelected>>", lambda e: self.refresh_reports())
+        self.activity_k.pack(side=tk.LEFT, padx=5)
+        
+        tk.Label(
+            activity_frame,
+            text="Περίοδος:",
+            bg=self.colors['light'],
+            font=("Segoe UI", 10)
+        ).pack(side=tk.LEFT, padx=(15, 5))
+        
+        self.activity_window = ttk.Combobox(
+            activity_frame,
+            font=("Segoe UI", 10),
+            width=16,
+            state="readonly"
+        )
+        self.activity_window['values'] = list(self.ACTIVITY_WINDOWS)
+        self.activity_window.current(0)
+        self.activity_window.bind("<<ComboboxSelected>>", lambda e: self.refresh_reports())
+        self.activity_window.pack(side=tk.LEFT, padx=5)
+        
+        tk.Label(
+            activity_frame,
+            text="Κατηγορία:",
+            bg=self.colors['light'],
+            font=("Segoe UI", 10)
+        ).pack(side=tk.LEFT, padx=(15, 5))
+        
+        self.activity_category = ttk.Combobox(
+            activity_frame,
+            font=("Segoe UI", 10),
+            width=18,
+            state="readonly"
+        )
+        self.activity_category['values'] = ["Όλες"] + self.categories
+        self.activity_category.current(0)
+        self.activity_category.bind("<<ComboboxSelected>>", lambda e: self.refresh_reports())
+        self.activity_category.pack(side=tk.LEFT, padx=5)
+        
         # Content with scrollbar
         content_frame = tk.Frame(tab, bg="white")
         content_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -787,7 +3917,7 @@ class StockManagerPro:
         self.report_stock_value.pack(side=tk.LEFT, padx=10, fill=tk.BOTH, expand=True)
         
         # Most Active Products
-        active_frame = tk.LabelFrame(
+        self.most_active_frame = active_frame = tk.LabelFrame(
             scrollable_frame,
             text="🔥 Πιο Ενεργά Προϊόντα (Top 5)",
             font=("Segoe UI", 12, "bold"),
@@ -802,7 +3932,7 @@ class StockManagerPro:
         )
         
         # Least Active Products
-        least_frame = tk.LabelFrame(
+        self.least_active_frame = least_frame = tk.LabelFrame(
             scrollable_frame,
             text="💤 Λιγότερο Ενεργά Προϊόντα (Top 5)",
             font=("Segoe UI", 12, "bold"),
@@ -902,28 +4032,53 @@ class StockManagerPro:
         
         return tree
     
+    def reconcile_treeview(self, tree, rows):
+        """Ενημέρωση πίνακα με διαφορές αντί για διαγραφή και επανεισαγωγή όλων
+
+        rows: [(iid, values, tags, keys)] με τη σειρά της refresh - keys είναι
+        τα κλειδιά ταξινόμησης ανά στήλη (αριθμοί, χρόνοι, collation_key), ώστε
+        η ταξινόμηση να μη διαβάζει κείμενα από το Tk. Αλλάζουν μόνο οι
+        γραμμές με διαφορετικές τιμές/tags, μπαίνουν ή σβήνουν μόνο όσες
+        προστέθηκαν ή αφαιρέθηκαν, οπότε μένουν η επιλογή και η κύλιση. Αν ο
+        χρήστης έχει ταξινομήσει (sort_treeview), η ταξινόμηση κρατιέται.
+        """
+        key = str(tree)
+        drawn = self.table_rows[key][1] if key in self.table_rows else {}
+        self.table_rows[key] = (rows, drawn)
+        
+        wanted = {row[0] for row in rows}
+        removed = [iid for iid in drawn if iid not in wanted]
+        if removed:
+            tree.delete(*removed)
+            for iid in removed:
+                del drawn[iid]
+        
+        if key in self.table_sorts:
+            col, reverse = self.table_sorts[key]
+            index = list(tree['columns']).index(col)
+            rows = sorted(rows, key=lambda row: row[3][index], reverse=reverse)
+        
+        for position, (iid, values, tags, _) in enumerate(rows):
+            entry = (tuple(values), (*tags, "evenrow" if position % 2 else "oddrow"))
+            if iid not in drawn:
+                tree.insert("", tk.END, iid=iid, values=entry[0], tags=entry[1])
+            elif drawn[iid] != entry:
+                tree.item(iid, values=entry[0], tags=entry[1])
+            drawn[iid] = entry
+        
+        # Μετακίνηση μόνο αν άλλαξε η σειρά (μία κλήση Tk για όλες)
+        order = [row[0] for row in rows]
+        if list(tree.get_children()) != order:
+            tree.set_children('', *order)
+    
     def sort_treeview(self, tree, col, reverse):
         """Sort treeview by column"""
         try:
-            # Get all rows
-            data_list = [(tree.set(child, col), child) for child in tree.get_children('')]
-            
-            # Try to sort numerically first, if fails sort alphabetically
-            try:
-                # Try numeric sort
-                data_list.sort(key=lambda t: float(t[0].replace('📥 ', '').replace('📤 ', '').replace('€', '').replace(',', '').strip()), reverse=reverse)
-            except:
-                # Fallback to string sort
-                data_list.sort(key=lambda t: t[0].lower(), reverse=reverse)
-            
-            # Rearrange items
-            for index, (val, child) in enumerate(data_list):
-                tree.move(child, '', index)
-                # Update row colors
-                if index % 2 == 0:
-                    tree.item(child, tags=('evenrow',))
-                else:
-                    tree.item(child, tags=('oddrow',))
+            # Ταξινόμηση των δεδομένων με τα κλειδιά της refresh (μία αναδιάταξη στο Tk),
+            # που κρατιέται και στις επόμενες ανανεώσεις
+            self.table_sorts[str(tree)] = (col, reverse)
+            if str(tree) in self.table_rows:
+                self.reconcile_treeview(tree, self.table_rows[str(tree)][0])
             
             # Update heading to show sort direction
             for c in tree['columns']:
@@ -1015,11 +4170,177 @@ class StockManagerPro:
     
     # Data Management (same as before)
     
+    def open_storage(self):
+        """Άνοιγμα της μηχανής αποθήκευσης (SQLite ή JSON)"""
+        if STORAGE_BACKEND == "sqlite":
+            return SqliteStorage(self.db_file, self.data_dir)
+        return JsonStorage(self.data_dir, journal=True)
+    
+    def recover_storage(self):
+        """Ανακατασκευή κατεστραμμένων αρχείων από το νεότερο έγκυρο backup
+
+        Επιστρέφει (κατεστραμμένα αρχεία, backup που χρησιμοποιήθηκε ή None) ή
+        None αν όλα ήταν εντάξει.
+        """
+        if not self.storage.damaged:
+            return None
+        
+        damaged = list(self.storage.damaged)
+        for path in self.backups.list_backups():
+            try:
+                products, movements, categories = self.backups.load(path)
+            except Exception as e:
+                # Κατεστραμμένο backup (ή αλυσίδα deltas) - δοκιμάζουμε το προηγούμενο
+                print(f"Backup error: {path.name}: {type(e).__name__}: {e}")
+                continue
+            
+            self.storage.recover(products, movements, categories or self.categories)
+            self.load_data()
+            return damaged, path
+        
+        return damaged, None
+    
+    def show_recovery_report(self):
+        damaged, backup = self.recovery
+        files = ", ".join(damaged)
+        if backup is not None:
+            messagebox.showwarning(
+                "Ανάκτηση Δεδομένων",
+                f"Βρέθηκαν κατεστραμμένα αρχεία: {files}\n\n"
+                f"Τα δεδομένα ανακτήθηκαν αυτόματα από το backup της "
+                f"{backup_datetime(backup).strftime('%d/%m/%Y %H:%M:%S')}.\n"
+                f"Τα κατεστραμμένα αρχεία κρατήθηκαν ως *.corrupt-* στον φάκελο data."
+            )
+        else:
+            messagebox.showerror(
+                "Ανάκτηση Δεδομένων",
+                f"Βρέθηκαν κατεστραμμένα αρχεία: {files}\n\n"
+                f"Δεν βρέθηκε έγκυρο backup για αυτόματη ανάκτηση - τα δεδομένα "
+                f"των αρχείων αυτών ξεκινούν κενά.\n"
+                f"Τα κατεστραμμένα αρχεία κρατήθηκαν ως *.corrupt-* στον φάκελο data."
+            )
+    
+    @property
+    def products(self):
+        """Όλα τα προϊόντα (από το self.repo - οι αλλαγές γίνονται μέσω αυτού)"""
+        return self.repo.products
+    
+    @property
+    def movements(self):
+        """Όλες οι κινήσεις (από το self.repo - οι αλλαγές γίνονται μέσω αυτού)"""
+        return self.repo.movements
+    
+    def load_data(self):
+        """Φόρτωση δεδομένων
+
+        Αν η αποθήκευση έχει snapshot υπολοίπων ανά προϊόν (SQLite), φορτώνονται
+        μόνο αυτό και οι τελευταίες κινήσεις, ώστε ο χρόνος εκκίνησης να μην
+        εξαρτάται από το μέγεθος του ιστορικού. Το υπόλοιπο ιστορικό φορτώνεται
+        στο παρασκήνιο (start_history_loader) - ό,τι το χρειάζεται ολόκληρο
+        περιμένει με ensure_history.
+        """
+        self.categories = self.load_categories()
+        products = self.load_products()
+        
+        balances = self.storage.load_balances()
+        if balances is None:
+            movements = self.load_movements()
+            self.ledger = StockLedger.from_movements(products, movements)
+            self.history_loaded = True
+        else:
+            movements = self.storage.load_recent_movements(self.RECENT_MOVEMENTS)
+            self.ledger = StockLedger(products, balances, self.storage.load_rollups())
+            self.history_loaded = False
+        self.repo = Repository(products, movements)
+        
+        # Αλλαγές κινήσεων όσο φορτώνεται το ιστορικό - εφαρμόζονται ξανά πάνω του
+        self.history_ops = None if self.history_loaded else []
+        self.history_result = {}
+        self.last_movement_id = self.repo.movements.last_id()
+    
+    def start_history_loader(self):
+        """Φόρτωση όλου του ιστορικού κινήσεων σε thread, μετά την εμφάνιση του παραθύρου"""
+        # Κάθε φόρτωση γράφει στο δικό της dict, ώστε μια παλιά (π.χ. πριν από
+        # πλήρη επαναφόρτωση) να μην επηρεάζει την τρέχουσα
+        result = self.history_result
+        
+        def load():
+            try:
+                # Και τα ευρετήρια χτίζονται εδώ, εκτός Tk thread - τα προϊόντα μπαίνουν στο poll
+                result['movements'] = Repository((), self.storage.iter_movements_readonly())
+            except Exception as e:
+                result['movements'] = e
+        
+        self.history_thread = threading.Thread(target=load, name="history-loader", daemon=True)
+        self.history_thread.start()
+        self.status_bar.config(text="⏳ Φόρτωση ιστορικού κινήσεων...", fg=self.colors['info'])
+        self.root.after(100, self.poll_history_loader)
+    
+    def poll_history_loader(self):
+        if self.history_loaded:
+            # Π.χ. επαναφορά backup όσο φορτωνόταν το ιστορικό
+            self.run_history_waiters()
+            return
+        if 'movements' not in self.history_result:
+            self.root.after(100, self.poll_history_loader)
+            return
+        
+        result = self.history_result['movements']
+        if isinstance(result, Exception):
+            self.history_ops = None
+            self.history_loaded = True
+            self.refresh_all()
+            self.show_notification(f"✗ Σφάλμα φόρτωσης ιστορικού: {result}", "error")
+            self.run_history_waiters()
+            return
+        
+        result.products_by_id = self.repo.products_by_id
+        result.search = self.repo.search
+        result.apply(self.history_ops)
+        self.repo = result
+        self.history_ops = None
+        self.history_loaded = True
+        self.check_ledger()
+        self.refresh_all()
+        self.show_notification(f"✓ Φορτώθηκε το ιστορικό ({len(self.movements)} κινήσεις)", "success")
+        self.run_history_waiters()
+    
+    def ensure_history(self, then):
+        """True αν το πλήρες ιστορικό έχει φορτωθεί (π.χ. πριν από εξαγωγή)
+
+        Αλλιώς το then (συνήθως η ίδια εντολή) καλείται όταν τελειώσει η
+        φόρτωση, χωρίς αναμονή στο Tk thread.
+        """
+        if self.history_loaded:
+            return True
+        if then not in self.history_waiters:
+            self.history_waiters.append(then)
+        self.show_notification("⏳ Αναμονή για τη φόρτωση του ιστορικού κινήσεων...", "info")
+        return False
+    
+    def run_history_waiters(self):
+        waiters, self.history_waiters = self.history_waiters, []
+        for then in waiters:
+            then()
+    
+    def check_ledger(self):
+        """Έλεγχος των υπολοίπων (π.χ. του snapshot της βάσης) με πλήρη επανυπολογισμό"""
+        mismatches = self.ledger.check(self.products, self.movements)
+        if not mismatches:
+            return True
+        
+        for key, actual, correct in mismatches[:10]:
+            print(f"Stock ledger: {key}: {actual} αντί για {correct}")
+        self.ledger = StockLedger.from_movements(self.products, self.movements)
+        self.persist(('rebuild_balances', None))
+        self.show_notification(f"⚠ Διορθώθηκαν {len(mismatches)} υπόλοιπα/σύνολα", "warning")
+        return False
+    
     def load_categories(self):
-        """Load categories from file or use defaults"""
-        if self.categories_file.exists():
-            with open(self.categories_file, 'r', encoding='utf-8-sig') as f:
-                return json.load(f)
+        """Load categories from storage or use defaults"""
+        categories = self.storage.load_categories()
+        if categories is not None:
+            return categories
         # Default categories
         return [
             "🍕 Τρόφιμα",
@@ -1034,78 +4355,219 @@ class StockManagerPro:
             "⚡ Άλλο"
         ]
     
-    def save_categories(self):
-        """Save categories to file"""
-        with open(self.categories_file, 'w', encoding='utf-8') as f:
-            json.dump(self.categories, f, ensure_ascii=False, indent=2)
-        self.auto_backup()
-    
     def load_products(self):
-        if self.products_file.exists():
-            with open(self.products_file, 'r', encoding='utf-8-sig') as f:
-                return json.load(f)
-        return []
-    
-    def save_products(self):
-        with open(self.products_file, 'w', encoding='utf-8') as f:
-            json.dump(self.products, f, ensure_ascii=False, indent=2)
-        self.auto_backup()
+        return self.storage.load_products()
     
     def load_movements(self):
-        if self.movements_file.exists():
-            with open(self.movements_file, 'r', encoding='utf-8-sig') as f:
-                return json.load(f)
-        return []
+        return self.storage.load_movements()
     
-    def save_movements(self):
-        with open(self.movements_file, 'w', encoding='utf-8') as f:
-            json.dump(self.movements, f, ensure_ascii=False, indent=2)
-        self.auto_backup()
+    def data_counts(self):
+        return {
+            'products': len(self.products),
+            'movements': self.ledger.movement_count,
+            'categories': len(self.categories)
+        }
+    
+    def persist(self, *ops):
+        """Αποθήκευση μόνο των αλλαγών (π.χ. μία κίνηση) και backup, στο παρασκήνιο"""
+        if self.history_ops is not None:
+            self.history_ops.extend(ops)
+        self.persister.submit(ops, self.data_counts())
     
-    def auto_backup(self):
-        """Automatically backup data"""
+    def save_all(self):
+        """Πλήρης αποθήκευση όλων των δεδομένων (π.χ. μετά από επαναφορά)"""
+        snapshot = ([dict(p) for p in self.products], [dict(m) for m in self.movements], list(self.categories))
+        self.persister.submit([('replace_all', snapshot)], self.data_counts(), full=True)
+    
+    def auto_backup(self, full=False):
+        """Automatically backup data (delta με τις αλλαγές ή πλήρες snapshot)"""
+        self.persister.submit([], self.data_counts(), full=full)
+    
+    def poll_remote_changes(self):
+        """Ενσωμάτωση αλλαγών άλλων σταθμών που δουλεύουν στην ίδια βάση"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = self.backup_dir / f"backup_{timestamp}.json"
-            
-            backup_data = {
-                'timestamp': timestamp,
-                'products': self.products,
-                'movements': self.movements,
-                'categories': self.categories
-            }
-            
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, ensure_ascii=False, indent=2)
-            
-            # Keep only last 20 backups
-            backups = sorted(self.backup_dir.glob("backup_*.json"))
-            if len(backups) > 20:
-                for old_backup in backups[:-20]:
-                    old_backup.unlink()
+            self.sync_remote_changes()
+        finally:
+            self.root.after(self.SYNC_INTERVAL, self.poll_remote_changes)
+    
+    def sync_remote_changes(self):
+        """Άμεσος έλεγχος για αλλαγές άλλων σταθμών (π.χ. πριν από έλεγχο συγκρούσεων)"""
+        try:
+            changes = self.storage.poll_changes()
+            if changes is None:
+                self.reload_data()
+            elif changes:
+                self.merge_changes(changes)
         except Exception as e:
-            print(f"Backup error: {e}")
+            print(f"Sync error: {type(e).__name__}: {e}")
+    
+    def product_deleted_remotely(self, product_id):
+        """Έλεγχος πριν από αλλαγή: το προϊόν υπάρχει ακόμα (μετά τις αλλαγές άλλων σταθμών);"""
+        if self.repo.product(product_id) is not None:
+            return False
+        messagebox.showerror(
+            "Σφάλμα",
+            "Το προϊόν διαγράφηκε από άλλο σταθμό - η αλλαγή δεν καταχωρήθηκε."
+        )
+        self.notify('products', 'movements')
+        return True
+    
+    def merge_changes(self, changes):
+        """Εφαρμογή αλλαγών άλλου σταθμού στα δεδομένα της μνήμης
+
+        Ίδια σειρά με τις τοπικές αλλαγές (repo, ledger, backup) και χωρίς I/O:
+        τα υπόλοιπα ενημερώνονται αυξητικά, με το details του change_log για
+        διαγραφές κινήσεων που δεν έχουν φορτωθεί ακόμα.
+        """
+        ops = [(op, payload) for op, payload, details in changes]
+        for op, payload, details in changes:
+            if op in ('add_product', 'update_product'):
+                self.repo.put_product(payload)
+                self.ledger.set_product(payload)
+            elif op == 'delete_product':
+                deleted = self.repo.delete_product(payload)
+                if details is None:
+                    self.ledger.remove_product(payload, deleted)
+                else:
+                    self.ledger.remove_periods(details)
+                    self.ledger.remove_product(payload)
+            elif op == 'add_movement':
+                self.repo.add_movement(payload)
+                self.ledger.add(payload)
+                self.last_movement_id = max(self.last_movement_id, payload['id'])
+            elif op == 'delete_movement':
+                movement = self.repo.delete_movement(payload) or details
+                if movement:
+                    self.ledger.remove(movement)
+            elif op == 'set_categories':
+                self.categories = list(payload)
+                self.update_category_filters()
+        
+        if self.history_ops is not None:
+            self.history_ops.extend(ops)
+        
+        # Ο σταθμός που γράφει τα backups καταγράφει και τις αλλαγές των άλλων
+        self.persister.submit(ops, self.data_counts(), stored=True)
+        
+        kinds = {'add_product': 'products', 'update_product': 'products', 'delete_product': 'products',
+                 'add_movement': 'movements', 'delete_movement': 'movements', 'set_categories': 'categories'}
+        self.notify(*{kinds[op] for op, payload in ops if op in kinds})
+        self.show_notification(f"🔄 {len(changes)} αλλαγές από άλλο σταθμό", "info")
+    
+    def reload_data(self):
+        """Πλήρης επαναφόρτωση (π.χ. μετά από επαναφορά backup σε άλλο σταθμό)"""
+        self.persister.flush()
+        self.load_data()
+        self.auto_backup(full=True)
+        if not self.history_loaded:
+            self.start_history_loader()
+        self.update_category_filters()
+        self.refresh_all()
+        self.show_notification("🔄 Τα δεδομένα ενημερώθηκαν από άλλο σταθμό", "info")
+    
+    def describe_op(self, op, payload):
+        """Περιγραφή μιας λειτουργίας αποθήκευσης για μηνύματα προς τον χρήστη"""
+        if op == 'add_movement':
+            icon = "📥" if payload['type'] == 'in' else "📤"
+            name = self.repo.product_name(payload['product_id'], f"#{payload['product_id']}")
+            return f"{icon} {self.format_number(payload['quantity'])} - {name}"
+        if op in ('add_product', 'update_product'):
+            return f"📦 {payload['name']}"
+        if op == 'replace_all':
+            return "Επαναφορά δεδομένων"
+        return op
+    
+    def undo_rejected(self, rejected):
+        """Αναίρεση στη μνήμη των αλλαγών που απέρριψε η αποθήκευση και ενημέρωση του χρήστη
+
+        Η μνήμη ευθυγραμμίζεται με ό,τι είναι πράγματι αποθηκευμένο: νέες
+        κινήσεις/προϊόντα αφαιρούνται και τα προϊόντα ξαναδιαβάζονται από την
+        αποθήκευση. Για όποια αλλαγή δεν αναιρείται έτσι γίνεται πλήρης
+        επαναφόρτωση.
+        """
+        lines = [f"• {self.describe_op(op, payload)}: {error}" for (op, payload), error in rejected]
+        corrections = []
+        reload = False
+        for (op, payload), error in rejected:
+            if op == 'add_movement':
+                movement = self.repo.delete_movement(payload['id'])
+                if movement:
+                    self.ledger.remove(movement)
+                    corrections.append(('delete_movement', payload['id']))
+            elif op in ('add_product', 'update_product'):
+                stored = self.storage.load_product(payload['id'])
+                if stored is not None:
+                    self.repo.put_product(stored)
+                    self.ledger.set_product(stored)
+                    corrections.append(('update_product', stored))
+                elif op == 'add_product' and self.repo.product(payload['id']) is not None:
+                    deleted = self.repo.delete_product(payload['id'])
+                    self.ledger.remove_product(payload['id'], deleted)
+                    corrections.append(('delete_product', payload['id']))
+                # Προϊόν που διέγραψε άλλος σταθμός: η διαγραφή έρχεται με το poll_remote_changes
+            else:
+                reload = True
+        
+        if self.history_ops is not None:
+            self.history_ops.extend(corrections)
+        if reload:
+            try:
+                self.reload_data()
+            except Exception as e:
+                print(f"Reload error: {type(e).__name__}: {e}")
+        else:
+            self.notify('products', 'movements')
+        
+        messagebox.showwarning(
+            "Αλλαγές που δεν αποθηκεύτηκαν",
+            "Οι παρακάτω αλλαγές απορρίφθηκαν από τη βάση (π.χ. αλλαγή από άλλο σταθμό)\n"
+            "και αναιρέθηκαν:\n\n" + "\n".join(lines[:20])
+            + (f"\n... και {len(lines) - 20} ακόμα" if len(lines) > 20 else "")
+        )
+    
+    def update_save_status(self):
+        """Ένδειξη κατάστασης αποθήκευσης στο status bar"""
+        rejected = self.persister.take_rejected()
+        if rejected:
+            self.undo_rejected(rejected)
+        states = {
+            'saved': ("💾 Αποθηκεύτηκε", self.colors['success']),
+            'unsaved': ("✏️ Μη αποθηκευμένες αλλαγές", self.colors['warning']),
+            'saving': ("⏳ Αποθήκευση...", self.colors['info']),
+            'error': ("✗ Σφάλμα αποθήκευσης", self.colors['danger'])
+        }
+        text, color = states[self.persister.state]
+        if self.save_status.cget('text') != text:
+            self.save_status.config(text=text, fg=color)
+        self.root.after(250, self.update_save_status)
     
     def manual_backup(self):
         """Manual backup with notification"""
         try:
-            self.auto_backup()
+            self.auto_backup(full=True)
+            self.persister.flush()
+            
+            if not self.backups.is_writer:
+                messagebox.showinfo(
+                    "Backup",
+                    "Τα backups δημιουργούνται από τον σταθμό που ξεκίνησε πρώτος\n"
+                    "και περιλαμβάνουν και τις αλλαγές αυτού του σταθμού."
+                )
+                return
             
             # Εμφάνιση λεπτομερειών
-            backup_dir = self.backup_dir
-            backups = sorted(backup_dir.glob("backup_*.json"), reverse=True)
+            backups = self.backups.list_backups()
             
             if backups:
                 latest = backups[0]
-                timestamp_str = latest.stem.replace("backup_", "")
-                dt = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
+                dt = backup_datetime(latest)
                 
                 messagebox.showinfo(
                     "✅ Backup Επιτυχές",
                     f"Το backup ολοκληρώθηκε επιτυχώς!\n\n"
                     f"📁 Αρχείο: {latest.name}\n"
                     f"📅 Ημερομηνία: {dt.strftime('%d/%m/%Y %H:%M:%S')}\n"
-                    f"💾 Μέγεθος: {latest.stat().st_size / 1024:.1f} KB\n\n"
+                    f"💾 Μέγεθος: {self.backups.entry(latest)['size'] / 1024:.1f} KB\n\n"
                     f"📦 Συνολικά backups: {len(backups)}"
                 )
             
@@ -1117,7 +4579,9 @@ class StockManagerPro:
     def restore_backup(self):
         """Restore from backup"""
         try:
-            backups = sorted(self.backup_dir.glob("backup_*.json"), reverse=True)
+            # Ολοκλήρωση εκκρεμών αλλαγών ώστε η λίστα backups να είναι πλήρης
+            self.persister.flush()
+            backups = self.backups.list_backups()
             if not backups:
                 messagebox.showwarning(
                     "Δεν υπάρχουν Backups",
@@ -1128,37 +4592,32 @@ class StockManagerPro:
                 self.show_notification("⚠ Δεν υπάρχουν backups", "warning")
                 return
             
-            dialog = BackupRestoreDialog(self.root, backups)
+            dialog = BackupRestoreDialog(self.root, backups, self.backups)
             if dialog.result:
                 try:
-                    # Διάβασμα backup
-                    with open(dialog.result, 'r', encoding='utf-8-sig') as f:
-                        backup_data = json.load(f)
+                    # Διάβασμα backup (base + deltas μέχρι το επιλεγμένο σημείο)
+                    products, movements, categories = self.backups.load(dialog.result)
+                    unique_product_names(products)
                     
                     # Ενημέρωση δεδομένων
-                    self.products = backup_data.get('products', [])
-                    self.movements = backup_data.get('movements', [])
-                    self.categories = backup_data.get('categories', self.categories)
+                    self.repo = Repository(products, movements)
+                    self.categories = categories or self.categories
+                    self.ledger = StockLedger.from_movements(products, movements)
+                    self.last_movement_id = max((m['id'] for m in movements), default=0)
+                    self.history_ops = None
+                    self.history_loaded = True
                     
                     # Αποθήκευση των δεδομένων
-                    self.save_products()
-                    self.save_movements()
-                    self.save_categories()
+                    self.save_all()
                     
                     # Ενημέρωση του category filter
-                    self.category_filter['values'] = ["Όλες"] + self.categories
+                    self.update_category_filters()
                     self.category_filter.set("Όλες")
                     
                     # Καθαρισμός του search field
                     self.search_var.set("")
                     
-                    # Ανανέωση UI - Διαγραφή όλων των items από τα treeviews
-                    for tree in [self.products_tree, self.movements_tree, 
-                                self.stock_tree, self.most_active_tree]:
-                        for item in tree.get_children():
-                            tree.delete(item)
-                    
-                    # Πλήρης ανανέωση όλων των tabs
+                    # Πλήρης ανανέωση όλων των tabs (οι πίνακες ενημερώνονται με διαφορές)
                     self.refresh_all()
                     
                     # Επαναφορά στο πρώτο tab
@@ -1182,28 +4641,28 @@ class StockManagerPro:
     
     def get_current_stock(self, product_id):
         """Get current stock for a product"""
-        product = next((p for p in self.products if p['id'] == product_id), None)
-        if not product:
-            return 0
-        
-        total_in = sum(m['quantity'] for m in self.movements 
-                      if m['product_id'] == product_id and m['type'] == 'in')
-        total_out = sum(m['quantity'] for m in self.movements 
-                       if m['product_id'] == product_id and m['type'] == 'out')
-        
-        return product['initial_stock'] + total_in - total_out
+        return self.ledger.current(product_id)
     
     # Product Operations (same as before but with notifications)
     
+    def product_name_exists(self, name, exclude_id=None):
+        """Τα ονόματα προϊόντων είναι μοναδικά (UNIQUE στη βάση)"""
+        return any(p['name'] == name and p['id'] != exclude_id for p in self.products)
+    
     def add_product(self):
         dialog = ProductDialog(self.root, "Νέο Προϊόν", categories=self.categories)
         if dialog.result:
-            max_id = max([p['id'] for p in self.products], default=0)
-            dialog.result['id'] = max_id + 1
-            self.products.append(dialog.result)
-            self.save_products()
-            self.refresh_all()
-            # Ενημέρωση όλων των tabs άμεσα
+            # Έλεγχος με τα ονόματα που πρόσθεσαν μόλις άλλοι σταθμοί
+            self.sync_remote_changes()
+            if self.product_name_exists(dialog.result['name']):
+                messagebox.showerror("Σφάλμα", f"Υπάρχει ήδη προϊόν με όνομα '{dialog.result['name']}'!")
+                return
+            dialog.result['id'] = self.storage.allocate_id('products') or max(self.repo.products_by_id, default=0) + 1
+            self.repo.put_product(dialog.result)
+            self.ledger.set_product(dialog.result)
+            self.persist(('add_product', dict(dialog.result)))
+            self.notify('products')
+            # Σχεδίαση του tab που φαίνεται άμεσα
             self.root.update_idletasks()
             self.show_notification(f"✓ Προστέθηκε: {dialog.result['name']}", "success")
     
@@ -1215,16 +4674,25 @@ class StockManagerPro:
         
         # Λήψη του πραγματικού ID από το iid
         product_id = int(selected[0])
-        product = next((p for p in self.products if p['id'] == product_id), None)
+        product = self.repo.product(product_id)
         
         if product:
             dialog = ProductDialog(self.root, "Επεξεργασία", product=product, categories=self.categories)
             if dialog.result:
+                self.sync_remote_changes()
+                if self.product_deleted_remotely(product_id):
+                    return
+                product = self.repo.product(product_id)
+                if self.product_name_exists(dialog.result['name'], exclude_id=product_id):
+                    messagebox.showerror("Σφάλμα", f"Υπάρχει ήδη προϊόν με όνομα '{dialog.result['name']}'!")
+                    return
                 for key, value in dialog.result.items():  # type: ignore
                     product[key] = value
-                self.save_products()
-                self.refresh_all()
-                # Ενημέρωση όλων των tabs άμεσα
+                self.repo.put_product(product)
+                self.ledger.set_product(product)
+                self.persist(('update_product', dict(product)))
+                self.notify('products')
+                # Σχεδίαση του tab που φαίνεται άμεσα
                 self.root.update_idletasks()
                 self.show_notification(f"✓ Ενημερώθηκε: {product['name']}", "success")
     
@@ -1233,9 +4701,9 @@ class StockManagerPro:
         dialog = CategoryDialog(self.root, self.categories)
         if dialog.result:
             self.categories = dialog.result
-            self.save_categories()
-            self.category_filter['values'] = ["Όλες"] + self.categories
-            self.refresh_all()
+            self.persist(('set_categories', list(self.categories)))
+            self.update_category_filters()
+            self.notify('categories')
             self.show_notification("✓ Κατηγορίες ενημερώθηκαν", "success")
     
     def delete_product(self):
@@ -1243,6 +4711,9 @@ class StockManagerPro:
         if not selected:
             self.show_notification("⚠ Επιλέξτε προϊόν", "warning")
             return
+        # Χρειάζονται όλες οι κινήσεις του προϊόντος για τα σύνολα ημέρας/μήνα
+        if not self.ensure_history(self.delete_product):
+            return
         
         item = self.products_tree.item(selected[0])
         # Λήψη του πραγματικού ID από το iid
@@ -1250,12 +4721,11 @@ class StockManagerPro:
         product_name = item['values'][1]
         
         if messagebox.askyesno("Επιβεβαίωση", f"Διαγραφή '{product_name}';"):
-            self.products = [p for p in self.products if p['id'] != product_id]
-            self.movements = [m for m in self.movements if m['product_id'] != product_id]
-            self.save_products()
-            self.save_movements()
-            self.refresh_all()
-            # Ενημέρωση όλων των tabs άμεσα
+            deleted = self.repo.delete_product(product_id)
+            self.ledger.remove_product(product_id, deleted)
+            self.persist(('delete_product', product_id))
+            self.notify('products', 'movements')
+            # Σχεδίαση του tab που φαίνεται άμεσα
             self.root.update_idletasks()
             self.show_notification(f"✓ Διαγράφηκε: {product_name}", "success")
     
@@ -1264,35 +4734,192 @@ class StockManagerPro:
             self.show_notification("⚠ Προσθέστε πρώτα προϊόντα", "warning")
             return
         
-        dialog = MovementDialog(self.root, movement_type, self.products)
+        dialog = MovementDialog(self.root, movement_type, self.products, self.repo.search,
+                                self.resolve_movement_lines)
         if dialog.result:
-            max_id = max([m['id'] for m in self.movements], default=0)
-            dialog.result['id'] = max_id + 1
+            self.sync_remote_changes()
+            if self.product_deleted_remotely(dialog.result['product_id']):
+                return
+            self.last_movement_id = self.storage.allocate_id('movements') or self.last_movement_id + 1
+            dialog.result['id'] = self.last_movement_id
             dialog.result['date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.movements.append(dialog.result)
-            self.save_movements()
-            self.refresh_all()
-            # Ενημέρωση όλων των tabs άμεσα
+            self.repo.add_movement(dialog.result)
+            self.ledger.add(dialog.result)
+            self.persist(('add_movement', dict(dialog.result)))
+            self.notify('movements')
+            # Σχεδίαση του tab που φαίνεται άμεσα
             self.root.update_idletasks()
             
-            product_name = next((p['name'] for p in self.products if p['id'] == dialog.result['product_id']), "")
+            product_name = self.repo.product_name(dialog.result['product_id'], "")
             icon = "📥" if movement_type == "in" else "📤"
             self.show_notification(f"{icon} Καταχωρήθηκε: {product_name}", "success")
     
+    def bulk_movements(self, lines=None):
+        """Μαζική καταχώριση (π.χ. παραλαβή με πολλές γραμμές) - lines: προσυμπληρωμένες γραμμές"""
+        if not self.products:
+            self.show_notification("⚠ Προσθέστε πρώτα προϊόντα", "warning")
+            return
+        
+        dialog = BulkMovementDialog(self.root, "in", self.products, self.repo.search,
+                                    self.resolve_movement_lines, lines)
+        if dialog.result:
+            # Ο διάλογος έχει ήδη ελέγξει τις γραμμές
+            movements, errors = self.add_movements_bulk(dialog.result)
+            if errors:
+                # Π.χ. προϊόν που διέγραψε άλλος σταθμός όσο ήταν ανοιχτός ο διάλογος
+                messagebox.showerror(
+                    "Σφάλμα",
+                    "Δεν καταχωρήθηκε καμία κίνηση:\n\n"
+                    + "\n".join(f"Γραμμή {index + 1}: {message}" for index, message in errors[:20])
+                )
+                self.notify('products', 'movements')
+                return
+            # Σχεδίαση του tab που φαίνεται άμεσα
+            self.root.update_idletasks()
+            self.show_notification(f"📋 Καταχωρήθηκαν {len(movements)} κινήσεις", "success")
+    
+    def scan_barcodes(self):
+        """Barcodes από φάκελο εικόνων στο παρασκήνιο - το αποτέλεσμα ανοίγει στη μαζική καταχώριση"""
+        if self.barcode_batch is not None:
+            self.show_notification("⚠ Εκτελείται ήδη αποκωδικοποίηση barcodes", "warning")
+            return
+        missing = BarcodeBatch.available()
+        if missing:
+            messagebox.showerror(
+                "Λείπει Βιβλιοθήκη",
+                f"Για την ανάγνωση barcodes απαιτούνται: {', '.join(missing)}\n\n"
+                f"Εκτελέστε: pip install {' '.join(missing)}"
+            )
+            return
+        
+        folder = filedialog.askdirectory(title="Φάκελος με εικόνες barcodes")
+        if not folder:
+            return
+        
+        batch = BarcodeBatch(folder)
+        if not batch.files:
+            self.show_notification("⚠ Δεν βρέθηκαν εικόνες στον φάκελο", "warning")
+            return
+        self.barcode_batch = batch
+        self.poll_barcodes()
+    
+    def poll_barcodes(self):
+        batch = self.barcode_batch
+        if not batch.finished():
+            average = batch.latency()[0]
+            self.barcode_status.config(
+                text=f"📷 Barcodes: {len(batch.results)}/{len(batch.files)} εικόνες · {average:.0f} ms/εικόνα  ✗ Ακύρωση"
+            )
+            self.root.after(200, self.poll_barcodes)
+            return
+        
+        self.barcode_batch = None
+        self.barcode_status.config(text="")
+        if batch.cancelled.is_set():
+            self.show_notification("⚠ Ακυρώθηκε η ανάγνωση barcodes", "warning")
+            return
+        
+        average, p95, slowest = batch.latency()
+        failed = [result for result in batch.results if result[3] is not None]
+        empty = sum(1 for result in batch.results if not result[1] and result[3] is None)
+        lines = batch.lines(self.repo.search)
+        unknown = sum(1 for line in lines if self.repo.search.by_code(line['product']) is None)
+        slow = sorted(batch.results, key=lambda result: result[2], reverse=True)[:5]
+        messagebox.showinfo(
+            "📷 Barcodes",
+            f"Εικόνες: {len(batch.files)} (χωρίς barcode: {empty}, σφάλματα: {len(failed)})\n"
+            f"Κωδικοί: {len(lines)} (άγνωστοι: {unknown})\n\n"
+            f"Χρόνος ανά εικόνα: μέσος {average:.0f} ms · p95 {p95:.0f} ms · μέγιστος {slowest:.0f} ms\n"
+            + "".join(f"  {path.name}: {ms:.0f} ms\n" for path, _, ms, _ in slow)
+        )
+        if lines:
+            self.bulk_movements(lines)
+    
+    def resolve_movement_lines(self, lines):
+        """Έλεγχος γραμμών μαζικής καταχώρισης - (κινήσεις, λάθη [(θέση γραμμής, μήνυμα)])
+
+        Το προϊόν δίνεται με product_id ή με product: κωδικός ή όνομα (χωρίς
+        διάκριση τόνων/πεζών-κεφαλαίων), από το ευρετήριο αναζήτησης.
+        """
+        names = None
+        movements, errors = [], []
+        for index, line in enumerate(lines):
+            product_id = line.get('product_id')
+            if product_id is None:
+                text = str(line.get('product') or '').strip()
+                if not text:
+                    errors.append((index, "Λείπει το προϊόν"))
+                    continue
+                product_id = self.repo.search.by_code(text)
+                if product_id is None:
+                    if names is None:
+                        names = {ProductSearchIndex.collation_key(p['name']): p['id'] for p in self.products}
+                    product_id = names.get(ProductSearchIndex.collation_key(text))
+            if self.repo.product(product_id) is None:
+                errors.append((index, f"Άγνωστο προϊόν: {line.get('product', product_id)}"))
+                continue
+            if line.get('type') not in ('in', 'out'):
+                errors.append((index, "Μη έγκυρος τύπος κίνησης"))
+                continue
+            try:
+                quantity = float(str(line.get('quantity')).replace(',', '.'))
+            except ValueError:
+                quantity = math.nan
+            if not (math.isfinite(quantity) and quantity > 0):
+                errors.append((index, "Μη έγκυρη ποσότητα"))
+                continue
+            movements.append({
+                'product_id': product_id,
+                'type': line['type'],
+                'quantity': int(quantity) if quantity.is_integer() else quantity,
+                'notes': str(line.get('notes') or '').strip()
+            })
+        return movements, errors
+    
+    def add_movements_bulk(self, movements):
+        """Καταχώριση πολλών κινήσεων ως μία παρτίδα - (κινήσεις, λάθη)
+
+        Οι κινήσεις έρχονται ήδη ελεγμένες (resolve_movement_lines) - μετά τις
+        αλλαγές άλλων σταθμών ελέγχεται μόνο αν τα προϊόντα υπάρχουν ακόμα, και
+        αν κάποιο λείπει δεν καταχωρείται καμία. Τα ids δεσμεύονται μαζί και οι
+        κινήσεις υποβάλλονται στο persister μαζί (μία συναλλαγή, ένα backup), με
+        μία ανανέωση στο τέλος.
+        """
+        self.sync_remote_changes()
+        errors = [
+            (index, "Το προϊόν διαγράφηκε από άλλο σταθμό")
+            for index, m in enumerate(movements) if self.repo.product(m['product_id']) is None
+        ]
+        if errors or not movements:
+            return [], errors
+        
+        first_id = self.storage.allocate_id('movements', len(movements)) or self.last_movement_id + 1
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for offset, m in enumerate(movements):
+            m['id'] = first_id + offset
+            m['date'] = date
+            self.repo.add_movement(m)
+            self.ledger.add(m)
+        self.last_movement_id = movements[-1]['id']
+        self.persist(*[('add_movement', dict(m)) for m in movements])
+        self.notify('movements')
+        return movements, []
+    
     def delete_movement(self):
         selected = self.movements_tree.selection()
         if not selected:
             self.show_notification("⚠ Επιλέξτε κίνηση", "warning")
             return
         
-        item = self.movements_tree.item(selected[0])
-        movement_id = int(item['values'][0])
+        movement_id = int(selected[0])
         
         if messagebox.askyesno("Επιβεβαίωση", "Διαγραφή κίνησης;"):
-            self.movements = [m for m in self.movements if m['id'] != movement_id]
-            self.save_movements()
-            self.refresh_all()
-            # Ενημέρωση όλων των tabs άμεσα
+            movement = self.repo.delete_movement(movement_id)
+            if movement:
+                self.ledger.remove(movement)
+            self.persist(('delete_movement', movement_id))
+            self.notify('movements')
+            # Σχεδίαση του tab που φαίνεται άμεσα
             self.root.update_idletasks()
             self.show_notification("✓ Διαγράφηκε", "success")
     
@@ -1308,34 +4935,27 @@ class StockManagerPro:
         return str(num)
     
     def refresh_products(self):
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        
-        search_term = self.search_var.get().lower()
         category_filter = self.category_filter.get() if hasattr(self, 'category_filter') else "Όλες"
         
-        # Sort products alphabetically by name
-        sorted_products = sorted(self.products, key=lambda x: x['name'].lower())
+        # Αναζήτηση από το ευρετήριο, με σειρά ονόματος
+        matches = self.repo.search.search(self.search_var.get())
         
-        display_idx = 0
-        for idx, p in enumerate(sorted_products):
-            # Search filter
-            if search_term and search_term not in p['name'].lower() and search_term not in str(p.get('code', '')).lower():
-                continue
+        rows = []
+        for product_id in self.repo.search.ordered(matches):
+            p = self.repo.product(product_id)
             
             # Category filter
             if category_filter != "Όλες" and p.get('category', '⚡ Άλλο') != category_filter:
                 continue
             
-            display_idx += 1
             current_stock = self.get_current_stock(p['id'])
-            status = "⚠️ ΧΑΜΗΛΟ" if current_stock < p['min_limit'] else "✓ OK"
-            tag = "low" if current_stock < p['min_limit'] else "ok"
-            row_tag = "evenrow" if display_idx % 2 == 0 else "oddrow"
+            low = current_stock < p['min_limit']
+            status = "⚠️ ΧΑΜΗΛΟ" if low else "✓ OK"
+            tag = "low" if low else "ok"
             
             # Χρήση του πραγματικού ID σαν iid για να το ανακτήσουμε αργότερα
-            self.products_tree.insert("", tk.END, iid=str(p['id']), values=(
-                display_idx,
+            rows.append((str(p['id']), (
+                len(rows) + 1,
                 p['name'],
                 p.get('category', '⚡ Άλλο'),
                 p.get('code', ''),
@@ -1343,70 +4963,76 @@ class StockManagerPro:
                 self.format_number(p['min_limit']),
                 self.format_number(current_stock),
                 status
-            ), tags=(tag, row_tag))
+            ), (tag,), (
+                len(rows) + 1,
+                ProductSearchIndex.collation_key(p['name']),
+                ProductSearchIndex.collation_key(p.get('category', '⚡ Άλλο')),
+                ProductSearchIndex.collation_key(p.get('code', '')),
+                p['initial_stock'],
+                p['min_limit'],
+                current_stock,
+                low
+            )))
+        
+        self.reconcile_treeview(self.products_tree, rows)
     
     def refresh_movements(self):
-        for item in self.movements_tree.get_children():
-            self.movements_tree.delete(item)
+        if not self.history_loaded:
+            # Στη μνήμη υπάρχουν μόνο οι τελευταίες κινήσεις - όχι μισά αποτελέσματα φίλτρων
+            self.movements_tree.set_rows([])
+            self.movements_tree.set_message("⏳ Φόρτωση ιστορικού κινήσεων...")
+            return
+        self.movements_tree.set_message(None)
         
         filter_val = self.movement_filter.get() if hasattr(self, 'movement_filter') else "Όλες"
         today = datetime.now().date()
         week_ago = today - timedelta(days=7)
         
-        # Create list with product names for sorting
-        movements_with_names = []
-        for m in self.movements:
-            product_name = next((p['name'] for p in self.products if p['id'] == m['product_id']), "Άγνωστο")
-            movements_with_names.append((m, product_name))
+        # Φίλτρα ημερομηνίας από το date index - μόνο ids, οι τιμές διαβάζονται στη σχεδίαση
+        if filter_val == "Σήμερα":
+            ids = self.repo.movement_ids_between(today.isoformat(), today.isoformat())
+        elif filter_val == "Τελευταία 7 ημέρες":
+            ids = self.repo.movement_ids_between(week_ago.isoformat(), "9999-12-31")
+        elif filter_val == "Εισαγωγές":
+            ids = self.repo.movements.ids_where(movement_type='in')
+        elif filter_val == "Εξαγωγές":
+            ids = self.repo.movements.ids_where(movement_type='out')
+        else:
+            ids = None
         
-        # Sort alphabetically by product name
-        movements_with_names.sort(key=lambda x: x[1].lower())
+        # Αλφαβητικά κατά όνομα προϊόντος: ομάδες ανά προϊόν με τη σειρά του ευρετηρίου
+        groups = self.repo.movements.ids_by_product(ids)
+        rows = [movement_id for product_id in self.repo.search.ordered() for movement_id in groups.pop(product_id, ())]
+        # Κινήσεις χωρίς προϊόν στο τέλος
+        for movement_ids in groups.values():
+            rows.extend(movement_ids)
         
-        display_idx = 0
-        for m, product_name in movements_with_names:
-            # Apply filters
-            if filter_val == "Εισαγωγές" and m['type'] != 'in':
-                continue
-            if filter_val == "Εξαγωγές" and m['type'] != 'out':
-                continue
-            
-            m_date = datetime.strptime(m['date'].split()[0], "%Y-%m-%d").date()
-            if filter_val == "Σήμερα" and m_date != today:
-                continue
-            if filter_val == "Τελευταία 7 ημέρες" and m_date < week_ago:
-                continue
-            
-            type_text = "📥 Εισαγωγή" if m['type'] == 'in' else "📤 Εξαγωγή"
-            display_idx += 1
-            row_tag = "evenrow" if display_idx % 2 == 0 else "oddrow"
-            
-            self.movements_tree.insert("", tk.END, values=(
-                m['id'],
-                m['date'],
-                product_name,
-                type_text,
-                self.format_number(m['quantity']),
-                m.get('notes', '')
-            ), tags=(row_tag,))
+        self.movements_tree.set_rows(rows)
+    
+    def movement_row(self, movement_id):
+        """Τιμές μιας γραμμής του πίνακα κινήσεων (καλείται μόνο για τις ορατές)"""
+        m = self.repo.movement(movement_id)
+        if m is None:
+            return (movement_id, "", "", "", "", ""), ()
+        type_text = "📥 Εισαγωγή" if m['type'] == 'in' else "📤 Εξαγωγή"
+        return (
+            m['id'],
+            m['date'],
+            self.repo.product_name(m['product_id']),
+            type_text,
+            self.format_number(m['quantity']),
+            m.get('notes', '')
+        ), ()
     
     def refresh_stock(self):
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-        
         filter_val = self.stock_filter.get() if hasattr(self, 'stock_filter') else "Όλα"
         
         # Sort products alphabetically by name
-        sorted_products = sorted(self.products, key=lambda x: x['name'].lower())
-        
-        display_idx = 0
-        for p in sorted_products:
-            product_id = p['id']
-            total_in = sum(m['quantity'] for m in self.movements 
-                          if m['product_id'] == product_id and m['type'] == 'in')
-            total_out = sum(m['quantity'] for m in self.movements 
-                           if m['product_id'] == product_id and m['type'] == 'out')
+        rows = []
+        for product_id in self.repo.search.ordered():
+            p = self.repo.product(product_id)
+            total_in, total_out = self.ledger.totals(product_id)
             current_stock = p['initial_stock'] + total_in - total_out
-            status = "⚠️ ΧΑΜΗΛΟ" if current_stock < p['min_limit'] else "✓ OK"
             
             # Apply filter
             if filter_val == "Μόνο Χαμηλά" and current_stock >= p['min_limit']:
@@ -1414,31 +5040,33 @@ class StockManagerPro:
             if filter_val == "Μόνο OK" and current_stock < p['min_limit']:
                 continue
             
-            display_idx += 1
-            tag = "low" if current_stock < p['min_limit'] else "ok"
-            row_tag = "evenrow" if display_idx % 2 == 0 else "oddrow"
-            
-            self.stock_tree.insert("", tk.END, values=(
-                p['name'],
-                p.get('code', ''),
-                self.format_number(p['initial_stock']),
-                self.format_number(total_in),
-                self.format_number(total_out),
-                self.format_number(current_stock),
-                self.format_number(p['min_limit']),
-                status
-            ), tags=(tag, row_tag))
+            rows.append((p, total_in, total_out, current_stock))
+        
+        self.stock_tree.set_rows(rows)
     
-    def refresh_dashboard(self):
-        """Refresh dashboard statistics"""
-        # Stats
+    def stock_row(self, row):
+        p, total_in, total_out, current_stock = row
+        low = current_stock < p['min_limit']
+        return (
+            p['name'],
+            p.get('code', ''),
+            self.format_number(p['initial_stock']),
+            self.format_number(total_in),
+            self.format_number(total_out),
+            self.format_number(current_stock),
+            self.format_number(p['min_limit']),
+            "⚠️ ΧΑΜΗΛΟ" if low else "✓ OK"
+        ), ("low" if low else "ok",)
+    
+    def refresh_stats(self):
+        """Τίτλος παραθύρου και στατιστικά της πάνω μπάρας (φαίνονται σε όλα τα tabs)
+
+        Επιστρέφει (προϊόντα, χαμηλά, κινήσεις) για το dashboard.
+        """
+        # Μετρητές του ledger - χωρίς πέρασμα των προϊόντων
         total_products = len(self.products)
-        low_stock = sum(1 for p in self.products if self.get_current_stock(p['id']) < p['min_limit'])
-        total_movements = len(self.movements)
-        
-        today = datetime.now().date()
-        movements_today = sum(1 for m in self.movements 
-                             if datetime.strptime(m['date'].split()[0], "%Y-%m-%d").date() == today)
+        low_stock = len(self.ledger.low)
+        total_movements = self.ledger.movement_count
         
         # Update window title with live stats
         self.root.title(f"Stock Manager Pro - {total_products} Προϊόντα | {low_stock} Χαμηλά | {total_movements} Κινήσεις")
@@ -1447,35 +5075,60 @@ class StockManagerPro:
         self.stat_products.value_label.config(text=str(int(total_products)))  # type: ignore
         self.stat_low.value_label.config(text=str(int(low_stock)))  # type: ignore
         self.stat_movements.value_label.config(text=str(int(total_movements)))  # type: ignore
+        return total_products, low_stock, total_movements
+    
+    def refresh_dashboard(self):
+        """Refresh dashboard statistics"""
+        # Stats (μετρητές του ledger, O(1))
+        total_products, low_stock, total_movements = self.refresh_stats()
+        movements_today = self.ledger.period(self.today.isoformat())[2]
         
         # Update cards
         self.card_total.value_label.config(text=str(int(total_products)))  # type: ignore
-        self.card_stock_value.value_label.config(text=str(int(sum(self.get_current_stock(p['id']) for p in self.products))))  # type: ignore
+        self.card_stock_value.value_label.config(text=str(int(self.ledger.stock_total)))  # type: ignore
         self.card_low_stock.value_label.config(text=str(int(low_stock)))  # type: ignore
         self.card_movements_today.value_label.config(text=str(int(movements_today)))  # type: ignore
         
-        # Recent activity
-        for item in self.activity_tree.get_children():
-            self.activity_tree.delete(item)
-        
-        for m in list(reversed(self.movements))[:10]:
-            product_name = next((p['name'] for p in self.products if p['id'] == m['product_id']), "Άγνωστο")
+        # Recent activity - οι 10 τελευταίες γραμμές των στηλών (ταξινομημένες κατά id)
+        rows = []
+        for m in self.repo.movements.last(10):
+            product_name = self.repo.product_name(m['product_id'])
             type_text = "📥 Εισαγωγή" if m['type'] == 'in' else "📤 Εξαγωγή"
             
-            self.activity_tree.insert("", tk.END, values=(
+            rows.append((str(m['id']), (
                 m['date'],
                 product_name,
                 type_text,
                 self.format_number(m['quantity'])
-            ))
+            ), (), (
+                (self.repo.movements.time_of(m['id']), m['id']),
+                ProductSearchIndex.collation_key(product_name),
+                m['type'],
+                m['quantity']
+            )))
+        self.reconcile_treeview(self.activity_tree, rows)
     
     def refresh_all(self):
-        self.refresh_products()
-        self.refresh_movements()
-        self.refresh_history()
-        self.refresh_stock()
-        self.refresh_dashboard()
-        self.refresh_reports()
+        """Ανανέωση μετά από αλλαγή όλων των δεδομένων (επαναφορά, φόρτωση ιστορικού κτλ)"""
+        self.notify('products', 'movements', 'categories')
+    
+    def notify(self, *changes):
+        """Δημοσίευση αλλαγής δεδομένων ('products', 'movements', 'categories', 'day')
+
+        Τα views που εξαρτώνται από αυτά σημειώνονται ως dirty. Ανανεώνεται
+        αμέσως μόνο το tab που φαίνεται, τα υπόλοιπα όταν επιλεγούν.
+        """
+        for view, dependencies in self.VIEW_DEPENDENCIES.items():
+            if dependencies.intersection(changes):
+                self.dirty_views.add(view)
+        self.refresh_stats()
+        self.refresh_visible()
+    
+    def refresh_visible(self):
+        view = self.view_tabs.get(self.notebook.select())
+        if view in self.dirty_views:
+            self.dirty_views.discard(view)
+            getattr(self, f"refresh_{view}")()
     
     def refresh_reports(self):
         """Refresh reports tab"""
@@ -1484,7 +5137,7 @@ class StockManagerPro:
         
         # Basic stats
         total_products = len(self.products)
-        total_movements = len(self.movements)
+        total_movements = self.ledger.movement_count
         
         # Calculate stock value (if products have price)
         stock_value = sum(
@@ -1496,82 +5149,75 @@ class StockManagerPro:
         self.report_total_movements.value_label.config(text=str(int(total_movements)))  # type: ignore
         self.report_stock_value.value_label.config(text=f"{stock_value:.2f} €" if stock_value > 0 else "Χωρίς τιμές")  # type: ignore
         
-        # Most active products
-        for item in self.most_active_tree.get_children():
-            self.most_active_tree.delete(item)
-        
-        product_activity = []
-        for p in self.products:
-            total_in = sum(m['quantity'] for m in self.movements 
-                          if m['product_id'] == p['id'] and m['type'] == 'in')
-            total_out = sum(m['quantity'] for m in self.movements 
-                           if m['product_id'] == p['id'] and m['type'] == 'out')
-            total_moves = total_in + total_out
-            product_activity.append((p['name'], total_moves, total_in, total_out))
-        
-        # Sort by activity
-        product_activity.sort(key=lambda x: x[1], reverse=True)
-        
-        for name, total, ins, outs in product_activity[:5]:
-            self.most_active_tree.insert("", tk.END, values=(
-                name,
-                self.format_number(total),
-                self.format_number(ins),
-                self.format_number(outs)
-            ))
-        
-        # Least active products
-        for item in self.least_active_tree.get_children():
-            self.least_active_tree.delete(item)
-        
-        for name, total, ins, outs in product_activity[-5:]:
-            self.least_active_tree.insert("", tk.END, values=(
-                name,
-                self.format_number(total),
-                self.format_number(ins),
-                self.format_number(outs)
-            ))
-        
-        # Monthly summary
-        for item in self.monthly_tree.get_children():
-            self.monthly_tree.delete(item)
-        
-        monthly_data = {}
-        for m in self.movements:
-            try:
-                date = datetime.strptime(m['date'].split()[0], "%Y-%m-%d")
-                month_key = date.strftime("%Y-%m")
-                month_name = date.strftime("%m/%Y")
-                
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = {'name': month_name, 'in': 0, 'out': 0, 'total': 0}
-                
-                if m['type'] == 'in':
-                    monthly_data[month_key]['in'] += m['quantity']
-                else:
-                    monthly_data[month_key]['out'] += m['quantity']
-                monthly_data[month_key]['total'] += 1
-            except:
-                pass
-        
-        for month_key in sorted(monthly_data.keys(), reverse=True)[:12]:
-            data = monthly_data[month_key]
-            self.monthly_tree.insert("", tk.END, values=(
-                data['name'],
-                self.format_number(data['in']),
-                self.format_number(data['out']),
-                self.format_number(data['total'])
-            ))
+        # Most / least active products (από την κατάταξη του ledger)
+        k = int(self.activity_k.get())
+        category = self.activity_category.get()
+        category = None if category == "Όλες" else category
+        self.most_active_frame.config(text=f"🔥 Πιο Ενεργά Προϊόντα (Top {k})")
+        self.least_active_frame.config(text=f"💤 Λιγότερο Ενεργά Προϊόντα (Top {k})")
+        
+        ranking = self.activity_ranking(self.ACTIVITY_WINDOWS[self.activity_window.get()])
+        for tree, rows in ((self.most_active_tree, ranking.top(k, category) if ranking else []),
+                           (self.least_active_tree, ranking.bottom(k, category) if ranking else [])):
+            self.reconcile_treeview(tree, [
+                (str(product_id), (
+                    self.repo.product_name(product_id),
+                    self.format_number(ins + outs),
+                    self.format_number(ins),
+                    self.format_number(outs)
+                ), (), (
+                    ProductSearchIndex.collation_key(self.repo.product_name(product_id)),
+                    ins + outs,
+                    ins,
+                    outs
+                ))
+                for product_id, ins, outs in rows
+            ])
+        
+        # Monthly summary - από τα σύνολα ανά μήνα του ledger, χωρίς διάβασμα των κινήσεων
+        rows = []
+        for month_key, total_in, total_out, count in self.ledger.months(12):
+            year, month = month_key.split('-')
+            rows.append((month_key, (
+                f"{month}/{year}",
+                self.format_number(total_in),
+                self.format_number(total_out),
+                self.format_number(count)
+            ), (), (month_key, total_in, total_out, count)))
+        self.reconcile_treeview(self.monthly_tree, rows)
+    
+    def activity_ranking(self, days):
+        """Κατάταξη δραστηριότητας για όλο το ιστορικό (days=None) ή τις τελευταίες days ημέρες
+
+        Η κατάταξη παραθύρου χτίζεται από το date index την πρώτη φορά και
+        μετά ενημερώνεται από το ledger - None όσο φορτώνεται το ιστορικό.
+        """
+        if not days:
+            return self.ledger.activity
+        today = datetime.now().date()
+        ranking = self.ledger.windows.get(days)
+        if ranking is None:
+            if not self.history_loaded:
+                return None
+            movements = self.repo.movements_between(ActivityRanking.window_start(today, days), "9999-12-31")
+            ranking = ActivityRanking(self.products, days=days, today=today, movements=movements)
+            self.ledger.windows[days] = ranking
+        elif ranking.today != today:
+            ranking.advance(today)
+        return ranking
+    
+    def update_category_filters(self):
+        """Οι λίστες κατηγοριών των φίλτρων μετά από αλλαγή των κατηγοριών"""
+        self.category_filter['values'] = ["Όλες"] + self.categories
+        self.activity_category['values'] = ["Όλες"] + self.categories
+        if self.activity_category.get() not in self.categories:
+            self.activity_category.set("Όλες")
     
     def refresh_history(self):
         """Refresh history tab with date filters"""
         if not hasattr(self, 'history_tree'):
             return
         
-        # Clear existing data
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-        
         # Get date range
         try:
             from_date_str = self.history_from_date.get()
@@ -1583,90 +5229,95 @@ class StockManagerPro:
             messagebox.showerror("Σφάλμα", "Μη έγκυρη μορφή ημερομηνίας!\nΧρησιμοποιήστε: YYYY-MM-DD")
             return
         
-        # Filter movements by date
-        filtered_movements = []
-        for m in self.movements:
-            try:
-                movement_date = datetime.strptime(m['date'].split()[0], "%Y-%m-%d")
-                if from_date <= movement_date <= to_date:
-                    filtered_movements.append(m)
-            except:
-                pass
-        
-        # Sort by date (newest first)
-        filtered_movements.sort(key=lambda x: x['date'], reverse=True)
-        
-        # Statistics
-        total_in = sum(m['quantity'] for m in filtered_movements if m['type'] == 'in')
-        total_out = sum(m['quantity'] for m in filtered_movements if m['type'] == 'out')
-        
-        # Display data
-        for i, m in enumerate(filtered_movements):
-            product = next((p for p in self.products if p['id'] == m['product_id']), None)
-            if product:
-                date_parts = m['date'].split()
-                date_str = date_parts[0] if date_parts else m['date']
-                time_str = date_parts[1] if len(date_parts) > 1 else "-"
-                
-                type_display = "📥 Εισαγωγή" if m['type'] == 'in' else "📤 Εξαγωγή"
-                
-                tag = "evenrow" if i % 2 == 0 else "oddrow"
-                
-                self.history_tree.insert("", tk.END, values=(
-                    m['id'],
-                    date_str,
-                    time_str,
-                    product['name'],
-                    product.get('category', '-'),
-                    type_display,
-                    self.format_number(m['quantity']),
-                    m.get('notes', '')
-                ), tags=(tag,))
+        # Κινήσεις της περιόδου από το date index (newest first) και σύνολα από τα ημερήσια του ledger
+        # (τα σύνολα υπάρχουν από την εκκίνηση, οι κινήσεις μόλις φορτωθεί το ιστορικό)
+        from_day, to_day = from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d")
+        if self.history_loaded:
+            self.history_tree.set_rows(self.repo.movement_ids_between(from_day, to_day, newest_first=True))
+            self.history_tree.set_message(None)
+        else:
+            self.history_tree.set_rows([])
+            self.history_tree.set_message("⏳ Φόρτωση ιστορικού κινήσεων...")
+        total_in, total_out, count = self.ledger.days_between(from_day, to_day)
         
         # Update summary
         self.history_summary_label.config(
-            text=f"📊 Σύνολο κινήσεων: {len(filtered_movements)} | "
+            text=f"📊 Σύνολο κινήσεων: {count} | "
                  f"📥 Εισαγωγές: {self.format_number(total_in)} | "
                  f"📤 Εξαγωγές: {self.format_number(total_out)} | "
                  f"📅 Περίοδος: {from_date_str} έως {to_date_str}"
         )
     
-    def export_history_to_excel(self):
-        """Export history to Excel file"""
+    def history_row(self, movement_id):
+        """Τιμές μιας γραμμής του ημερολογίου (καλείται μόνο για τις ορατές)"""
+        m = self.repo.movement(movement_id)
+        if m is None:
+            return (movement_id, "", "", "", "", "", "", ""), ()
+        product = self.repo.product(m['product_id']) or {}
+        date_parts = m['date'].split()
+        date_str = date_parts[0] if date_parts else m['date']
+        time_str = date_parts[1] if len(date_parts) > 1 else "-"
+        type_display = "📥 Εισαγωγή" if m['type'] == 'in' else "📤 Εξαγωγή"
+        return (
+            m['id'],
+            date_str,
+            time_str,
+            product.get('name', '-'),
+            product.get('category', '-'),
+            type_display,
+            self.format_number(m['quantity']),
+            m.get('notes', '')
+        ), ()
+    
+    def history_period(self):
+        """Η περίοδος του ημερολογίου ("YYYY-MM-DD", "YYYY-MM-DD") ή None αν δεν είναι έγκυρη"""
         try:
             from_date_str = self.history_from_date.get()
             to_date_str = self.history_to_date.get()
             
-            from_date = datetime.strptime(from_date_str, "%Y-%m-%d")
-            to_date = datetime.strptime(to_date_str, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+            datetime.strptime(from_date_str, "%Y-%m-%d")
+            datetime.strptime(to_date_str, "%Y-%m-%d")
         except:
             messagebox.showerror("Σφάλμα", "Μη έγκυρη μορφή ημερομηνίας!")
-            return
-        
-        # Filter and prepare data
-        filtered_movements = []
-        for m in self.movements:
-            try:
-                movement_date = datetime.strptime(m['date'].split()[0], "%Y-%m-%d")
-                if from_date <= movement_date <= to_date:
-                    product = next((p for p in self.products if p['id'] == m['product_id']), None)
-                    if product:
-                        date_parts = m['date'].split()
-                        filtered_movements.append({
-                            'ID': m['id'],
-                            'Ημερομηνία': date_parts[0] if date_parts else m['date'],
-                            'Ώρα': date_parts[1] if len(date_parts) > 1 else "-",
-                            'Προϊόν': product['name'],
-                            'Κατηγορία': product.get('category', '-'),
-                            'Τύπος': 'Εισαγωγή' if m['type'] == 'in' else 'Εξαγωγή',
-                            'Ποσότητα': m['quantity'],
-                            'Σημειώσεις': m.get('notes', '')
-                        })
-            except:
-                pass
-        
-        if not filtered_movements:
+            return None
+        return from_date_str, to_date_str
+    
+    def history_snapshot(self, from_date_str, to_date_str):
+        """Στιγμιότυπο του ημερολογίου για εξαγωγή (με το πλήρες ιστορικό) - None αν δεν υπάρχουν κινήσεις"""
+        ids = self.repo.movement_ids_between(from_date_str, to_date_str)
+        if not ids:
             messagebox.showwarning("Προσοχή", "Δεν βρέθηκαν κινήσεις για την επιλεγμένη περίοδο!")
+            return None
+        return {
+            'ids': ids,
+            'movements': self.repo.movements.snapshot(),
+            'products': {p['id']: (p['name'], p.get('category', '-')) for p in self.products},
+            'period': (from_date_str, to_date_str)
+        }
+    
+    @staticmethod
+    def history_rows(job, snapshot):
+        """(κίνηση, όνομα, κατηγορία) των κινήσεων του snapshot με γνωστό προϊόν"""
+        ids, movements, products = snapshot['ids'], snapshot['movements'], snapshot['products']
+        rows = []
+        for i, movement_id in enumerate(ids):
+            if i % 1000 == 0:
+                job.progress(i, len(ids) * 2)
+            m = movements.movement(movement_id)
+            if m['product_id'] in products:
+                rows.append((m, *products[m['product_id']]))
+        return rows
+    
+    def export_history_to_excel(self):
+        """Export history to Excel file"""
+        if not self.ensure_history(self.export_history_to_excel):
+            return
+        period = self.history_period()
+        if period is None:
+            return
+        from_date_str, to_date_str = period
+        snapshot = self.history_snapshot(from_date_str, to_date_str)
+        if snapshot is None:
             return
         
         # Ask for save location
@@ -1677,48 +5328,52 @@ class StockManagerPro:
         )
         
         if filename:
-            try:
-                df = pd.DataFrame(filtered_movements)
-                df.to_excel(filename, index=False, sheet_name="Ιστορικό Κινήσεων")
-                
+            def done(job):
                 messagebox.showinfo(
                     "✅ Επιτυχής Εξαγωγή",
                     f"Το ιστορικό εξήχθη επιτυχώς!\n\n"
-                    f"📁 Αρχείο: {Path(filename).name}\n"
-                    f"📊 Κινήσεις: {len(filtered_movements)}\n"
+                    f"📁 Αρχείο: {Path(job.filename).name}\n"
+                    f"📊 Κινήσεις: {job.result}\n"
                     f"📅 Περίοδος: {from_date_str} - {to_date_str}"
-                )
-                self.show_notification("✓ Εξαγωγή σε Excel ολοκληρώθηκε", "success")
-            except Exception as e:
-                messagebox.showerror("Σφάλμα", f"Αποτυχία εξαγωγής:\n{e}")
-                self.show_notification(f"✗ Σφάλμα εξαγωγής: {e}", "error")
-    
-    def export_history_to_pdf(self):
-        """Export history to PDF file"""
-        try:
-            from_date_str = self.history_from_date.get()
-            to_date_str = self.history_to_date.get()
-            
-            from_date = datetime.strptime(from_date_str, "%Y-%m-%d")
-            to_date = datetime.strptime(to_date_str, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
-        except:
-            messagebox.showerror("Σφάλμα", "Μη έγκυρη μορφή ημερομηνίας!")
-            return
+                )
+                self.show_notification("✓ Εξαγωγή σε Excel ολοκληρώθηκε", "success")
+            
+            self.submit_export("Ιστορικό Excel", filename, self.write_history_excel, snapshot, done)
+    
+    @classmethod
+    def write_history_excel(cls, job, snapshot, filename):
+        import pandas as pd
         
-        # Filter movements
         filtered_movements = []
-        for m in self.movements:
-            try:
-                movement_date = datetime.strptime(m['date'].split()[0], "%Y-%m-%d")
-                if from_date <= movement_date <= to_date:
-                    product = next((p for p in self.products if p['id'] == m['product_id']), None)
-                    if product:
-                        filtered_movements.append((m, product))
-            except:
-                pass
-        
-        if not filtered_movements:
-            messagebox.showwarning("Προσοχή", "Δεν βρέθηκαν κινήσεις για την επιλεγμένη περίοδο!")
+        for m, name, category in cls.history_rows(job, snapshot):
+            date_parts = (m['date'] or '').split()
+            filtered_movements.append({
+                'ID': m['id'],
+                'Ημερομηνία': date_parts[0] if date_parts else m['date'],
+                'Ώρα': date_parts[1] if len(date_parts) > 1 else "-",
+                'Προϊόν': name,
+                'Κατηγορία': category,
+                'Τύπος': 'Εισαγωγή' if m['type'] == 'in' else 'Εξαγωγή',
+                'Ποσότητα': m['quantity'],
+                'Σημειώσεις': m.get('notes', '')
+            })
+        
+        job.progress(job.total * 3 // 4)
+        df = pd.DataFrame(filtered_movements)
+        df.to_excel(filename, index=False, sheet_name="Ιστορικό Κινήσεων")
+        job.progress(job.total)
+        return len(filtered_movements)
+    
+    def export_history_to_pdf(self):
+        """Export history to PDF file"""
+        if not self.ensure_history(self.export_history_to_pdf):
+            return
+        period = self.history_period()
+        if period is None:
+            return
+        from_date_str, to_date_str = period
+        snapshot = self.history_snapshot(from_date_str, to_date_str)
+        if snapshot is None:
             return
         
         # Ask for save location
@@ -1729,128 +5384,168 @@ class StockManagerPro:
         )
         
         if filename:
-            try:
-                from reportlab.lib import colors
-                from reportlab.lib.pagesizes import A4, landscape
-                from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                from reportlab.lib.units import inch
-                from reportlab.pdfbase import pdfmetrics
-                from reportlab.pdfbase.ttfonts import TTFont
-                
-                # Create PDF
-                doc = SimpleDocTemplate(filename, pagesize=landscape(A4))
-                elements = []
-                
-                # Styles
-                styles = getSampleStyleSheet()
-                title_style = ParagraphStyle(
-                    'CustomTitle',
-                    parent=styles['Heading1'],
-                    fontSize=16,
-                    textColor=colors.HexColor('#2c3e50'),
-                    spaceAfter=30,
-                    alignment=1  # Center
-                )
-                
-                # Title
-                elements.append(Paragraph("ΙΣΤΟΡΙΚΟ ΚΙΝΗΣΕΩΝ ΑΠΟΘΗΚΗΣ", title_style))
-                elements.append(Paragraph(f"Περίοδος: {from_date_str} έως {to_date_str}", styles['Normal']))
-                elements.append(Spacer(1, 0.3*inch))
-                
-                # Statistics
-                total_in = sum(m[0]['quantity'] for m in filtered_movements if m[0]['type'] == 'in')
-                total_out = sum(m[0]['quantity'] for m in filtered_movements if m[0]['type'] == 'out')
-                
-                stats_text = f"Σύνολο Κινήσεων: {len(filtered_movements)} | Εισαγωγές: {total_in} | Εξαγωγές: {total_out}"
-                elements.append(Paragraph(stats_text, styles['Normal']))
-                elements.append(Spacer(1, 0.2*inch))
-                
-                # Table data
-                data = [['ID', 'Ημερομηνία', 'Προϊόν', 'Κατηγορία', 'Τύπος', 'Ποσότητα', 'Σημειώσεις']]
-                
-                for m, product in filtered_movements:
-                    date_str = m['date'].split()[0]
-                    type_str = 'Εισαγωγή' if m['type'] == 'in' else 'Εξαγωγή'
-                    data.append([
-                        str(m['id']),
-                        date_str,
-                        product['name'][:20],
-                        product.get('category', '-')[:15],
-                        type_str,
-                        str(m['quantity']),
-                        m.get('notes', '')[:25]
-                    ])
-                
-                # Create table
-                table = Table(data, repeatRows=1)
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgrey, colors.white]),
-                ]))
-                
-                elements.append(table)
-                
-                # Build PDF
-                doc.build(elements)
-                
+            def done(job):
                 messagebox.showinfo(
                     "✅ Επιτυχής Εξαγωγή",
                     f"Το ιστορικό εξήχθη επιτυχώς σε PDF!\n\n"
-                    f"📁 Αρχείο: {Path(filename).name}\n"
-                    f"📊 Κινήσεις: {len(filtered_movements)}"
+                    f"📁 Αρχείο: {Path(job.filename).name}\n"
+                    f"📊 Κινήσεις: {job.result}"
                 )
                 self.show_notification("✓ Εξαγωγή σε PDF ολοκληρώθηκε", "success")
-            except ImportError:
-                messagebox.showerror(
-                    "Απαιτείται reportlab",
-                    "Για εξαγωγή σε PDF απαιτείται η βιβλιοθήκη reportlab.\n\n"
-                    "Εγκατάσταση: pip install reportlab"
-                )
-                self.show_notification("✗ Δεν βρέθηκε το reportlab", "error")
-            except Exception as e:
-                messagebox.showerror("Σφάλμα", f"Αποτυχία εξαγωγής PDF:\n{e}")
-                self.show_notification(f"✗ Σφάλμα εξαγωγής: {e}", "error")
+            
+            self.submit_export("Ιστορικό PDF", filename, self.write_history_pdf, snapshot, done)
+    
+    @staticmethod
+    def pdf_progress(job, start):
+        """Callback προόδου του reportlab (doc.setProgressCallBack) για το δεύτερο μισό της εξαγωγής"""
+        def callback(kind, value):
+            if kind == 'SIZE_EST':
+                callback.size = max(value, 1)
+            elif kind == 'PROGRESS':
+                job.progress(start + (job.total - start) * value // callback.size)
+        callback.size = 1
+        return callback
+    
+    @classmethod
+    def write_history_pdf(cls, job, snapshot, filename):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        
+        from_date_str, to_date_str = snapshot['period']
+        filtered_movements = cls.history_rows(job, snapshot)
+        
+        # Create PDF
+        doc = SimpleDocTemplate(filename, pagesize=landscape(A4))
+        doc.setProgressCallBack(cls.pdf_progress(job, job.total // 2))
+        elements = []
+        
+        # Styles
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.HexColor('#2c3e50'),
+            spaceAfter=30,
+            alignment=1  # Center
+        )
+        
+        # Title
+        elements.append(Paragraph("ΙΣΤΟΡΙΚΟ ΚΙΝΗΣΕΩΝ ΑΠΟΘΗΚΗΣ", title_style))
+        elements.append(Paragraph(f"Περίοδος: {from_date_str} έως {to_date_str}", styles['Normal']))
+        elements.append(Spacer(1, 0.3*inch))
+        
+        # Statistics
+        total_in = sum(m['quantity'] for m, _, _ in filtered_movements if m['type'] == 'in')
+        total_out = sum(m['quantity'] for m, _, _ in filtered_movements if m['type'] == 'out')
+        
+        stats_text = f"Σύνολο Κινήσεων: {len(filtered_movements)} | Εισαγωγές: {total_in} | Εξαγωγές: {total_out}"
+        elements.append(Paragraph(stats_text, styles['Normal']))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        # Table data
+        data = [['ID', 'Ημερομηνία', 'Προϊόν', 'Κατηγορία', 'Τύπος', 'Ποσότητα', 'Σημειώσεις']]
+        
+        for m, name, category in filtered_movements:
+            date_str = (m['date'] or '').split()[0] if m['date'] else ''
+            type_str = 'Εισαγωγή' if m['type'] == 'in' else 'Εξαγωγή'
+            data.append([
+                str(m['id']),
+                date_str,
+                name[:20],
+                category[:15],
+                type_str,
+                str(m['quantity']),
+                (m.get('notes') or '')[:25]
+            ])
+        
+        # Create table
+        table = Table(data, repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgrey, colors.white]),
+        ]))
+        
+        elements.append(table)
+        
+        # Build PDF
+        doc.build(elements)
+        return len(filtered_movements)
     
     def on_search(self, *args):
-        """Handle search"""
+        """Handle search - ανανέωση όταν σταματήσει η πληκτρολόγηση (debounce)"""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(ProductSearchIndex.DEBOUNCE, self.run_search)
+    
+    def run_search(self):
+        self.search_job = None
         self.refresh_products()
     
     def auto_refresh_dashboard(self):
-        """Αυτόματη ενημέρωση dashboard κάθε 30 δευτερόλεπτα"""
-        try:
-            self.refresh_dashboard()
-        except:
-            pass
+        """Έλεγχος αλλαγής ημέρας κάθε 30 δευτερόλεπτα
+
+        Τα υπόλοιπα του dashboard ενημερώνονται με notify() σε κάθε αλλαγή
+        δεδομένων - εδώ μόνο τα "σήμερα" μετά τα μεσάνυχτα.
+        """
+        today = datetime.now().date()
+        if today != self.today:
+            self.today = today
+            self.notify('day')
         # Επανάληψη μετά από 30 δευτερόλεπτα
         self.root.after(30000, self.auto_refresh_dashboard)
     
+    def shutdown(self, backup=True):
+        """Εγγραφή όσων αλλαγών εκκρεμούν, τελικό backup και κλείσιμο storage
+
+        Αν η αποθήκευση αποτύχει, η εφαρμογή μπορεί να συνεχίσει κανονικά - οι
+        εξαγωγές και τα barcodes σταματούν μόνο στο destroy(). backup=False
+        για το --startup-check, που δεν έχει αλλαγές να κρατήσει.
+        """
+        if backup:
+            self.auto_backup()
+        self.persister.close()
+        self.storage.close()
+        self.backups.close()
+    
+    def destroy(self):
+        """Τερματισμός των εργασιών παρασκηνίου και κλείσιμο του παραθύρου"""
+        self.exports.close()
+        if self.barcode_batch is not None:
+            self.barcode_batch.cancel()
+        self.root.destroy()
+    
     def on_closing(self):
         """Ασφαλής έξοδος με αποθήκευση"""
         if messagebox.askokcancel("Έξοδος", "Θέλετε να κλείσετε την εφαρμογή;\n\nΌλα τα δεδομένα θα αποθηκευτούν αυτόματα."):
             try:
-                # Τελική αποθήκευση όλων
-                self.save_products()
-                self.save_movements()
-                self.save_categories()
-                
-                # Τελικό backup
-                self.auto_backup()
+                self.shutdown()
                 
+                rejected = self.persister.take_rejected()
+                if rejected:
+                    messagebox.showwarning(
+                        "Αλλαγές που δεν αποθηκεύτηκαν",
+                        "Οι παρακάτω αλλαγές απορρίφθηκαν από τη βάση:\n\n"
+                        + "\n".join(f"• {self.describe_op(op, payload)}: {error}"
+                                    for (op, payload), error in rejected[:20])
+                    )
                 print("✓ Όλα τα δεδομένα αποθηκεύτηκαν επιτυχώς!")
-                self.root.destroy()
+                self.destroy()
             except Exception as e:
                 if messagebox.askyesno("Σφάλμα Αποθήκευσης", 
                                       f"Προέκυψε σφάλμα κατά την αποθήκευση:\n{e}\n\nΘέλετε να κλείσετε ούτως ή άλλως;"):
-                    self.root.destroy()
+                    self.destroy()
         else:
             # Δεν κλείνει - συνεχίζει κανονικά
             pass
@@ -1866,181 +5561,221 @@ class StockManagerPro:
         self.status_bar.config(text=message, fg=colors.get(type, '#2c3e50'))
         self.root.after(3000, lambda: self.status_bar.config(text="✓ Έτοιμο", fg=self.colors['dark']))
     
+    def submit_export(self, title, filename, write, snapshot, on_done):
+        """Εξαγωγή στο παρασκήνιο - η πρόοδος φαίνεται στο status bar (κλικ = ακύρωση)"""
+        self.exports.submit(ExportJob(title, filename, write, snapshot, on_done))
+        if not self.exports_polling:
+            self.exports_polling = True
+            self.poll_exports()
+    
+    def poll_exports(self):
+        """Πρόοδος/ολοκλήρωση των εξαγωγών (τα jobs ενημερώνονται από το worker thread)"""
+        for job in self.exports.finished():
+            name = Path(job.filename).name
+            if job.state == 'done':
+                job.on_done(job)
+            elif job.state == 'cancelled':
+                self.show_notification(f"⚠ Ακυρώθηκε η εξαγωγή: {name}", "warning")
+            elif isinstance(job.error, ImportError):
+                messagebox.showerror(
+                    "Λείπει Βιβλιοθήκη",
+                    f"Η βιβλιοθήκη '{job.error.name}' δεν είναι εγκατεστημένη!\n\n"
+                    f"Εκτελέστε: pip install {job.error.name}"
+                )
+                self.show_notification(f"✗ Δεν βρέθηκε το {job.error.name}", "error")
+            else:
+                self.show_notification(f"✗ Σφάλμα εξαγωγής: {str(job.error)[:50]}", "error")
+                messagebox.showerror("Σφάλμα", f"Αποτυχία εξαγωγής ({name}):\n{job.error}")
+        
+        active = self.exports.active()
+        if not active:
+            self.export_status.config(text="")
+            self.exports_polling = False
+            return
+        
+        job = active[0]
+        text = f"⏳ {job.title}: {Path(job.filename).name} {job.percent()}%"
+        if len(active) > 1:
+            text += f" (+{len(active) - 1} σε αναμονή)"
+        self.export_status.config(text=text + "  ✗ Ακύρωση")
+        self.root.after(200, self.poll_exports)
+    
     def export_to_excel(self):
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                filetypes=[("Excel Files", "*.xlsx")],
-                initialfile=f"apothema_{datetime.now().strftime('%Y%m%d')}.xlsx"
-            )
+        if not self.ensure_history(self.export_to_excel):
+            return
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel Files", "*.xlsx")],
+            initialfile=f"apothema_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        )
+        
+        if filename:
+            stock_data = []
+            for p in self.products:
+                total_in, total_out = self.ledger.totals(p['id'])
+                current_stock = p['initial_stock'] + total_in - total_out
+                stock_data.append({
+                    'Προϊόν': p['name'],
+                    'Κωδικός': p.get('code', ''),
+                    'Αρχικό': p['initial_stock'],
+                    'Εισαγωγές': total_in,
+                    'Εξαγωγές': total_out,
+                    'Τρέχον': current_stock,
+                    'Ελάχιστο': p['min_limit'],
+                    'Κατάσταση': "ΧΑΜΗΛΟ" if current_stock < p['min_limit'] else "OK"
+                })
             
-            if filename:
-                products_df = pd.DataFrame(self.products)
-                movements_df = pd.DataFrame(self.movements)
-                
-                stock_data = []
-                for p in self.products:
-                    total_in = sum(m['quantity'] for m in self.movements 
-                                  if m['product_id'] == p['id'] and m['type'] == 'in')
-                    total_out = sum(m['quantity'] for m in self.movements 
-                                   if m['product_id'] == p['id'] and m['type'] == 'out')
-                    current_stock = p['initial_stock'] + total_in - total_out
-                    stock_data.append({
-                        'Προϊόν': p['name'],
-                        'Κωδικός': p.get('code', ''),
-                        'Αρχικό': p['initial_stock'],
-                        'Εισαγωγές': total_in,
-                        'Εξαγωγές': total_out,
-                        'Τρέχον': current_stock,
-                        'Ελάχιστο': p['min_limit'],
-                        'Κατάσταση': "ΧΑΜΗΛΟ" if current_stock < p['min_limit'] else "OK"
-                    })
-                
-                stock_df = pd.DataFrame(stock_data)
-                
-                with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                    products_df.to_excel(writer, sheet_name='Προϊόντα', index=False)
-                    movements_df.to_excel(writer, sheet_name='Κινήσεις', index=False)
-                    stock_df.to_excel(writer, sheet_name='Απόθεμα', index=False)
-                
-                self.show_notification(f"✓ Εξήχθη: {Path(filename).name}", "success")
-        except Exception as e:
-            self.show_notification(f"✗ Σφάλμα: {e}", "error")
+            snapshot = {
+                'products': [dict(p) for p in self.products],
+                'movements': self.repo.movements.snapshot(),
+                'stock': stock_data
+            }
+            self.submit_export(
+                "Excel", filename, self.write_stock_excel, snapshot,
+                lambda job: self.show_notification(f"✓ Εξήχθη: {Path(job.filename).name}", "success")
+            )
+    
+    @staticmethod
+    def write_stock_excel(job, snapshot, filename):
+        import pandas as pd
+        
+        job.progress(0, 4)
+        products_df = pd.DataFrame(snapshot['products'])
+        movements_df = pd.DataFrame(snapshot['movements'].columns())
+        stock_df = pd.DataFrame(snapshot['stock'])
+        
+        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+            for step, (df, sheet_name) in enumerate(((products_df, 'Προϊόντα'),
+                                                     (movements_df, 'Κινήσεις'),
+                                                     (stock_df, 'Απόθεμα')), 1):
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+                job.progress(step)
+        # Τελευταίο βήμα: το κλείσιμο του ExcelWriter γράφει το αρχείο
+        job.progress(4)
     
     def export_to_pdf(self):
         """Export stock report to PDF with Greek support"""
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF Files", "*.pdf")],
-                initialfile=f"apothema_{datetime.now().strftime('%Y%m%d')}.pdf"
-            )
-            
-            if not filename:
-                return
-            
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-            
-            # Προσπάθεια εγκατάστασης ελληνικού font
-            try:
-                # Χρήση DejaVu Sans που υποστηρίζει ελληνικά
-                import os
-                font_path = None
-                
-                # Αναζήτηση για DejaVu Sans στο σύστημα
-                possible_paths = [
-                    "C:/Windows/Fonts/DejaVuSans.ttf",
-                    "C:/Windows/Fonts/Arial.ttf",
-                    "C:/Windows/Fonts/arialuni.ttf",
-                ]
-                
-                for path in possible_paths:
-                    if os.path.exists(path):
-                        font_path = path
-                        break
-                
-                if font_path:
-                    pdfmetrics.registerFont(TTFont('GreekFont', font_path))
-                    font_name = 'GreekFont'
-                else:
-                    font_name = 'Helvetica'
-            except:
-                font_name = 'Helvetica'
-            
-            doc = SimpleDocTemplate(filename, pagesize=landscape(A4))
-            elements = []
-            
-            # Τίτλος - χωρίς Paragraph για να αποφύγουμε προβλήματα
-            from reportlab.platypus import PageBreak
-            
-            # Δεδομένα πίνακα με ASCII-safe headers
-            data = [['#', 'Product', 'Category', 'Initial', 'In', 'Out', 'Current', 'Min', 'Status']]
-            
-            for idx, p in enumerate(self.products, 1):
-                total_in = sum(m['quantity'] for m in self.movements 
-                              if m['product_id'] == p['id'] and m['type'] == 'in')
-                total_out = sum(m['quantity'] for m in self.movements 
-                               if m['product_id'] == p['id'] and m['type'] == 'out')
-                current_stock = p['initial_stock'] + total_in - total_out
-                status = "LOW" if current_stock < p['min_limit'] else "OK"
-                
-                # Χρήση ASCII-safe strings
-                product_name = p['name'][:35]
-                category = p.get('category', '---')[:20]
-                
-                data.append([
-                    str(idx),
-                    product_name,
-                    category,
-                    str(p['initial_stock']),
-                    str(total_in),
-                    str(total_out),
-                    str(current_stock),
-                    str(p['min_limit']),
-                    status
-                ])
-            
-            # Δημιουργία πίνακα με μικρότερα font για να χωράνε περισσότερα
-            col_widths = [0.4*inch, 2.2*inch, 1.3*inch, 0.6*inch, 0.5*inch, 0.5*inch, 0.7*inch, 0.6*inch, 0.7*inch]
-            
-            table = Table(data, colWidths=col_widths)
-            table.setStyle(TableStyle([
-                # Header
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), font_name + '-Bold' if font_name == 'Helvetica' else font_name),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                
-                # Data rows
-                ('FONTNAME', (0, 1), (-1, -1), font_name),
-                ('FONTSIZE', (0, 1), (-1, -1), 7),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 3),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-            ]))
-            
-            elements.append(table)
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF Files", "*.pdf")],
+            initialfile=f"apothema_{datetime.now().strftime('%Y%m%d')}.pdf"
+        )
+        
+        if not filename:
+            return
+        
+        # Δεδομένα πίνακα με ASCII-safe headers
+        data = [['#', 'Product', 'Category', 'Initial', 'In', 'Out', 'Current', 'Min', 'Status']]
+        low_stock = 0
+        
+        for idx, p in enumerate(self.products, 1):
+            total_in, total_out = self.ledger.totals(p['id'])
+            current_stock = p['initial_stock'] + total_in - total_out
+            status = "LOW" if current_stock < p['min_limit'] else "OK"
+            low_stock += current_stock < p['min_limit']
             
-            doc.build(elements)
+            # Χρήση ASCII-safe strings
+            product_name = p['name'][:35]
+            category = p.get('category', '---')[:20]
             
+            data.append([
+                str(idx),
+                product_name,
+                category,
+                str(p['initial_stock']),
+                str(total_in),
+                str(total_out),
+                str(current_stock),
+                str(p['min_limit']),
+                status
+            ])
+        
+        total_products = len(self.products)
+        movement_count = self.ledger.movement_count
+        
+        def done(job):
             # Μήνυμα επιτυχίας
-            total_products = len(self.products)
-            low_stock = sum(1 for p in self.products if self.get_current_stock(p['id']) < p['min_limit'])
-            
             messagebox.showinfo(
                 "✅ PDF Δημιουργήθηκε",
                 f"Το PDF εξήχθη επιτυχώς!\n\n"
-                f"📄 Αρχείο: {Path(filename).name}\n"
+                f"📄 Αρχείο: {Path(job.filename).name}\n"
                 f"📦 Προϊόντα: {total_products}\n"
                 f"⚠️ Χαμηλά: {low_stock}\n"
-                f"📋 Κινήσεις: {len(self.movements)}"
+                f"📋 Κινήσεις: {movement_count}"
             )
+            self.show_notification(f"✓ PDF εξήχθη: {Path(job.filename).name}", "success")
+        
+        self.submit_export("PDF", filename, self.write_stock_pdf, data, done)
+    
+    @classmethod
+    def write_stock_pdf(cls, job, data, filename):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+        from reportlab.lib.units import inch
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        
+        job.progress(0, 100)
+        
+        # Προσπάθεια εγκατάστασης ελληνικού font
+        try:
+            # Χρήση DejaVu Sans που υποστηρίζει ελληνικά
+            font_path = None
             
-            self.show_notification(f"✓ PDF εξήχθη: {Path(filename).name}", "success")
+            # Αναζήτηση για DejaVu Sans στο σύστημα
+            possible_paths = [
+                "C:/Windows/Fonts/DejaVuSans.ttf",
+                "C:/Windows/Fonts/Arial.ttf",
+                "C:/Windows/Fonts/arialuni.ttf",
+            ]
             
-        except ImportError:
-            messagebox.showerror(
-                "Λείπει Βιβλιοθήκη",
-                "Η βιβλιοθήκη 'reportlab' δεν είναι εγκατεστημένη!\n\n"
-                "Εκτελέστε: pip install reportlab\n\n"
-                "Χρησιμοποιήστε προσωρινά την εξαγωγή σε Excel."
-            )
-        except Exception as e:
-            self.show_notification(f"✗ Σφάλμα PDF: {str(e)[:50]}", "error")
-            messagebox.showerror("Σφάλμα", f"Πρόβλημα εξαγωγής PDF:\n{e}")
+            for path in possible_paths:
+                if os.path.exists(path):
+                    font_path = path
+                    break
+            
+            if font_path:
+                pdfmetrics.registerFont(TTFont('GreekFont', font_path))
+                font_name = 'GreekFont'
+            else:
+                font_name = 'Helvetica'
+        except:
+            font_name = 'Helvetica'
+        
+        doc = SimpleDocTemplate(filename, pagesize=landscape(A4))
+        doc.setProgressCallBack(cls.pdf_progress(job, 0))
+        elements = []
+        
+        # Δημιουργία πίνακα με μικρότερα font για να χωράνε περισσότερα
+        col_widths = [0.4*inch, 2.2*inch, 1.3*inch, 0.6*inch, 0.5*inch, 0.5*inch, 0.7*inch, 0.6*inch, 0.7*inch]
+        
+        table = Table(data, colWidths=col_widths)
+        table.setStyle(TableStyle([
+            # Header
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), font_name + '-Bold' if font_name == 'Helvetica' else font_name),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('TOPPADDING', (0, 0), (-1, 0), 8),
+            
+            # Data rows
+            ('FONTNAME', (0, 1), (-1, -1), font_name),
+            ('FONTSIZE', (0, 1), (-1, -1), 7),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')]),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 3),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+            ('TOPPADDING', (0, 1), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+        ]))
+        
+        elements.append(table)
+        
+        doc.build(elements)
 
 
 # Dialogs (same as before)
@@ -2177,9 +5912,16 @@ class ProductDialog:
 
 
 class MovementDialog:
-    def __init__(self, parent, movement_type, products):
+    def __init__(self, parent, movement_type, products, search, validate):
         self.result = None
-        self.all_products = sorted(products, key=lambda x: x['name'].lower())  # Sort alphabetically
+        # Κοινό ευρετήριο αναζήτησης της εφαρμογής (ή δικό του αν δεν δοθεί)
+        self.search = search or ProductSearchIndex(products)
+        # Ίδιος έλεγχος με τη μαζική καταχώριση (StockManagerPro.resolve_movement_lines)
+        self.validate = validate
+        products_by_id = {p['id']: p for p in products}
+        self.all_products = [products_by_id[pid] for pid in self.search.ordered() if pid in products_by_id]  # Sort alphabetically
+        self.product_ids = {p['name']: p['id'] for p in self.all_products}
+        self.filter_job = None
         
         title = "Εισαγωγή Προϊόντος" if movement_type == 'in' else "Εξαγωγή Προϊόντος"
         icon = "📥" if movement_type == 'in' else "📤"
@@ -2229,10 +5971,15 @@ class MovementDialog:
             product_combo.current(0)
         
         # Filter function
-        def filter_products(*args):
-            search_text = search_var.get().lower()
-            if search_text:
-                filtered = [p['name'] for p in self.all_products if search_text in p['name'].lower()]
+        def filter_products():
+            self.filter_job = None
+            if not product_combo.winfo_exists():
+                return
+            matches = self.search.search(search_var.get())
+            if matches is not None:
+                filtered = [
+                    products_by_id[pid]['name'] for pid in self.search.ordered(matches) if pid in products_by_id
+                ]
                 product_combo['values'] = filtered
                 if filtered:
                     product_combo.set(filtered[0])
@@ -2241,7 +5988,13 @@ class MovementDialog:
                 if self.all_products:
                     product_combo.set(self.all_products[0]['name'])
         
-        search_var.trace('w', filter_products)
+        def schedule_filter(*args):
+            # Φιλτράρισμα όταν σταματήσει η πληκτρολόγηση
+            if self.filter_job is not None:
+                dialog.after_cancel(self.filter_job)
+            self.filter_job = dialog.after(ProductSearchIndex.DEBOUNCE, filter_products)
+        
+        search_var.trace('w', schedule_filter)
         
         tk.Label(frame, text="Ποσότητα *", font=("Segoe UI", 10)).grid(row=2, column=0, sticky=tk.W, pady=10)
         qty_entry = tk.Entry(frame, font=("Segoe UI", 11), width=30)
@@ -2256,25 +6009,24 @@ class MovementDialog:
         btn_frame.grid(row=4, column=0, columnspan=2, pady=20)
         
         def save():
-            try:
-                selected_product = product_combo.get()
-                if not selected_product:
-                    messagebox.showerror("Σφάλμα", "Επιλέξτε προϊόν!")
-                    return
-                
-                quantity = float(qty_entry.get() or 0)
-                
-                product_id = next((p['id'] for p in self.all_products if p['name'] == selected_product), None)
-                
-                self.result = {
-                    'product_id': product_id,
-                    'type': movement_type,
-                    'quantity': int(quantity),
-                    'notes': notes_entry.get().strip()
-                }
-                dialog.destroy()
-            except ValueError:
-                messagebox.showerror("Σφάλμα", "Μη έγκυρη ποσότητα!")
+            selected_product = product_combo.get()
+            if not selected_product:
+                messagebox.showerror("Σφάλμα", "Επιλέξτε προϊόν!")
+                return
+            
+            # Δεκαδικές ποσότητες επιτρέπονται, αρκεί να είναι > 0
+            movements, errors = self.validate([{
+                'product_id': self.product_ids.get(selected_product),
+                'type': movement_type,
+                'quantity': qty_entry.get().strip(),
+                'notes': notes_entry.get()
+            }])
+            if errors:
+                messagebox.showerror("Σφάλμα", f"{errors[0][1]}!")
+                return
+            
+            self.result = movements[0]
+            dialog.destroy()
         
         ModernButton(
             btn_frame,
@@ -2300,6 +6052,229 @@ class MovementDialog:
         dialog.wait_window()
 
 
+class BulkMovementDialog:
+    """Μαζική καταχώριση κινήσεων σε πλέγμα (μία γραμμή ανά είδος)
+
+    Σε κάθε γραμμή δίνεται κωδικός (π.χ. από scanner) ή όνομα προϊόντος,
+    τύπος, ποσότητα και σημειώσεις. Με Enter ο κέρσορας πάει στην ποσότητα
+    και μετά στην επόμενη γραμμή. Ο έλεγχος γίνεται από το validate (βλ.
+    StockManagerPro.resolve_movement_lines) και οι γραμμές με λάθος
+    σημειώνονται χωρίς να κλείσει ο διάλογος. result: οι κινήσεις (χωρίς
+    id/ημερομηνία) ή None.
+    """
+
+    TYPES = {"📥 Εισαγωγή": 'in', "📤 Εξαγωγή": 'out'}
+
+    def __init__(self, parent, movement_type, products, search, validate, lines=None):
+        self.result = None
+        self.search = search
+        self.validate = validate
+        self.products_by_id = {p['id']: p for p in products}
+        self.names = {ProductSearchIndex.collation_key(p['name']): p['id'] for p in products}
+        self.type_names = {code: name for name, code in self.TYPES.items()}
+        self.movement_type = movement_type
+        self.rows = []
+        
+        dialog = tk.Toplevel(parent)
+        dialog.title("Μαζική Καταχώριση Κινήσεων")
+        dialog.geometry("900x600")
+        dialog.transient(parent)
+        dialog.grab_set()
+        self.dialog = dialog
+        
+        dialog.update_idletasks()
+        x = (dialog.winfo_screenwidth() // 2) - (dialog.winfo_width() // 2)
+        y = (dialog.winfo_screenheight() // 2) - (dialog.winfo_height() // 2)
+        dialog.geometry(f"+{x}+{y}")
+        
+        # Header
+        header = tk.Frame(dialog, bg="#3498db", height=60)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+        
+        tk.Label(
+            header,
+            text="📋 Μαζική Καταχώριση Κινήσεων",
+            bg="#3498db",
+            fg="white",
+            font=("Segoe UI", 14, "bold")
+        ).pack(pady=18)
+        
+        # Buttons
+        btn_frame = tk.Frame(dialog, pady=10)
+        btn_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        self.count_label = tk.Label(btn_frame, text="", font=("Segoe UI", 10))
+        self.count_label.pack(side=tk.LEFT, padx=20)
+        
+        ModernButton(
+            btn_frame,
+            text="❌ Ακύρωση",
+            command=dialog.destroy,
+            bg="#e74c3c",
+            fg="white",
+            padx=25,
+            pady=10
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        ModernButton(
+            btn_frame,
+            text="💾 Καταχώριση Όλων",
+            command=self.save,
+            bg="#27ae60",
+            fg="white",
+            padx=25,
+            pady=10
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        ModernButton(
+            btn_frame,
+            text="➕ 10 Γραμμές",
+            command=lambda: self.add_rows(10),
+            bg="#3498db",
+            fg="white",
+            padx=25,
+            pady=10
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        # Πλέγμα σε canvas με κύλιση
+        body = tk.Frame(dialog)
+        body.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        canvas = tk.Canvas(body, highlightthickness=0)
+        vsb = ttk.Scrollbar(body, orient="vertical", command=canvas.yview)
+        canvas.configure(yscrollcommand=vsb.set)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.canvas = canvas
+        self.table = tk.Frame(canvas)
+        canvas.create_window((0, 0), window=self.table, anchor=tk.NW)
+        self.table.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        
+        for column, text in enumerate(["#", "Κωδικός / Όνομα", "Προϊόν", "Τύπος", "Ποσότητα", "Σημειώσεις", ""]):
+            tk.Label(self.table, text=text, font=("Segoe UI", 10, "bold")).grid(row=0, column=column, sticky=tk.W, padx=3)
+        
+        lines = list(lines or [])
+        self.add_rows(max(len(lines) + 5, 20), lines)
+        self.rows[0]['product'].focus_set()
+        dialog.wait_window()
+    
+    def add_rows(self, count, lines=()):
+        for i in range(count):
+            line = lines[i] if i < len(lines) else {}
+            row = len(self.rows) + 1
+            tk.Label(self.table, text=str(row), font=("Segoe UI", 9), fg="#7f8c8d").grid(row=row, column=0, padx=3)
+            
+            product = tk.Entry(self.table, font=("Segoe UI", 10), width=20)
+            product.insert(0, str(line.get('product', '')))
+            product.grid(row=row, column=1, padx=3, pady=2, ipady=2)
+            
+            name = tk.Label(self.table, text="", font=("Segoe UI", 9), width=26, anchor=tk.W)
+            name.grid(row=row, column=2, padx=3)
+            
+            type_combo = ttk.Combobox(self.table, values=list(self.TYPES), font=("Segoe UI", 10), width=12, state="readonly")
+            type_combo.set(self.type_names[line.get('type', self.movement_type)])
+            type_combo.grid(row=row, column=3, padx=3)
+            
+            quantity = tk.Entry(self.table, font=("Segoe UI", 10), width=10)
+            quantity.insert(0, str(line.get('quantity', '')))
+            quantity.grid(row=row, column=4, padx=3, ipady=2)
+            
+            notes = tk.Entry(self.table, font=("Segoe UI", 10), width=24)
+            notes.insert(0, str(line.get('notes', '')))
+            notes.grid(row=row, column=5, padx=3, ipady=2)
+            
+            status = tk.Label(self.table, text="", font=("Segoe UI", 9), fg="#c62828", anchor=tk.W)
+            status.grid(row=row, column=6, sticky=tk.W, padx=3)
+            
+            entry = {'product': product, 'name': name, 'type': type_combo,
+                     'quantity': quantity, 'notes': notes, 'status': status}
+            self.rows.append(entry)
+            
+            product.bind("<FocusOut>", lambda e, entry=entry: self.show_product(entry, count=True))
+            product.bind("<Return>", lambda e, entry=entry: self.next_field(entry, 'product'))
+            quantity.bind("<Return>", lambda e, entry=entry: self.next_field(entry, 'quantity'))
+            notes.bind("<Return>", lambda e, entry=entry: self.next_field(entry, 'quantity'))
+            self.show_product(entry)
+        self.update_count()
+    
+    def product_id(self, text):
+        text = text.strip()
+        if not text:
+            return None
+        product_id = self.search.by_code(text)
+        if product_id is None:
+            product_id = self.names.get(ProductSearchIndex.collation_key(text))
+        return product_id
+    
+    def show_product(self, entry, count=False):
+        """Το όνομα του προϊόντος που αντιστοιχεί στον κωδικό/όνομα της γραμμής"""
+        text = entry['product'].get()
+        product = self.products_by_id.get(self.product_id(text))
+        if product:
+            entry['name'].config(text=product['name'], fg="#2e7d32")
+        else:
+            entry['name'].config(text="❓ Άγνωστο" if text.strip() else "", fg="#c62828")
+        if count:
+            self.update_count()
+    
+    def next_field(self, entry, field):
+        """Enter: κωδικός -> ποσότητα -> κωδικός της επόμενης γραμμής (νέες γραμμές αν χρειάζεται)"""
+        if field == 'product':
+            self.show_product(entry, count=True)
+            entry['quantity'].focus_set()
+            return "break"
+        index = self.rows.index(entry)
+        if index + 1 >= len(self.rows):
+            self.add_rows(10)
+        next_entry = self.rows[index + 1]['product']
+        next_entry.focus_set()
+        # Κύλιση ώστε να φαίνεται η γραμμή
+        self.dialog.update_idletasks()
+        self.canvas.yview_moveto(max(0.0, (next_entry.winfo_y() - self.canvas.winfo_height() / 2) / max(self.table.winfo_height(), 1)))
+        return "break"
+    
+    def lines(self):
+        """[(θέση στο πλέγμα, γραμμή)] για τις γραμμές που δεν είναι κενές"""
+        lines = []
+        for index, entry in enumerate(self.rows):
+            product = entry['product'].get().strip()
+            quantity = entry['quantity'].get().strip()
+            if not product and not quantity:
+                continue
+            lines.append((index, {
+                'product': product,
+                'type': self.TYPES[entry['type'].get()],
+                'quantity': quantity,
+                'notes': entry['notes'].get()
+            }))
+        return lines
+    
+    def update_count(self):
+        self.count_label.config(text=f"Γραμμές: {len(self.lines())}")
+    
+    def save(self):
+        lines = self.lines()
+        if not lines:
+            messagebox.showerror("Σφάλμα", "Δεν υπάρχουν γραμμές για καταχώριση!", parent=self.dialog)
+            return
+        
+        movements, errors = self.validate([line for _, line in lines])
+        for entry in self.rows:
+            entry['status'].config(text="")
+        for index, message in errors:
+            self.rows[lines[index][0]]['status'].config(text=f"⚠ {message}")
+        if errors:
+            messagebox.showerror(
+                "Σφάλμα",
+                f"{len(errors)} γραμμές έχουν λάθη - δεν καταχωρήθηκε καμία.\n\nΔιορθώστε τις σημειωμένες γραμμές.",
+                parent=self.dialog
+            )
+            return
+        
+        self.result = movements
+        self.dialog.destroy()
+
+
 class CategoryDialog:
     def __init__(self, parent, categories):
         self.result = None
@@ -2541,7 +6516,7 @@ class CategoryDialog:
 
 
 class BackupRestoreDialog:
-    def __init__(self, parent, backups):
+    def __init__(self, parent, backups, backup_manager):
         self.result = None
         
         dialog = tk.Toplevel(parent)
@@ -2625,34 +6600,22 @@ class BackupRestoreDialog:
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Add backups to tree with details
+        # Add backups to tree with details (από το manifest, χωρίς ανάγνωση των αρχείων)
         for i, backup in enumerate(backups):
-            timestamp = backup.stem.replace("backup_", "")
-            try:
-                dt = datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
-                date_str = dt.strftime("%d/%m/%Y")
-                time_str = dt.strftime("%H:%M:%S")
-            except:
-                date_str = timestamp
-                time_str = "-"
+            entry = backup_manager.entry(backup)
+            dt = datetime.strptime(entry['timestamp'], "%Y-%m-%d %H:%M:%S")
+            date_str = dt.strftime("%d/%m/%Y")
+            time_str = dt.strftime("%H:%M:%S")
             
-            # Get file size
-            size_kb = backup.stat().st_size / 1024
+            # File size
+            size_kb = entry['size'] / 1024
             if size_kb < 1024:
                 size_str = f"{size_kb:.1f} KB"
             else:
                 size_str = f"{size_kb/1024:.2f} MB"
             
-            # Try to read backup details
-            try:
-                with open(backup, 'r', encoding='utf-8-sig') as f:
-                    backup_data = json.load(f)
-                    num_products = len(backup_data.get('products', []))
-                    num_movements = len(backup_data.get('movements', []))
-            except Exception as e:
-                print(f"Error reading backup {backup.name}: {type(e).__name__}: {e}")
-                num_products = "?"
-                num_movements = "?"
+            num_products = entry['counts']['products']
+            num_movements = entry['counts']['movements']
             
             tag = "evenrow" if i % 2 == 0 else "oddrow"
             tree.insert("", tk.END, values=(
@@ -2695,21 +6658,20 @@ class BackupRestoreDialog:
                 backup_file = self.backups[idx]
                 
                 try:
-                    with open(backup_file, 'r', encoding='utf-8-sig') as f:
-                        backup_data = json.load(f)
-                    
-                    num_products = len(backup_data.get('products', []))
-                    num_movements = len(backup_data.get('movements', []))
-                    num_categories = len(backup_data.get('categories', []))
-                    
-                    timestamp = backup_file.stem.replace("backup_", "")
-                    dt = datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
+                    entry = backup_manager.entry(backup_file)
+                    counts = entry['counts']
+                    dt = datetime.strptime(entry['timestamp'], "%Y-%m-%d %H:%M:%S")
+                    if entry['kind'] == 'delta':
+                        kind = f"Αλλαγές (delta {entry['chain_length']} από {entry['base']})"
+                    else:
+                        kind = "Πλήρες"
                     
                     details_text = (
-                        f"📦 Προϊόντα: {num_products} | "
-                        f"📋 Κινήσεις: {num_movements} | "
-                        f"🏷️ Κατηγορίες: {num_categories}\n"
-                        f"📅 Δημιουργήθηκε: {dt.strftime('%d/%m/%Y %H:%M:%S')}"
+                        f"📦 Προϊόντα: {counts['products']} | "
+                        f"📋 Κινήσεις: {counts['movements']} | "
+                        f"🏷️ Κατηγορίες: {counts['categories']}\n"
+                        f"📅 Δημιουργήθηκε: {dt.strftime('%d/%m/%Y %H:%M:%S')} | 💾 Τύπος: {kind}\n"
+                        f"🔒 SHA-256: {entry['checksum'][:16]}…"
                     )
                     self.details_label.config(text=details_text, fg="#2c3e50")
                 except Exception as e:
@@ -2733,11 +6695,9 @@ class BackupRestoreDialog:
             
             # Show confirmation with details
             try:
-                with open(backup_file, 'r', encoding='utf-8-sig') as f:
-                    backup_data = json.load(f)
-                
-                num_products = len(backup_data.get('products', []))
-                num_movements = len(backup_data.get('movements', []))
+                counts = backup_manager.summary(backup_file)
+                num_products = counts['products']
+                num_movements = counts['movements']
                 
                 msg = (
                     "⚠️ ΠΡΟΣΟΧΗ ⚠️\n\n"
@@ -2790,9 +6750,122 @@ class BackupRestoreDialog:
         dialog.wait_window()
 
 
+def prewarm_imports():
+    """Φόρτωση των βαριών modules των εξαγωγών σε thread, ώστε η πρώτη εξαγωγή να μην περιμένει"""
+    def load():
+        for name in PREWARM_MODULES:
+            try:
+                import_module(name)
+            except Exception as e:
+                print(f"Prewarm: {name}: {type(e).__name__}: {e}")
+    
+    threading.Thread(target=load, name="prewarm", daemon=True).start()
+
+
+def startup_check_file():
+    """Αρχείο αναφοράς του --startup-check[=αρχείο] ή None αν δεν δόθηκε"""
+    for arg in sys.argv[1:]:
+        if arg == "--startup-check":
+            return Path("startup_check.json")
+        if arg.startswith("--startup-check="):
+            return Path(arg.split("=", 1)[1])
+    return None
+
+
+def startup_check_data(data_dir):
+    """Αντίγραφο του φακέλου data σε προσωρινό φάκελο για το --startup-check
+
+    Η εκκίνηση ανοίγει τη βάση, γράφει backup και σημάδι συνεδρίας - στο
+    αντίγραφο, ώστε ο έλεγχος να μην αγγίζει τα πραγματικά δεδομένα ούτε τη
+    συνεδρία ενός σταθμού που τρέχει. Η βάση αντιγράφεται με το backup της
+    SQLite, που δίνει συνεπές αντίγραφο και όσο τη γράφει άλλος σταθμός.
+    """
+    data_dir = Path(data_dir)
+    copy = Path(tempfile.mkdtemp(prefix="stock_check_")) / "data"
+    if not data_dir.exists():
+        return copy
+    shutil.copytree(data_dir, copy, ignore=shutil.ignore_patterns(
+        "stock_manager.db", "stock_manager.db-*", "*.lock", "*.corrupt-*"
+    ))
+    db_file = data_dir / "stock_manager.db"
+    if db_file.exists():
+        try:
+            source = sqlite3.connect(f"{db_file.resolve().as_uri()}?mode=ro", uri=True)
+            target = sqlite3.connect(str(copy / db_file.name))
+            try:
+                source.backup(target)
+                with target:
+                    # Σημάδια συνεδριών του πρωτοτύπου - ο έλεγχος μετράει κανονική εκκίνηση
+                    target.execute("DELETE FROM settings WHERE key LIKE 'session_open%'")
+            finally:
+                source.close()
+                target.close()
+        except sqlite3.DatabaseError as e:
+            # Κατεστραμμένη βάση: αντιγράφεται όπως είναι (ο έλεγχος μετράει και την ανάκτηση)
+            print(f"Startup check: {db_file.name}: {e}")
+            shutil.copy2(db_file, copy / db_file.name)
+    return copy
+
+
+def startup_features():
+    """Προαιρετικές δυνατότητες που πρέπει να λειτουργούν στο EXE (ελέγχονται από το build_exe.py)"""
+    return {
+        'numpy': optional_module('numpy') is not None,
+        'barcodes': BarcodeBatch.can_decode()
+    }
+
+
+def write_startup_report(path, timings):
+    """Χρόνοι εκκίνησης και σύγκριση με το STARTUP_BUDGET (JSON, για το build_exe.py)"""
+    report = {
+        'timings': timings,
+        'budget': STARTUP_BUDGET,
+        'features': startup_features(),
+        'ok': all(timings[key] <= STARTUP_BUDGET[key] for key in timings)
+    }
+    with atomic_write(path) as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    # Στο --windowed EXE δεν υπάρχει console
+    if sys.stdout is not None:
+        for key, value in timings.items():
+            print(f"{key}: {value:.3f}s (budget {STARTUP_BUDGET[key]:.1f}s)")
+    return report['ok']
+
+
 def main():
+    check_file = startup_check_file()
+    timings = {'import': time.perf_counter() - IMPORT_STARTED}
+    data_dir = Path("data")
+    if check_file is not None:
+        # Ο έλεγχος δεν αγγίζει τα πραγματικά δεδομένα (η αντιγραφή δεν μετράει στους χρόνους)
+        data_dir = startup_check_data(data_dir)
+    main_started = time.perf_counter()
+    
     root = tk.Tk()
-    app = StockManagerPro(root)
+    
+    def mapped(event):
+        # Το <Map> του root φτάνει και από κάθε widget (bindtags) - μετράει μόνο
+        # η πρώτη εμφάνιση του ίδιου του παραθύρου
+        if event.widget is not root:
+            return
+        root.unbind('<Map>', map_binding)
+        root.after(0, first_paint)
+    
+    def first_paint():
+        # Το παράθυρο είναι στην οθόνη - σχεδίαση όσων widgets εκκρεμούν πριν από τη μέτρηση
+        root.update_idletasks()
+        timings['first_paint'] = time.perf_counter() - main_started
+        if check_file is not None:
+            ok = write_startup_report(check_file, timings)
+            app.shutdown(backup=False)
+            app.destroy()
+            shutil.rmtree(data_dir.parent, ignore_errors=True)
+            sys.exit(0 if ok else 1)
+        prewarm_imports()
+    
+    # Πριν από το StockManagerPro, ώστε να μη χαθεί ένα <Map> κατά την κατασκευή του
+    map_binding = root.bind('<Map>', mapped)
+    app = StockManagerPro(root, data_dir)
     root.mainloop()
 
 
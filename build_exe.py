@@ -2,8 +2,12 @@
 Script για δημιουργία standalone EXE του Stock Manager
 Τρέχει PyInstaller με τις σωστές παραμέτρους
 """
+import json
+import shutil
 import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
 
 def build_exe():
@@ -28,6 +32,9 @@ def build_exe():
         "--hidden-import=reportlab.platypus",
         "--hidden-import=openpyxl",
         "--hidden-import=pandas",
+        "--hidden-import=numpy",          # Γρήγορες διαδρομές του MovementStore
+        "--hidden-import=pyzbar.pyzbar",  # Barcodes (φορτώνεται με import_module)
+        "--collect-binaries=pyzbar",      # libzbar DLL του pyzbar
         "--clean",                        # Καθαρισμός πριν το build
         "app_pro.py"                      # Το main script
     ]
@@ -50,6 +57,9 @@ def build_exe():
         print("   ✓ Δεν μπορούν να δουν/αλλάξουν τον Python κώδικα")
         print("   ✓ Για updates, στείλε νέο EXE")
         
+        if not check_startup(Path('dist/StockManager.exe')):
+            sys.exit(1)
+        
     except subprocess.CalledProcessError as e:
         print("\n❌ ΣΦΑΛΜΑ κατά το build:")
         print(e.stderr)
@@ -59,5 +69,47 @@ def build_exe():
         print("Τρέξε πρώτα: pip install pyinstaller")
         sys.exit(1)
 
+def check_startup(exe):
+    """Μέτρηση χρόνου εκκίνησης του EXE με --startup-check και σύγκριση με το budget
+    
+    Το EXE τρέχει σε προσωρινό φάκελο με αντίγραφο του data, ώστε ο έλεγχος να
+    μην αγγίζει τα πραγματικά δεδομένα. Ο συνολικός χρόνος μετράει και την
+    αποσυμπίεση του --onefile πριν ξεκινήσει η Python.
+    """
+    print("\n⏱️ Έλεγχος χρόνου εκκίνησης...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if Path('data').exists():
+            shutil.copytree('data', Path(tmp) / 'data')
+        report_file = Path(tmp) / 'startup_check.json'
+        
+        started = time.perf_counter()
+        subprocess.run([str(exe.resolve()), f"--startup-check={report_file}"], cwd=tmp, timeout=120)
+        process_time = time.perf_counter() - started
+        
+        if not report_file.exists():
+            print("❌ Το EXE δεν έγραψε αναφορά εκκίνησης")
+            return False
+        report = json.loads(report_file.read_text(encoding='utf-8'))
+    
+    timings = dict(report['timings'], process=process_time)
+    budget = report['budget']
+    ok = True
+    for key, value in timings.items():
+        within = value <= budget[key]
+        ok = ok and within
+        print(f"   {'✓' if within else '✗'} {key}: {value:.2f}s (όριο {budget[key]:.1f}s)")
+    
+    if not ok:
+        print("❌ Η εκκίνηση ξεπερνά το όριο χρόνου!")
+    
+    # Προαιρετικά modules που φορτώνονται με import_module - το PyInstaller δεν τα βλέπει μόνο του
+    for feature, available in report.get('features', {}).items():
+        print(f"   {'✓' if available else '✗'} {feature}")
+        if not available:
+            print(f"❌ Το EXE δεν περιλαμβάνει το '{feature}'!")
+            ok = False
+    return ok
+
 if __name__ == "__main__":
     build_exe()
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Τα tests εισάγουν το app_pro.py από τη ρίζα του repo
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app_pro import Repository, StockLedger, StockManagerPro  # noqa: E402
+
+
+class RecordingPersister:
+    """Στη θέση του WriteBehindPersister: κρατάει ό,τι υποβάλλεται"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, ops, counts, full=False, stored=False):
+        self.submitted.append((list(ops), stored))
+
+
+@pytest.fixture
+def make_app():
+    """StockManagerPro χωρίς παράθυρο - μόνο τα δεδομένα και οι μέθοδοι που δεν αγγίζουν Tk"""
+    def make(storage):
+        app = StockManagerPro.__new__(StockManagerPro)
+        app.storage = storage
+        app.categories = []
+        products = storage.load_products()
+        movements = storage.load_movements()
+        app.repo = Repository(products, movements)
+        app.ledger = StockLedger.from_movements(products, movements)
+        app.history_ops = None
+        app.history_loaded = True
+        app.last_movement_id = app.repo.movements.last_id()
+        app.persister = RecordingPersister()
+        app.notified = set()
+        app.notify = lambda *views: app.notified.update(views)
+        app.show_notification = lambda message, type="info": None
+        app.update_category_filters = lambda: None
+        return app
+    return make
@@ -0,0 +1,122 @@
+"""Tests καταχώρισης κινήσεων (έλεγχος γραμμών, μαζική καταχώριση, barcodes)"""
+import time
+
+from app_pro import BarcodeBatch, SqliteStorage
+
+
+def product(product_id, **fields):
+    return dict({'id': product_id, 'name': f"Προϊόν {product_id}", 'code': f"C{product_id}",
+                 'category': "⚡ Άλλο", 'initial_stock': 10, 'min_limit': 5, 'price': 0}, **fields)
+
+
+def open_app(tmp_path, make_app):
+    storage = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    storage.apply([('add_product', product(1, name="Καφές", code="5201")),
+                   ('add_product', product(2, name="Ζάχαρη", code="5202"))])
+    return make_app(storage)
+
+
+# resolve_movement_lines
+
+def test_resolve_lines_by_code_or_name(tmp_path, make_app):
+    app = open_app(tmp_path, make_app)
+    movements, errors = app.resolve_movement_lines([
+        {'product': " 5202 ", 'type': 'in', 'quantity': "3"},
+        {'product': "ΚΑΦΕΣ", 'type': 'out', 'quantity': "1,5", 'notes': " πελάτης "},
+        {'product_id': 2, 'type': 'in', 'quantity': 2.0},
+    ])
+    assert errors == []
+    assert movements == [
+        {'product_id': 2, 'type': 'in', 'quantity': 3, 'notes': ''},
+        {'product_id': 1, 'type': 'out', 'quantity': 1.5, 'notes': "πελάτης"},
+        {'product_id': 2, 'type': 'in', 'quantity': 2, 'notes': ''},
+    ]
+    app.storage.close()
+
+
+def test_resolve_lines_reports_every_error(tmp_path, make_app):
+    app = open_app(tmp_path, make_app)
+    movements, errors = app.resolve_movement_lines([
+        {'product': "", 'type': 'in', 'quantity': "1"},
+        {'product': "Τσάι", 'type': 'in', 'quantity': "1"},
+        {'product_id': 1, 'type': 'move', 'quantity': "1"},
+        {'product_id': 1, 'type': 'in', 'quantity': "0"},
+        {'product_id': 1, 'type': 'in', 'quantity': "-2"},
+        {'product_id': 1, 'type': 'in', 'quantity': "nan"},
+        {'product_id': 1, 'type': 'in', 'quantity': "δύο"},
+        {'product_id': 1, 'type': 'in', 'quantity': "0.25"},
+    ])
+    assert [m['quantity'] for m in movements] == [0.25]
+    assert [index for index, message in errors] == [0, 1, 2, 3, 4, 5, 6]
+    assert errors[1][1] == "Άγνωστο προϊόν: Τσάι"
+    app.storage.close()
+
+
+# add_movements_bulk
+
+def test_bulk_movements_share_ids_date_and_one_submit(tmp_path, make_app):
+    app = open_app(tmp_path, make_app)
+    resolved, errors = app.resolve_movement_lines([
+        {'product': "5201", 'type': 'in', 'quantity': "4"},
+        {'product': "5202", 'type': 'out', 'quantity': "2.5"},
+        {'product': "5201", 'type': 'out', 'quantity': "1"},
+    ])
+    movements, errors = app.add_movements_bulk(resolved)
+    assert errors == []
+    assert [m['id'] for m in movements] == [1, 2, 3]
+    assert len({m['date'] for m in movements}) == 1
+    assert app.last_movement_id == 3
+    assert app.ledger.current(1) == 13 and app.ledger.current(2) == 7.5
+    assert len(app.repo.movements) == 3
+    # Μία υποβολή για όλη την παρτίδα
+    assert app.persister.submitted == [([('add_movement', m) for m in movements], False)]
+    assert app.notified == {'movements'}
+    app.storage.close()
+
+
+def test_bulk_movements_empty_batch(tmp_path, make_app):
+    app = open_app(tmp_path, make_app)
+    assert app.add_movements_bulk([]) == ([], [])
+    assert app.persister.submitted == []
+    app.storage.close()
+
+
+# BarcodeBatch
+
+def read_codes(path):
+    """Στη θέση του PIL/zbar: κάθε "εικόνα" του test έχει τους κωδικούς της ως κείμενο"""
+    text = path.read_text(encoding='utf-8')
+    if text == "χαλασμένη":
+        raise OSError("cannot identify image file")
+    return text.split()
+
+
+def test_barcode_batch_lines(tmp_path, make_app, monkeypatch):
+    app = open_app(tmp_path, make_app)
+    folder = tmp_path / "scans"
+    folder.mkdir()
+    for name, text in (("a.png", "5201 5201"), ("b.JPG", "5202 5201"), ("c.png", ""),
+                       ("d.jpeg", "9999"), ("e.png", "χαλασμένη"), ("notes.txt", "5202")):
+        (folder / name).write_text(text, encoding='utf-8')
+    monkeypatch.setattr(BarcodeBatch, 'decode_image', staticmethod(read_codes))
+
+    batch = BarcodeBatch(folder, workers=2)
+    assert [path.name for path in batch.files] == ["a.png", "b.JPG", "c.png", "d.jpeg", "e.png"]
+    deadline = time.monotonic() + 5
+    while not batch.finished() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert batch.finished() and len(batch.results) == 5
+    assert [result[0].name for result in batch.results if result[3] is not None] == ["e.png"]
+
+    # Μία γραμμή ανά κωδικό, ποσότητα = πόσες φορές διαβάστηκε
+    lines = batch.lines(app.repo.search)
+    assert lines == [
+        {'product': "5201", 'type': 'in', 'quantity': 3, 'notes': "barcode"},
+        {'product': "5202", 'type': 'in', 'quantity': 1, 'notes': "barcode"},
+        {'product': "9999", 'type': 'in', 'quantity': 1, 'notes': "barcode - άγνωστος κωδικός"},
+    ]
+    movements, errors = app.resolve_movement_lines(lines)
+    assert [(m['product_id'], m['quantity']) for m in movements] == [(1, 3), (2, 1)]
+    assert [index for index, message in errors] == [2]
+    assert batch.lines(app.repo.search, 'out')[0]['type'] == 'out'
+    app.storage.close()
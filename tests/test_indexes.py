@@ -0,0 +1,159 @@
+"""Tests ευρετηρίων μνήμης (κατάταξη δραστηριότητας, αναζήτηση, ταξινόμηση)"""
+import random
+from datetime import date
+
+from app_pro import ActivityRanking, ProductSearchIndex, SqliteStorage, StockLedger
+
+
+def product(product_id, **fields):
+    return dict({'id': product_id, 'name': f"Προϊόν {product_id}", 'code': f"C{product_id}",
+                 'category': "⚡ Άλλο", 'initial_stock': 10, 'min_limit': 5, 'price': 0}, **fields)
+
+
+def movement(movement_id, product_id, movement_type='in', quantity=1, date="2024-01-15 10:00:00"):
+    return {'id': movement_id, 'product_id': product_id, 'type': movement_type,
+            'quantity': quantity, 'notes': '', 'date': date}
+
+
+# ActivityRanking
+
+def expected_order(products, movements, category=None):
+    """Πλήρης ταξινόμηση (δραστηριότητα, id) για σύγκριση με την κατάταξη"""
+    totals = {p['id']: 0 for p in products if category is None or p['category'] == category}
+    for m in movements:
+        if m['product_id'] in totals:
+            totals[m['product_id']] += m['quantity']
+    return sorted((activity, product_id) for product_id, activity in totals.items())
+
+
+def test_ranking_matches_full_sort():
+    rng = random.Random(3)
+    products = [product(i, category=rng.choice("ΑΒ")) for i in range(1, 31)]
+    ledger = StockLedger(products)
+    movements = {}
+    for movement_id in range(1, 501):
+        if movements and rng.random() < 0.2:
+            ledger.remove(movements.pop(rng.choice(list(movements))))
+        else:
+            m = movement(movement_id, rng.randint(1, 30), rng.choice(('in', 'out')), rng.randint(1, 9))
+            movements[movement_id] = m
+            ledger.add(m)
+    # Αλλαγή κατηγορίας: το προϊόν περνάει στην κατάταξη της νέας
+    products[0]['category'] = "Γ"
+    ledger.set_product(products[0])
+
+    for category in (None, "Α", "Β", "Γ"):
+        order = expected_order(products, movements.values(), category)
+        top = [(total_in + total_out, product_id) for product_id, total_in, total_out in
+               ledger.activity.top(5, category)]
+        assert top == list(reversed(order[-5:]))
+        assert [row[0] for row in ledger.activity.bottom(5, category)] == [product_id for _, product_id in order[:5]]
+    assert ledger.activity.top(0) == [] and ledger.activity.bottom(-1) == []
+
+
+def test_ranking_window_advance():
+    products = [product(1), product(2), product(3)]
+    movements = [
+        movement(1, 1, quantity=50, date="2024-01-08 10:00:00"),  # πριν από το παράθυρο
+        movement(2, 2, quantity=5, date="2024-01-09 10:00:00"),
+        movement(3, 3, 'out', 3, date="2024-01-15 18:00:00"),
+    ]
+    ranking = ActivityRanking(products, days=7, today=date(2024, 1, 15), movements=movements)
+    assert ranking.start == "2024-01-09"
+    assert ranking.top(3) == [(2, 5, 0), (3, 0, 3), (1, 0, 0)]
+
+    # Στην αλλαγή ημέρας φεύγει ο κάδος της 09/01
+    ranking.advance(date(2024, 1, 16))
+    assert ranking.top(3) == [(3, 0, 3), (2, 0, 0), (1, 0, 0)]
+    ranking.add(movement(4, 1, quantity=2, date="2024-01-16 09:00:00"))
+    ranking.add(movement(5, 1, quantity=9, date="2024-01-01 09:00:00"))
+    assert ranking.top(1) == [(3, 0, 3)]
+    ranking.remove_product(3)
+    assert ranking.top(3) == [(1, 2, 0), (2, 0, 0)]
+
+    # Μετά από μια εβδομάδα χωρίς κινήσεις όλα γυρίζουν στο μηδέν
+    ranking.advance(date(2024, 1, 23))
+    assert ranking.top(3) == [(2, 0, 0), (1, 0, 0)]
+    assert ranking.buckets == {}
+
+
+# ProductSearchIndex
+
+def search_index():
+    return ProductSearchIndex([
+        product(1, name="Καφές Ελληνικός", code="C12"),
+        product(2, name="Ζάχαρη λευκή", code="ZX-100"),
+        product(3, name="Καφετιέρα", code="4012"),
+        product(4, name="Χαρτί κουζίνας", code=""),
+    ])
+
+
+def test_search_trigrams_and_accents():
+    index = search_index()
+    assert index.search("καφε") == {1, 3}
+    assert index.search("ΕΛΛΗΝΙΚ") == {1}
+    assert index.search("ΖΑΧΑΡΗ λευ") == {2}
+    assert index.search("zx-1") == {2}
+    # Τα τριγράμματα δίνουν υποψήφια - το substring τα επιβεβαιώνει
+    assert index.search("καφεκ") == set()
+    assert index.search("  ") is None
+
+
+def test_search_short_queries():
+    index = search_index()
+    # Αρχή λέξεων του ονόματος
+    assert index.search("κ") == {1, 3, 4}
+    assert index.search("λε") == {2}
+    assert index.search("ικ") == set()
+    # Οπουδήποτε μέσα στον κωδικό
+    assert index.search("12") == {1, 3}
+    assert index.search("0") == {2, 3}
+    assert index.search("-1") == {2}
+
+
+def test_search_updates_and_code_lookup():
+    index = search_index()
+    assert index.by_code(" c12 ") == 1
+    assert index.by_code("C1") is None
+
+    index.put(product(1, name="Τσάι", code="T7"))
+    index.remove(3)
+    assert index.search("καφ") == set()
+    assert index.search("12") == set()
+    assert index.search("τσ") == {1}
+    assert index.by_code("C12") is None and index.by_code("t7") == 1
+    assert index.ordered() == [2, 1, 4]
+    assert index.ordered({4, 2}) == [2, 4]
+
+
+# Ταξινόμηση (collation)
+
+def test_collation_ignores_accents_case_and_final_sigma():
+    key = ProductSearchIndex.collation_key
+    assert key("Καφές") == key("ΚΑΦΕΣ") == key("καφεσ")
+    assert key("Ϊόν") == key("ιον")
+    words = ["Ωμέγα", "άλφα", "Βήτα", "αλάτι", "ΈΨΙΛΟΝ", "ζάχαρη"]
+    assert sorted(words, key=key) == ["αλάτι", "άλφα", "Βήτα", "ΈΨΙΛΟΝ", "ζάχαρη", "Ωμέγα"]
+
+
+def test_movement_sort_keys(tmp_path, make_app):
+    storage = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    storage.apply([('add_product', product(1, name="Όστρακα", category="Β")),
+                   ('add_product', product(2, name="άμμος", category="α"))])
+    storage.apply([
+        ('add_movement', dict(movement(1, 1, quantity=10, date="2024-01-02 08:00:00"), notes="Ένα")),
+        ('add_movement', dict(movement(2, 2, 'out', 2.5, date="2024-01-01 20:00:00"), notes="δύο")),
+        ('add_movement', dict(movement(3, 1, quantity=9, date="2024-01-01 09:00:00"), notes="")),
+    ])
+    app = make_app(storage)
+    keys = app.movement_sort_keys()
+    ordered = lambda column: sorted([1, 2, 3], key=keys[column])
+
+    assert ordered("Ημερομηνία") == [3, 2, 1]
+    assert ordered("Ώρα") == [1, 3, 2]
+    assert ordered("Προϊόν") == [2, 1, 3]
+    assert ordered("Κατηγορία") == [2, 1, 3]
+    # Αριθμητικά, όχι ως κείμενο ("10" < "2.5")
+    assert ordered("Ποσότητα") == [2, 3, 1]
+    assert ordered("Σημειώσεις") == [3, 2, 1]
+    storage.close()
@@ -0,0 +1,519 @@
+"""Tests αποθήκευσης, backups και δεδομένων μνήμης (χωρίς Tk)
+
+Τρέχουν με: python -m pytest -q
+"""
+import json
+import random
+import sqlite3
+import time
+
+import pytest
+
+from app_pro import (
+    BackupManager, JsonStorage, MovementStore, Repository, SqliteStorage, StockLedger, WriteBehindPersister,
+    startup_check_data
+)
+
+
+def product(product_id, **fields):
+    return dict({'id': product_id, 'name': f"Προϊόν {product_id}", 'code': f"C{product_id}",
+                 'category': "⚡ Άλλο", 'initial_stock': 10, 'min_limit': 5, 'price': 0}, **fields)
+
+
+def movement(movement_id, product_id, movement_type='in', quantity=1, date="2024-01-15 10:00:00"):
+    return {'id': movement_id, 'product_id': product_id, 'type': movement_type,
+            'quantity': quantity, 'notes': '', 'date': date}
+
+
+def open_json(data_dir):
+    storage = JsonStorage(data_dir)
+    storage.load_categories()
+    storage.load_products()
+    storage.load_movements()
+    return storage
+
+
+# JsonStorage
+
+def test_journal_replay(tmp_path):
+    storage = open_json(tmp_path)
+    storage.apply([('add_product', product(1))])
+    storage.apply([('add_movement', movement(i, 1)) for i in range(1, 6)])
+    storage.apply([('delete_movement', 3)])
+
+    # Χωρίς close(): οι κινήσεις υπάρχουν μόνο στο journal
+    assert storage.journal_file.exists()
+    reopened = JsonStorage(tmp_path)
+    assert sorted(m['id'] for m in reopened.load_movements()) == [1, 2, 4, 5]
+    assert reopened.journal_entries == 6
+
+
+def test_journal_torn_line_is_truncated(tmp_path):
+    storage = open_json(tmp_path)
+    storage.apply([('add_movement', movement(1, 1)), ('add_movement', movement(2, 1))])
+    storage.journal_handle.close()
+    valid_size = storage.journal_file.stat().st_size
+    with open(storage.journal_file, 'ab') as f:
+        f.write(b'{"op": "add", "movement": {"id": 3, "prod')
+
+    reopened = JsonStorage(tmp_path)
+    assert sorted(m['id'] for m in reopened.load_movements()) == [1, 2]
+    assert storage.journal_file.stat().st_size == valid_size
+
+    # Οι νέες εγγραφές ξεκινούν σε καθαρή γραμμή
+    reopened.apply([('add_movement', movement(4, 1))])
+    assert sorted(m['id'] for m in JsonStorage(tmp_path).load_movements()) == [1, 2, 4]
+
+
+def test_json_apply_retry_after_failed_write(tmp_path, monkeypatch):
+    storage = open_json(tmp_path)
+    ops = [('add_product', product(1)), ('add_movement', movement(1, 1))]
+
+    def fail(entries):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage, 'append_journal', fail)
+    with pytest.raises(OSError):
+        storage.apply(ops)
+    monkeypatch.undo()
+
+    storage.apply(ops)
+    assert [p['id'] for p in storage.products] == [1]
+    reopened = JsonStorage(tmp_path)
+    assert [p['id'] for p in reopened.load_products()] == [1]
+    assert [m['id'] for m in reopened.load_movements()] == [1]
+
+
+# SqliteStorage
+
+def write_json_data(data_dir, products, movements, categories):
+    for name, data in (("products", products), ("movements", movements), ("categories", categories)):
+        with open(data_dir / f"{name}.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def test_sqlite_migrates_json_files(tmp_path):
+    products = [product(1, supplier="Α"), product(2, name="Προϊόν 1"), product(3, price=2.5)]
+    movements = [movement(1, 1, quantity=4), movement(2, 1, 'out', 1.5, "2024-02-01 09:00:00"),
+                 movement(3, 3, quantity=2)]
+    write_json_data(tmp_path, products, movements, ["Α", "Β"])
+
+    storage = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    # Το διπλότυπο όνομα κρατιέται ως "όνομα #id", τα επιπλέον πεδία μένουν
+    assert storage.load_products() == [products[0], product(2, name="Προϊόν 1 #2"), products[2]]
+    assert storage.load_movements() == movements
+    assert storage.load_categories() == ["Α", "Β"]
+    assert storage.load_balances() == {1: {'in': 4, 'out': 1.5, 'count': 2}, 3: {'in': 2, 'out': 0, 'count': 1}}
+    assert storage.load_rollups()["2024-01"] == {'in': 6, 'out': 0, 'count': 2}
+    storage.close()
+
+
+def test_sqlite_migrates_json_only_once(tmp_path):
+    write_json_data(tmp_path, [product(1)], [movement(1, 1)], ["Α"])
+    storage = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    storage.apply([('delete_movement', 1)])
+    storage.close()
+
+    # Τα αρχεία JSON μένουν στον φάκελο αλλά δεν ξαναδιαβάζονται
+    write_json_data(tmp_path, [product(1), product(2)], [movement(1, 1), movement(2, 2)], ["Α", "Β"])
+    reopened = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    assert [p['id'] for p in reopened.load_products()] == [1]
+    assert reopened.load_movements() == []
+    assert reopened.load_categories() == ["Α"]
+    reopened.close()
+
+
+def test_sqlite_remote_deletes_carry_details(tmp_path):
+    writer = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    reader = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    writer.apply([('add_product', product(1)), ('add_movement', movement(1, 1, quantity=4))])
+    writer.apply([('delete_movement', 1), ('delete_product', 1)])
+
+    changes = reader.poll_changes()
+    assert [op for op, payload, details in changes] == ['add_product', 'add_movement', 'delete_movement', 'delete_product']
+    assert changes[2][2] == {'id': 1, 'product_id': 1, 'type': 'in', 'quantity': 4, 'date': "2024-01-15 10:00:00"}
+    assert changes[3][2] == []
+    writer.close()
+    reader.close()
+
+
+def test_sqlite_session_flag_per_machine(tmp_path):
+    first = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    second = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    second.conn.execute("INSERT INTO settings (key, value) VALUES ('session_open:other', 'x')")
+    second.conn.commit()
+    first.close()
+    assert second.get_setting('session_open:other') == 'x'
+    second.close()
+
+
+# Backups
+
+def write_chain(manager):
+    products = [product(1)]
+    movements = [movement(1, 1)]
+    base = manager.write({'products': 1, 'movements': 1, 'categories': 1},
+                         lambda: (products, movements, ["Α"]))
+    manager.record([('add_movement', movement(2, 1)), ('update_product', product(1, name="Νέο"))])
+    first = manager.write({'products': 1, 'movements': 2, 'categories': 1}, lambda: None)
+    manager.record([('delete_movement', 1), ('set_categories', ["Α", "Β"])])
+    second = manager.write({'products': 1, 'movements': 1, 'categories': 2}, lambda: None)
+    return base, first, second
+
+
+def test_backup_chain_replay(tmp_path):
+    manager = BackupManager(tmp_path)
+    base, first, second = write_chain(manager)
+    assert not manager.is_delta(base) and manager.is_delta(first) and manager.is_delta(second)
+    assert manager.entry(second)['parent'] == first.name
+
+    products, movements, categories = manager.load(first)
+    assert [p['name'] for p in products] == ["Νέο"]
+    assert sorted(m['id'] for m in movements) == [1, 2]
+
+    products, movements, categories = manager.load(second)
+    assert [m['id'] for m in movements] == [2]
+    assert categories == ["Α", "Β"]
+
+    # Το manifest αρκεί για τη λίστα και τα πλήθη, χωρίς ανάγνωση των backups
+    reopened = BackupManager(tmp_path)
+    assert reopened.list_backups() == [second, first, base]
+    assert reopened.summary(second) == {'products': 1, 'movements': 1, 'categories': 2}
+    manager.close()
+    reopened.close()
+
+
+def test_backup_bad_checksum_fails(tmp_path):
+    manager = BackupManager(tmp_path)
+    base, first, second = write_chain(manager)
+    manager.entries[base.name]['checksum'] = "0" * 64
+    with pytest.raises(ValueError, match="checksum"):
+        manager.load(second)
+    manager.close()
+
+
+# Ανάκτηση
+
+def test_sqlite_damaged_database_is_set_aside(tmp_path):
+    (tmp_path / "stock.db").write_bytes(b"not a database" * 100)
+    write_json_data(tmp_path, [product(1)], [movement(1, 1)], ["Α"])
+
+    storage = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    assert storage.damaged == ["stock.db"]
+    assert len(list(tmp_path.glob("stock.db.corrupt-*"))) == 1
+    # Τα JSON είναι παλιότερα από τη βάση που χάλασε - δεν μεταφέρονται
+    assert storage.load_products() == [] and storage.load_movements() == []
+
+    storage.recover([product(2)], [movement(5, 2, quantity=3)], ["Β"])
+    assert storage.damaged == []
+    assert [p['id'] for p in storage.load_products()] == [2]
+    assert storage.load_balances() == {2: {'in': 3, 'out': 0, 'count': 1}}
+    storage.close()
+
+
+def test_json_recover_rebuilds_only_damaged_files(tmp_path):
+    storage = open_json(tmp_path)
+    storage.replace_all([product(1)], [movement(1, 1)], ["Α"])
+    storage.apply([('add_movement', movement(2, 1))])
+    (tmp_path / "products.json").write_text('[{"id": 1, "na', encoding='utf-8')
+
+    reopened = open_json(tmp_path)
+    assert reopened.damaged == ["products.json"]
+    assert len(list(tmp_path.glob("products.json.corrupt-*"))) == 1
+
+    reopened.recover([product(1, name="Από backup")], [], ["Χ"])
+    assert [p['name'] for p in reopened.load_products()] == ["Από backup"]
+    # Κινήσεις και κατηγορίες δεν είχαν πρόβλημα - μένουν όπως ήταν (μαζί με το journal)
+    assert sorted(m['id'] for m in reopened.load_movements()) == [1, 2]
+    assert reopened.load_categories() == ["Α"]
+
+
+def test_recover_storage_skips_broken_backup(tmp_path, make_app):
+    manager = BackupManager(tmp_path / "backups")
+    base, first, second = write_chain(manager)
+    manager.entries[second.name]['checksum'] = "0" * 64
+    (tmp_path / "stock.db").write_bytes(b"not a database" * 100)
+
+    app = make_app(SqliteStorage(tmp_path / "stock.db", tmp_path))
+    app.backups = manager
+    assert app.recover_storage() == (["stock.db"], first)
+    assert [p['name'] for p in app.repo.products] == ["Νέο"]
+    assert sorted(m['id'] for m in app.storage.load_movements()) == [1, 2]
+    assert app.recover_storage() is None
+    app.storage.close()
+    manager.close()
+
+
+# WriteBehindPersister
+
+class FlakyStorage:
+    """Storage που αποτυγχάνει στις πρώτες failures εγγραφές"""
+
+    def __init__(self, failures=0, fail_on='apply'):
+        self.failures = failures
+        self.fail_on = fail_on
+        self.applied = []
+        self.replaced = 0
+
+    def maybe_fail(self, method):
+        if method == self.fail_on and self.failures:
+            self.failures -= 1
+            raise OSError("database is locked")
+
+    def apply(self, ops):
+        self.maybe_fail('apply')
+        self.applied.extend(ops)
+        return []
+
+    def replace_all(self, products, movements, categories):
+        self.maybe_fail('replace_all')
+        self.replaced += 1
+
+    def snapshot(self):
+        return [], [], []
+
+
+class NullBackups:
+    def record(self, ops):
+        list(ops)
+
+    def write(self, counts, snapshot, full=False):
+        return None
+
+
+def wait_for(condition, timeout=5):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_persister_keeps_failed_batch_and_retries(tmp_path):
+    storage = FlakyStorage(failures=2)
+    persister = WriteBehindPersister(storage, NullBackups())
+    persister.RETRY_DELAY = 0.05
+    persister.submit([('add_movement', movement(1, 1))], {})
+
+    # Το flush κάνει μία προσπάθεια και επιστρέφει το σφάλμα - οι αλλαγές μένουν στην ουρά
+    with pytest.raises(OSError):
+        persister.flush()
+    assert persister.state == 'error'
+    assert persister.queue
+
+    # Νέες αλλαγές δεν καθαρίζουν την κατάσταση σφάλματος
+    persister.submit([('add_movement', movement(2, 1))], {})
+    assert persister.state == 'error'
+
+    assert wait_for(lambda: persister.state == 'saved')
+    assert [payload['id'] for op, payload in storage.applied] == [1, 2]
+    assert persister.last_error is None
+    persister.close()
+
+
+def test_persister_does_not_replay_committed_segment():
+    storage = FlakyStorage(failures=1, fail_on='replace_all')
+    persister = WriteBehindPersister(storage, NullBackups())
+    persister.RETRY_DELAY = 0.05
+    persister.submit([('add_movement', movement(1, 1))], {})
+    persister.submit([('replace_all', ([], [], []))], {}, full=True)
+    with pytest.raises(OSError):
+        persister.flush()
+    persister.flush()
+    assert len(storage.applied) == 1
+    assert storage.replaced == 1
+    assert persister.state == 'saved'
+    persister.close()
+
+
+def test_sqlite_rejects_conflicting_op_and_keeps_the_rest(tmp_path):
+    station_a = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    station_b = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    station_a.apply([('add_product', product(1)), ('add_product', product(2))])
+    station_a.apply([('delete_product', 1)])
+
+    rejected = station_b.apply([
+        ('add_movement', movement(1, 1)),
+        ('add_movement', movement(2, 2)),
+        ('update_product', product(1, name="Άλλο")),
+    ])
+    assert [position for position, error in rejected] == [0, 2]
+    assert [m['id'] for m in station_b.load_movements()] == [2]
+    assert station_b.load_balances() == {2: {'in': 1, 'out': 0, 'count': 1}}
+    station_a.close()
+    station_b.close()
+
+
+def test_persister_drops_rejected_ops_without_blocking(tmp_path):
+    station_a = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    station_b = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    station_a.apply([('add_product', product(1))])
+    station_a.apply([('delete_product', 1)])
+
+    persister = WriteBehindPersister(station_b, NullBackups())
+    persister.submit([('add_movement', movement(1, 1))], {})
+    persister.flush()
+    persister.submit([('add_product', product(2))], {})
+    persister.flush()
+
+    assert persister.state == 'saved'
+    [((op, payload), error)] = persister.take_rejected()
+    assert op == 'add_movement' and payload['id'] == 1
+    assert [p['id'] for p in station_b.load_products()] == [2]
+    assert persister.take_rejected() == []
+    persister.close()
+    station_a.close()
+    station_b.close()
+
+
+def test_persister_permanent_error_is_reported_not_retried():
+    class BrokenStorage(FlakyStorage):
+        def apply(self, ops):
+            raise ValueError("Άγνωστη λειτουργία αποθήκευσης")
+
+    persister = WriteBehindPersister(BrokenStorage(), NullBackups())
+    persister.submit([('add_movement', movement(1, 1))], {})
+    persister.flush()
+    assert persister.state == 'saved'
+    assert [op for (op, payload), error in persister.take_rejected()] == ['add_movement']
+    persister.close()
+
+
+# StockLedger / Repository / MovementStore
+
+def test_ledger_matches_recompute():
+    rng = random.Random(7)
+    products = {i: product(i, category=rng.choice("ΑΒΓ"), min_limit=rng.randint(0, 20)) for i in range(1, 21)}
+    ledger = StockLedger(products.values())
+    movements = {}
+    for movement_id in range(1, 2001):
+        action = rng.random()
+        if action < 0.7:
+            m = movement(movement_id, rng.choice(list(products)), rng.choice(('in', 'out')), rng.randint(1, 9),
+                         f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00")
+            movements[movement_id] = m
+            ledger.add(m)
+        elif action < 0.85 and movements:
+            ledger.remove(movements.pop(rng.choice(list(movements))))
+        elif action < 0.95:
+            p = products[rng.choice(list(products))]
+            p.update(category=rng.choice("ΑΒΓΔ"), initial_stock=rng.randint(0, 30))
+            ledger.set_product(p)
+        elif len(products) > 5:
+            product_id = rng.choice(list(products))
+            del products[product_id]
+            deleted = [m for m in movements.values() if m['product_id'] == product_id]
+            for m in deleted:
+                del movements[m['id']]
+            ledger.remove_product(product_id, deleted)
+
+    assert ledger.check(products.values(), list(movements.values())) == []
+
+    ledger.entries[next(iter(ledger.entries))][0] += 1
+    assert ledger.check(products.values(), list(movements.values()))
+
+
+def test_ledger_from_store_matches_from_dicts():
+    movements = [movement(i, 1 + i % 3, 'in' if i % 2 else 'out', i, f"2024-0{1 + i % 9}-01 08:00:00")
+                 for i in range(1, 200)]
+    products = [product(i) for i in (1, 2, 3)]
+    from_store = StockLedger.from_movements(products, MovementStore(movements))
+    assert from_store.check(products, movements) == []
+
+
+def test_movements_between_bounds():
+    repo = Repository([product(1)], [
+        movement(1, 1, date="2023-12-31 23:59:59"),
+        movement(2, 1, date="2024-01-01 00:00:00"),
+        movement(5, 1, date="2024-01-31 23:59:59"),
+        movement(3, 1, date="2024-01-15 10:00:00"),
+        movement(4, 1, date="2024-02-01 00:00:00"),
+    ])
+    assert [m['id'] for m in repo.movements_between("2024-01-01", "2024-01-31")] == [2, 3, 5]
+    assert [m['id'] for m in repo.movements_between("2024-01-01", "2024-01-31", newest_first=True)] == [5, 3, 2]
+    assert repo.movements_between("2024-03-01", "2024-03-31") == []
+    assert repo.count_between("2024-01-31", "2024-02-01") == 2
+
+    repo.delete_movement(3)
+    repo.add_movement(movement(6, 1, date="2024-01-01 00:00:00"))
+    assert [m['id'] for m in repo.movements_between("2024-01-01", "2024-01-31")] == [2, 6, 5]
+
+
+def test_movement_store_round_trip():
+    movements = [movement(i, 1 + i % 4, 'in' if i % 3 else 'out', i * 1.5, f"2024-05-{1 + i % 28:02d} 09:30:00")
+                 for i in range(1, 50)]
+    store = MovementStore(movements)
+    assert [store.movement(m['id']) for m in movements] == movements
+    assert store.ids_where(product_id=2, movement_type='out') == [
+        m['id'] for m in movements if m['product_id'] == 2 and m['type'] == 'out'
+    ]
+    store.delete(10)
+    assert 10 not in store and len(store) == 48
+
+
+# Φόρτωση ιστορικού
+
+class AfterRoot:
+    """Στη θέση του Tk root: κρατάει τις κλήσεις του after"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+
+
+def test_history_waiters_run_after_loader(tmp_path, make_app):
+    storage = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    storage.apply([('add_product', product(1))])
+    storage.apply([('add_movement', movement(i, 1)) for i in range(1, 81)])
+    app = make_app(storage)
+    app.root = AfterRoot()
+    app.history_waiters = []
+    app.load_data()
+    assert not app.history_loaded and len(app.repo.movements) == app.RECENT_MOVEMENTS
+
+    ran = []
+    export = lambda: ran.append(len(app.repo.movements))
+    # Χωρίς αναμονή: η ενέργεια μπαίνει μία φορά στην ουρά
+    assert app.ensure_history(export) is False
+    assert app.ensure_history(export) is False
+    app.poll_history_loader()
+    assert ran == [] and app.root.scheduled == [app.poll_history_loader]
+
+    app.history_result['movements'] = Repository((), storage.iter_movements_readonly())
+    app.poll_history_loader()
+    assert app.history_loaded and ran == [80]
+    assert app.history_waiters == []
+    assert app.ensure_history(export) is True
+    storage.close()
+
+
+# --startup-check
+
+def test_startup_check_uses_a_copy_of_data(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    # Σταθμός που τρέχει: ανοιχτή συνεδρία και κινήσεις μόνο στο WAL
+    live = SqliteStorage(data_dir / "stock_manager.db", data_dir)
+    live.apply([('add_product', product(1)), ('add_movement', movement(1, 1))])
+    manager = BackupManager(data_dir / "backups")
+    write_chain(manager)
+
+    copy = startup_check_data(data_dir)
+    assert copy.parent.name.startswith("stock_check_")
+    assert not (copy / "backups" / "backups.lock").exists()
+    assert (copy / "backups" / "manifest.jsonl").exists()
+    # Χωρίς τη συνεδρία του σταθμού: ο έλεγχος μετράει κανονική εκκίνηση (όχι quick_check)
+    conn = sqlite3.connect(str(copy / "stock_manager.db"))
+    assert conn.execute("SELECT key FROM settings WHERE key LIKE 'session_open%'").fetchall() == []
+    conn.close()
+    checked = SqliteStorage(copy / "stock_manager.db", copy)
+    assert checked.damaged == []
+    assert [m['id'] for m in checked.load_movements()] == [1]
+    checked.close()
+
+    # Το πρωτότυπο μένει όπως ήταν, με τη συνεδρία του σταθμού ανοιχτή
+    assert live.get_setting(live.session_key) is not None
+    assert [m['id'] for m in live.load_movements()] == [1]
+    live.close()
+    manager.close()
@@ -0,0 +1,102 @@
+"""Tests πολλών σταθμών στην ίδια βάση (change_log, συγκρούσεις)"""
+from app_pro import SqliteStorage, unique_product_names
+
+
+def product(product_id, **fields):
+    return dict({'id': product_id, 'name': f"Προϊόν {product_id}", 'code': f"C{product_id}",
+                 'category': "⚡ Άλλο", 'initial_stock': 10, 'min_limit': 5, 'price': 0}, **fields)
+
+
+def movement(movement_id, product_id, movement_type='in', quantity=1, date="2024-01-15 10:00:00"):
+    return {'id': movement_id, 'product_id': product_id, 'type': movement_type,
+            'quantity': quantity, 'notes': '', 'date': date}
+
+
+def two_stations(tmp_path):
+    return SqliteStorage(tmp_path / "stock.db", tmp_path), SqliteStorage(tmp_path / "stock.db", tmp_path)
+
+
+def test_duplicate_name_is_rejected_not_renamed(tmp_path):
+    station_a, station_b = two_stations(tmp_path)
+    station_a.apply([('add_product', product(1))])
+    rejected = station_b.apply([('add_product', product(2, name="Προϊόν 1")), ('add_product', product(3))])
+    assert [position for position, error in rejected] == [0]
+    assert [p['name'] for p in station_b.load_products()] == ["Προϊόν 1", "Προϊόν 3"]
+    station_a.close()
+    station_b.close()
+
+
+def test_replace_all_and_restore_rename_duplicates_alike(tmp_path):
+    storage = SqliteStorage(tmp_path / "stock.db", tmp_path)
+    products = [product(1, name="Α"), product(2, name="Α"), product(3, name="Β")]
+    storage.replace_all(products, [], [])
+    assert [p['name'] for p in storage.load_products()] == ["Α", "Α #2", "Β"]
+    # Η επαναφορά κάνει την ίδια μετονομασία στη μνήμη
+    assert [p['name'] for p in unique_product_names(products)] == ["Α", "Α #2", "Β"]
+    storage.close()
+
+
+def test_merge_remote_changes_keeps_ledger_in_sync(tmp_path, make_app):
+    station_a, station_b = two_stations(tmp_path)
+    station_a.apply([('add_product', product(1)), ('add_product', product(2))])
+    station_a.apply([('add_movement', movement(i, 1 + i % 2, 'in' if i % 3 else 'out', i)) for i in range(1, 10)])
+    app = make_app(station_b)
+    station_b.poll_changes()
+
+    station_a.apply([('delete_movement', 4), ('add_movement', movement(20, 2)),
+                     ('update_product', product(1, initial_stock=3)), ('delete_product', 2)])
+    app.sync_remote_changes()
+
+    assert app.ledger.check(station_b.load_products(), station_b.load_movements()) == []
+    assert app.repo.product(2) is None
+    assert {'products', 'movements'} <= app.notified
+    # Οι αλλαγές του άλλου σταθμού πάνε μόνο στο backup
+    assert all(stored for ops, stored in app.persister.submitted)
+    station_a.close()
+    station_b.close()
+
+
+def test_bulk_entry_checks_remote_deletions_first(tmp_path, make_app):
+    station_a, station_b = two_stations(tmp_path)
+    station_a.apply([('add_product', product(1)), ('add_product', product(2))])
+    app = make_app(station_b)
+    station_b.poll_changes()
+
+    # Ο διάλογος ελέγχει τις γραμμές - το προϊόν διαγράφεται πριν από την καταχώριση
+    resolved, errors = app.resolve_movement_lines([
+        {'product_id': 1, 'type': 'in', 'quantity': 2},
+        {'product_id': 2, 'type': 'in', 'quantity': 3},
+    ])
+    assert errors == []
+    station_a.apply([('delete_product', 1)])
+    movements, errors = app.add_movements_bulk(resolved)
+    assert movements == []
+    assert [index for index, message in errors] == [0]
+    assert app.persister.submitted == [([('delete_product', 1)], True)]
+    station_a.close()
+    station_b.close()
+
+
+def test_rejected_ops_are_undone_in_memory(tmp_path, make_app, monkeypatch):
+    station_a, station_b = two_stations(tmp_path)
+    station_a.apply([('add_product', product(1)), ('add_product', product(2))])
+    app = make_app(station_b)
+    warnings = []
+    monkeypatch.setattr("app_pro.messagebox.showwarning", lambda title, message: warnings.append(message))
+
+    # Ο σταθμός B καταχώρησε κίνηση και μετονόμασε προϊόν - η βάση τα απέρριψε
+    added = movement(1, 1, quantity=4)
+    app.repo.add_movement(added)
+    app.ledger.add(added)
+    renamed = product(2, name="Προϊόν 1")
+    app.repo.put_product(renamed)
+    app.ledger.set_product(renamed)
+    app.undo_rejected([(('add_movement', added), "FOREIGN KEY constraint failed"),
+                       (('update_product', renamed), "UNIQUE constraint failed")])
+
+    assert len(app.repo.movements) == 0
+    assert app.repo.product(2)['name'] == "Προϊόν 2"
+    assert app.ledger.check(station_b.load_products(), station_b.load_movements()) == []
+    assert len(warnings) == 1 and "Προϊόν 1" in warnings[0]
+    station_a.close()
+    station_b.close()